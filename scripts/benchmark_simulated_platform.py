@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark the SimulatedPlatform used by the elastic scheduler against the original implementation.
+
+Runs the same allocation pattern as ZoeElasticScheduler.loop_start_th() on random platforms and executions, checks that
+both implementations take the same placement decisions and prints the time they take. Then compares the packing
+efficiency of the available placement strategies.
+
+Usage: scripts/benchmark_simulated_platform.py [nodes] [executions] [elastic services per execution]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from zoe_master.scheduler.placement import PLACEMENT_STRATEGIES  # pylint: disable=wrong-import-position
+from zoe_master.scheduler.simulated_platform import SimulatedPlatform  # pylint: disable=wrong-import-position
+from zoe_master.stats import ClusterStats, NodeStats  # pylint: disable=wrong-import-position
+
+GB = 1024 ** 3
+
+
+class _Limits:
+    def __init__(self, value):
+        self.min = value
+
+
+class _Reservation:
+    def __init__(self, memory, cores):
+        self.memory = _Limits(memory)
+        self.cores = _Limits(cores)
+
+
+class FakeService:
+    """The parts of a Service used by the simulated platform."""
+    ACTIVE_STATUS = 'active'
+
+    def __init__(self, service_id, memory, essential, cores=None):
+        self.id = service_id
+        self.essential = essential
+        self.status = 'created'
+        self.resource_reservation = _Reservation(memory, cores)
+
+    def set_runnable(self):
+        """Mark as runnable."""
+        self.status = 'runnable'
+
+    def set_inactive(self):
+        """Mark as inactive."""
+        self.status = 'inactive'
+
+    def __eq__(self, other):
+        return self.id == other.id
+
+
+class FakeExecution:
+    """The parts of an Execution used by the simulated platform."""
+    def __init__(self, services):
+        self.essential_services = [s for s in services if s.essential]
+        self.elastic_services = [s for s in services if not s.essential]
+
+
+class ReferenceNode:
+    """The original SimulatedNode, recomputes free memory on every call."""
+    def __init__(self, real_node):
+        self.real_free_resources = {"memory": real_node.memory_free}
+        self.real_active_containers = real_node.container_count
+        self.services = []
+        self.name = real_node.name
+
+    def service_fits(self, service):
+        """Checks whether a service can fit in this node"""
+        return service.resource_reservation.memory.min < self.node_free_memory()
+
+    def service_add(self, service):
+        """Add a service in this node."""
+        if self.service_fits(service):
+            self.services.append(service)
+            return True
+        return False
+
+    def service_remove(self, service):
+        """Remove a service from this node."""
+        try:
+            self.services.remove(service)
+        except ValueError:
+            return False
+        return True
+
+    @property
+    def container_count(self):
+        """Return the number of containers on this node"""
+        return self.real_active_containers + len(self.services)
+
+    def node_free_memory(self):
+        """Return the amount of free memory for this node"""
+        return self.real_free_resources['memory'] - sum(s.resource_reservation.memory.min for s in self.services)
+
+
+class ReferencePlatform:
+    """The original SimulatedPlatform, scans and sorts all nodes for each service."""
+    def __init__(self, platform_status):
+        self.nodes = {}
+        for node in platform_status.nodes:
+            self.nodes[node.name] = ReferenceNode(node)
+
+    def _place(self, service):
+        candidate_nodes = [node for node in self.nodes.values() if node.service_fits(service)]
+        if len(candidate_nodes) == 0:
+            return False
+        candidate_nodes.sort(key=lambda n: n.container_count)
+        candidate_nodes[0].service_add(service)
+        return True
+
+    def allocate_essential(self, execution):
+        """Try to find an allocation for essential services"""
+        for service in execution.essential_services:
+            if not self._place(service):
+                self.deallocate_essential(execution)
+                return False
+        return True
+
+    def deallocate_essential(self, execution):
+        """Remove all essential services from the simulated cluster"""
+        for service in execution.essential_services:
+            for node in self.nodes.values():
+                if node.service_remove(service):
+                    break
+
+    def allocate_elastic(self, execution):
+        """Try to find an allocation for elastic services"""
+        at_least_one_allocated = False
+        for service in execution.elastic_services:
+            if service.status == service.ACTIVE_STATUS:
+                continue
+            if self._place(service):
+                service.set_runnable()
+                at_least_one_allocated = True
+        return at_least_one_allocated
+
+    def deallocate_elastic(self, execution):
+        """Remove all elastic services from the simulated cluster"""
+        for service in execution.elastic_services:
+            for node in self.nodes.values():
+                if node.service_remove(service):
+                    service.set_inactive()
+                    break
+
+    def aggregated_free_memory(self):
+        """Return the amount of free memory across all nodes"""
+        return sum(node.node_free_memory() for node in self.nodes.values())
+
+    def get_service_allocation(self):
+        """Return a map of service IDs to nodes where they have been allocated."""
+        placements = {}
+        for node_id, node in self.nodes.items():
+            for service in node.services:
+                placements[service.id] = node_id
+        return placements
+
+
+def make_platform(node_count, rnd):
+    """Generate a random platform state."""
+    platform = ClusterStats()
+    for index in range(node_count):
+        node = NodeStats('node{}'.format(index))
+        node.memory_free = rnd.randint(16, 128) * GB
+        node.cores_free = rnd.choice([8, 16, 32])
+        node.container_count = rnd.randint(0, 10)
+        platform.nodes.append(node)
+    return platform
+
+
+def make_executions(exec_count, elastic_count, rnd, with_cores=False):
+    """Generate random executions, the services reserve cores only if with_cores is True."""
+    executions = []
+    service_id = 0
+    for exec_n_ in range(exec_count):
+        services = []
+        for service_n in range(2 + elastic_count):
+            cores = rnd.randint(1, 4) if with_cores else None
+            services.append(FakeService(service_id, rnd.randint(1, 8) * GB, service_n < 2, cores))
+            service_id += 1
+        executions.append(FakeExecution(services))
+    return executions
+
+
+def schedule(platform_class, platform_state, executions, *args):
+    """Run the simulation loop of the elastic scheduler once, return the final placements."""
+    cluster_status_snapshot = platform_class(platform_state, *args)
+    jobs_to_launch = []
+    free_resources = cluster_status_snapshot.aggregated_free_memory()
+    for job in executions:
+        jobs_to_launch_copy = jobs_to_launch.copy()
+        for job_aux in jobs_to_launch:
+            cluster_status_snapshot.deallocate_elastic(job_aux)
+        if cluster_status_snapshot.allocate_essential(job):
+            jobs_to_launch.append(job)
+        for job_aux in jobs_to_launch:
+            cluster_status_snapshot.allocate_elastic(job_aux)
+        current_free_resources = cluster_status_snapshot.aggregated_free_memory()
+        if current_free_resources >= free_resources:
+            jobs_to_launch = jobs_to_launch_copy
+            break
+        free_resources = current_free_resources
+    return cluster_status_snapshot.get_service_allocation(), free_resources, cluster_status_snapshot
+
+
+def main():
+    """Benchmark entrypoint."""
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    exec_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    elastic_count = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    rnd = random.Random(42)
+    platform_state = make_platform(node_count, rnd)
+    results = {}
+    for name, platform_class in [('reference', ReferencePlatform), ('indexed', SimulatedPlatform)]:
+        executions = make_executions(exec_count, elastic_count, random.Random(43))
+        start = time.time()
+        results[name] = schedule(platform_class, platform_state, executions)
+        print('{:10s} {:8.3f}s'.format(name, time.time() - start))
+
+    assert results['reference'][:2] == results['indexed'][:2], 'The two implementations took different decisions'
+    print('Same decisions: {} services placed'.format(len(results['indexed'][0])))
+
+    print('Placement strategies, services reserving memory and cores:')
+    for name, strategy_class in sorted(PLACEMENT_STRATEGIES.items()):
+        executions = make_executions(exec_count, elastic_count, random.Random(43), with_cores=True)
+        start = time.time()
+        allocation, free_memory_, snapshot = schedule(SimulatedPlatform, platform_state, executions, strategy_class())
+        efficiency = snapshot.packing_efficiency()
+        print('{:22s} {:8.3f}s {:6d} services, memory {:.1%}, cores {:.1%}, nodes {:.1%}'.format(name, time.time() - start, len(allocation), efficiency['memory'], efficiency['cores'], efficiency['nodes']))
+
+
+if __name__ == '__main__':
+    main()
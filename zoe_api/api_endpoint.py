@@ -15,9 +15,13 @@
 
 """The real API, exposed as web pages or REST API."""
 
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import re
 
+import tornado.gen
+from tornado.concurrent import run_on_executor
+
 import zoe_api.exceptions
 import zoe_api.master_api
 import zoe_lib.applications
@@ -32,16 +36,28 @@ class APIEndpoint:
     """
     The APIEndpoint class.
 
+    Database queries and other blocking work run in a pool of threads, so that a slow query does not stop the Tornado
+    IOLoop from serving the other clients. All the methods that access the state return Futures.
+
     :type master: zoe_api.master_api.APIManager
     :type sql: zoe_lib.sql_manager.SQLManager
     """
     def __init__(self):
         self.master = zoe_api.master_api.APIManager()
-        self.sql = zoe_lib.state.SQLManager(get_conf())
+        if get_conf().state_backend == 'sqlite':
+            self.sql = zoe_lib.state.SQLiteStateManager(get_conf())
+        else:
+            self.sql = zoe_lib.state.SQLManager(get_conf())
+        self.executor = ThreadPoolExecutor(max_workers=get_conf().api_executor_threads)
 
+    def run_blocking(self, func, *args, **kwargs):
+        """Run a blocking function in the thread pool, the returned Future resolves to its result."""
+        return self.executor.submit(func, *args, **kwargs)
+
+    @run_on_executor
     def execution_by_id(self, uid, role, execution_id) -> zoe_lib.state.sql_manager.Execution:
         """Lookup an execution by its ID."""
-        e = self.sql.execution_list(id=execution_id, only_one=True)
+        e = self.sql.execution_list(id=execution_id, only_one=True, load_services=True)
         if e is None:
             raise zoe_api.exceptions.ZoeNotFoundException('No such execution')
         assert isinstance(e, zoe_lib.state.sql_manager.Execution)
@@ -49,12 +65,21 @@ class APIEndpoint:
             raise zoe_api.exceptions.ZoeAuthException()
         return e
 
-    def execution_list(self, uid, role, **filters):
+    @run_on_executor
+    def execution_list(self, uid, role, load_services=False, **filters):
         """Generate a optionally filtered list of executions."""
-        execs = self.sql.execution_list(**filters)
-        ret = [e for e in execs if e.user_id == uid or role == 'admin']
-        return ret
-
+        if role != 'admin':
+            filters['user_id'] = uid
+        return self.sql.execution_list(load_services=load_services, **filters)
+
+    @run_on_executor
+    def execution_summary_list(self, uid, role, **filters):
+        """Generate a optionally filtered list of executions, without their description and services."""
+        if role != 'admin':
+            filters['user_id'] = uid
+        return self.sql.execution_summary_list(**filters)
+
+    @run_on_executor
     def zapp_validate(self, application_description):
         """Validates the passed ZApp description against the supported schema."""
         try:
@@ -62,28 +87,27 @@ class APIEndpoint:
         except zoe_lib.exceptions.InvalidApplicationDescription as e:
             raise zoe_api.exceptions.ZoeException('Invalid application description: ' + e.message)
 
+    @tornado.gen.coroutine
     def execution_start(self, uid, role, exec_name, application_description): # pylint: disable=unused-argument
-        """Start an execution."""
-        try:
-            zoe_lib.applications.app_validate(application_description)
-        except zoe_lib.exceptions.InvalidApplicationDescription as e:
-            raise zoe_api.exceptions.ZoeException('Invalid application description: ' + e.message)
+        """Start an execution, the returned Future resolves to the new execution ID."""
+        yield self.zapp_validate(application_description)
 
         if 3 > len(exec_name) > 128:
             raise zoe_api.exceptions.ZoeException("Execution name must be between 4 and 128 characters long")
         if not re.match(r'^[a-zA-Z0-9\-]+$', exec_name):
             raise zoe_api.exceptions.ZoeException("Execution name can contain only letters, numbers and dashes. '{}' is not valid.".format(exec_name))
 
-        new_id = self.sql.execution_new(exec_name, uid, application_description)
-        success, message = self.master.execution_start(new_id)
+        new_id = yield self.run_blocking(self.sql.execution_new, exec_name, uid, application_description)
+        success, message = yield self.master.execution_start(new_id)
         if not success:
             raise zoe_api.exceptions.ZoeException('The Zoe master is unavailable, execution will be submitted automatically when the master is back up ({}).'.format(message))
 
         return new_id
 
+    @tornado.gen.coroutine
     def execution_terminate(self, uid, role, exec_id):
-        """Terminate an execution."""
-        e = self.sql.execution_list(id=exec_id, only_one=True)
+        """Terminate an execution, the returned Future resolves to a (success, message) tuple."""
+        e = yield self.run_blocking(self.sql.execution_list, id=exec_id, only_one=True)
         assert isinstance(e, zoe_lib.state.sql_manager.Execution)
         if e is None:
             raise zoe_api.exceptions.ZoeNotFoundException('No such execution')
@@ -92,13 +116,14 @@ class APIEndpoint:
             raise zoe_api.exceptions.ZoeAuthException()
 
         if e.is_active:
-            return self.master.execution_terminate(exec_id)
+            return (yield self.master.execution_terminate(exec_id))
         else:
             raise zoe_api.exceptions.ZoeException('Execution is not running')
 
+    @tornado.gen.coroutine
     def execution_delete(self, uid, role, exec_id):
-        """Delete an execution."""
-        e = self.sql.execution_list(id=exec_id, only_one=True)
+        """Delete an execution, the returned Future resolves to a (success, message) tuple."""
+        e = yield self.run_blocking(self.sql.execution_list, id=exec_id, only_one=True)
         assert isinstance(e, zoe_lib.state.sql_manager.Execution)
         if e is None:
             raise zoe_api.exceptions.ZoeNotFoundException('No such execution')
@@ -109,13 +134,14 @@ class APIEndpoint:
         if e.is_active:
             raise zoe_api.exceptions.ZoeException('Cannot delete an active execution')
 
-        status, message = self.master.execution_delete(exec_id)
+        status, message = yield self.master.execution_delete(exec_id)
         if status:
-            self.sql.execution_delete(exec_id)
+            yield self.run_blocking(self.sql.execution_delete, exec_id)
             return True, ''
         else:
             raise zoe_api.exceptions.ZoeException(message)
 
+    @run_on_executor
     def service_by_id(self, uid, role, service_id) -> zoe_lib.state.sql_manager.Service:
         """Lookup a service by its ID."""
         service = self.sql.service_list(id=service_id, only_one=True)
@@ -125,50 +151,56 @@ class APIEndpoint:
             raise zoe_api.exceptions.ZoeAuthException()
         return service
 
+    @run_on_executor
     def service_list(self, uid, role, **filters):
         """Generate a optionally filtered list of services."""
         services = self.sql.service_list(**filters)
         ret = [s for s in services if s.user_id == uid or role == 'admin']
         return ret
 
+    @tornado.gen.coroutine
     def statistics_scheduler(self, uid_, role_):
         """Retrieve statistics about the scheduler."""
-        success, message = self.master.scheduler_statistics()
+        success, message = yield self.master.scheduler_statistics()
         if success:
             return message
 
+    @tornado.gen.coroutine
     def retry_submit_error_executions(self):
         """Resubmit any execution forgotten by the master."""
-        waiting_execs = self.sql.execution_list(status=zoe_lib.state.sql_manager.Execution.SUBMIT_STATUS)
+        waiting_execs = yield self.run_blocking(self.sql.execution_list, status=zoe_lib.state.sql_manager.Execution.SUBMIT_STATUS)
         if waiting_execs is None or len(waiting_execs) == 0:
             return
         e = waiting_execs[0]
-        success, message = self.master.execution_start(e.id)
+        success, message = yield self.master.execution_start(e.id)
         if not success:
             log.warning('Zoe Master unavailable ({}), execution {} still waiting'.format(message, e.id))
 
+    @tornado.gen.coroutine
     def cleanup_dead_executions(self):
         """Terminates all executions with dead "monitor" services."""
         log.debug('Starting dead execution cleanup task')
-        all_execs = self.sql.execution_list()
-        for execution in all_execs:
+        running_execs = yield self.run_blocking(self.sql.execution_list, status=zoe_lib.state.sql_manager.Execution.RUNNING_STATUS, load_services=True)
+        for execution in running_execs:
             if execution.is_running:
                 for service in execution.services:
                     if service.description['monitor'] and service.is_dead():
                         log.info("Service {} ({}) of execution {} died, terminating execution".format(service.id, service.name, execution.id))
-                        self.master.execution_terminate(execution.id)
+                        yield self.master.execution_terminate(execution.id)
                         break
         log.debug('Cleanup task finished')
 
+    @run_on_executor
     def execution_endpoints(self, uid: str, role: str, execution: zoe_lib.state.Execution):
         """Return a list of the services and public endpoints available for a certain execution."""
         services_info = []
         endpoints = []
         for service in execution.services:
-            services_info.append(self.service_by_id(uid, role, service.id))
+            services_info.append(service)
+            backend_ports = dict((p.internal_name, p) for p in service.ports)
             for port in service.description['ports']:
                 port_key = str(port['port_number']) + "/" + port['protocol']
-                backend_port = self.sql.port_list(only_one=True, service_id=service.id, internal_name=port_key)
+                backend_port = backend_ports[port_key]
                 if backend_port.external_ip is not None:
                     endpoint = port['url_template'].format(**{"ip_port": backend_port.external_ip + ":" + str(backend_port.external_port)})
                     endpoints.append((port['name'], endpoint))
@@ -0,0 +1,128 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shared authenticator and cache of the authentication results."""
+
+from collections import OrderedDict
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+from zoe_lib.config import get_conf
+
+import zoe_api.exceptions
+from zoe_api.auth.base import BaseAuthenticator  # pylint: disable=unused-import
+from zoe_api.auth.file import PlainTextAuthenticator
+from zoe_api.auth.ldap import LDAPAuthenticator
+from zoe_api.auth.ldapsasl import LDAPSASLAuthenticator
+
+AUTH_CACHE_SIZE = 1024
+
+
+class AuthCache:
+    """
+    Remembers the outcome of authentications for a limited time.
+
+    Credentials are never stored: entries are keyed by an HMAC of username and password, with a random key generated
+    when the process starts. Successful authentications are kept for ttl seconds, failed ones for negative_ttl seconds,
+    so that clients retrying with wrong credentials do not reach the user store at each request.
+    """
+    def __init__(self, ttl, negative_ttl, size=AUTH_CACHE_SIZE):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.size = size
+        self._salt = os.urandom(32)
+        self._entries = OrderedDict()  # key -> (expiry time, (uid, role) or the authentication exception)
+        self._lock = threading.Lock()
+
+    def _key(self, username, password):
+        credentials = username.encode('utf-8') + b'\0' + password.encode('utf-8')
+        return hmac.new(self._salt, credentials, hashlib.sha256).digest()
+
+    def authenticate(self, authenticator: BaseAuthenticator, username, password):
+        """Return (uid, role) for the credentials, asking the authenticator only if the outcome is not known."""
+        if self.ttl <= 0:
+            return authenticator.auth(username, password)
+
+        key = self._key(username, password)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    if isinstance(entry[1], Exception):
+                        raise entry[1].with_traceback(None)
+                    return entry[1]
+                del self._entries[key]
+
+        try:
+            result = authenticator.auth(username, password)
+        except zoe_api.exceptions.ZoeAuthException as e:
+            if self.negative_ttl > 0:
+                self._store(key, now + self.negative_ttl, e)
+            raise
+        if result[0] is not None:  # errors talking to the user store are not remembered
+            self._store(key, now + self.ttl, result)
+        return result
+
+    def _store(self, key, expiry, value):
+        with self._lock:
+            self._entries[key] = (expiry, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Forget all the cached outcomes."""
+        with self._lock:
+            self._entries.clear()
+
+
+_authenticator = None  # type: BaseAuthenticator
+_cache = None  # type: AuthCache
+_lock = threading.Lock()
+
+
+def _new_authenticator() -> BaseAuthenticator:
+    if get_conf().auth_type == 'text':
+        return PlainTextAuthenticator()
+    elif get_conf().auth_type == 'ldap':
+        return LDAPAuthenticator()
+    elif get_conf().auth_type == 'ldapsasl':
+        return LDAPSASLAuthenticator()
+    else:
+        raise zoe_api.exceptions.ZoeException('Configuration error, unknown authentication method: {}'.format(get_conf().auth_type))
+
+
+def authenticate(username, password):
+    """Authenticate username and password against the configured user store, return (uid, role)."""
+    global _authenticator, _cache
+    with _lock:
+        if _authenticator is None:
+            _authenticator = _new_authenticator()
+            _cache = AuthCache(get_conf().auth_cache_ttl, get_conf().auth_cache_negative_ttl)
+        authenticator, cache = _authenticator, _cache
+    return cache.authenticate(authenticator, username, password)
+
+
+def reset():
+    """Drop the shared authenticator and the cached outcomes, they are created again at the next authentication."""
+    global _authenticator, _cache
+    with _lock:
+        _authenticator = None
+        _cache = None
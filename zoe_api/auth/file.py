@@ -18,6 +18,7 @@
 import csv
 import logging
 import os
+import threading
 
 import zoe_api.auth.base
 import zoe_api.exceptions
@@ -27,22 +28,36 @@ log = logging.getLogger(__name__)
 
 
 class PlainTextAuthenticator(zoe_api.auth.base.BaseAuthenticator):
-    """A basic plain text file authenticator."""
+    """A basic plain text file authenticator, the file is read again only when it changes."""
     def __init__(self):
         self.passwd_file = get_conf().auth_file
         if not os.access(self.passwd_file, os.R_OK):
             raise zoe_api.exceptions.ZoeNotFoundException('Password file not found at: {}'.format(self.passwd_file))
+        self._users = {}  # username -> list of (password, role)
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.passwd_file).st_mtime
+        except OSError:
+            raise zoe_api.exceptions.ZoeNotFoundException('Password file not found at: {}'.format(self.passwd_file))
+        with self._lock:
+            if mtime != self._mtime:
+                users = {}
+                with open(self.passwd_file, "r") as passwd:
+                    for row in csv.reader(passwd):
+                        if len(row) != 3:
+                            continue
+                        users.setdefault(row[0], []).append((row[1], row[2]))
+                self._users = users
+                self._mtime = mtime
+                log.debug('Loaded {} users from {}'.format(len(users), self.passwd_file))
+            return self._users
 
     def auth(self, username, password):
         """Authenticate the user or raise an exception."""
-        with open(self.passwd_file, "r") as passwd:
-            passwd_reader = csv.reader(passwd)
-            for row in passwd_reader:
-                if len(row) != 3:
-                    continue
-                file_username = row[0]
-                file_password = row[1]
-                file_role = row[2]
-                if file_username == username and file_password == password:
-                    return username, file_role
-            raise zoe_api.exceptions.ZoeAuthException('Unknown user or password.')
+        for file_password, file_role in self._load().get(username, []):
+            if file_password == password:
+                return username, file_role
+        raise zoe_api.exceptions.ZoeAuthException('Unknown user or password.')
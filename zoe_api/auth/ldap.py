@@ -16,6 +16,7 @@
 """LDAP authentication module."""
 
 import logging
+import queue
 
 try:
     import ldap
@@ -33,10 +34,46 @@ from zoe_lib.config import get_conf
 log = logging.getLogger(__name__)
 
 
+class LDAPConnectionPool:
+    """
+    Keeps open LDAP connections to be reused by the authentication requests.
+
+    A connection is taken with get() and given back with release(). Connections that had an error are closed instead
+    of being put back in the pool.
+    """
+    def __init__(self, setup=None):
+        self.server_uri = get_conf().ldap_server_uri
+        self.setup = setup
+        self._idle = queue.LifoQueue(maxsize=get_conf().ldap_pool_size)
+
+    def get(self):
+        """Return an idle connection, or a new one."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            connection = ldap.initialize(self.server_uri)
+            if self.setup is not None:
+                self.setup(connection)
+            return connection
+
+    def release(self, connection, reuse: bool) -> None:
+        """Give back a connection, it is closed if it cannot be reused or the pool is full."""
+        if reuse:
+            try:
+                self._idle.put_nowait(connection)
+                return
+            except queue.Full:
+                pass
+        try:
+            connection.unbind_s()
+        except ldap.LDAPError:
+            pass
+
+
 class LDAPAuthenticator(zoe_api.auth.base.BaseAuthenticator):
-    """A simple LDAP authenticator."""
+    """A simple LDAP authenticator, binding as the user on pooled connections."""
     def __init__(self):
-        self.connection = ldap.initialize(get_conf().ldap_server_uri)
+        self.pool = LDAPConnectionPool()
         self.base_dn = get_conf().ldap_base_dn
 
     def auth(self, username, password):
@@ -45,9 +82,12 @@ class LDAPAuthenticator(zoe_api.auth.base.BaseAuthenticator):
         uid = None
         role = 'guest'
         bind_user = 'uid=' + username + "," + self.base_dn
+        connection = self.pool.get()
+        reuse = False
         try:
-            self.connection.bind_s(bind_user, password)
-            result = self.connection.search_s(self.base_dn, ldap.SCOPE_SUBTREE, search_filter)
+            connection.bind_s(bind_user, password)
+            result = connection.search_s(self.base_dn, ldap.SCOPE_SUBTREE, search_filter)
+            reuse = True
             if len(result) == 0:
                 raise zoe_api.exceptions.ZoeAuthException('Unknown user or wrong password.')
             user_dict = result[0][1]
@@ -64,10 +104,11 @@ class LDAPAuthenticator(zoe_api.auth.base.BaseAuthenticator):
                 role = 'guest'
         except ldap.LDAPError as ex:
             if ex.args[0]['desc'] == 'Invalid credentials':
+                reuse = True  # the failed bind leaves the connection usable for the next one
                 raise zoe_api.exceptions.ZoeAuthException('Unknown user or wrong password.')
             else:
                 log.exception("LDAP exception")
                 zoe_api.exceptions.ZoeAuthException('LDAP error.')
         finally:
-            self.connection.unbind_s()
+            self.pool.release(connection, reuse)
         return uid, role
@@ -27,6 +27,7 @@ else:
     LDAP_AVAILABLE = True
 
 import zoe_api.auth.base
+from zoe_api.auth.ldap import LDAPConnectionPool
 import zoe_api.exceptions
 
 from zoe_lib.config import get_conf
@@ -35,22 +36,28 @@ log = logging.getLogger(__name__)
 
 
 class LDAPSASLAuthenticator(zoe_api.auth.base.BaseAuthenticator):
-    """A simple LDAP authenticator."""
+    """A simple LDAP authenticator, the SASL bind is done once for each pooled connection."""
 
     def __init__(self):
-        self.connection = ldap.initialize(get_conf().ldap_server_uri)
-        self.base_dn = get_conf().ldap_base_dn
-        self.connection.protocol_version = ldap.VERSION3
         self.sasl_auth = ldap.sasl.sasl({}, 'GSSAPI')
+        self.pool = LDAPConnectionPool(setup=self._bind)
+        self.base_dn = get_conf().ldap_base_dn
+
+    def _bind(self, connection):
+        connection.protocol_version = ldap.VERSION3
+        connection.sasl_interactive_bind_s('', self.sasl_auth)
 
     def auth(self, username, password):
         """Authenticate the user or raise an exception."""
         search_filter = "uid=" + username
         uid = None
         role = 'guest'
+        connection = None
+        reuse = False
         try:
-            self.connection.sasl_interactive_bind_s('', self.sasl_auth)
-            result = self.connection.search_s(self.base_dn, ldap.SCOPE_SUBTREE, search_filter)
+            connection = self.pool.get()
+            result = connection.search_s(self.base_dn, ldap.SCOPE_SUBTREE, search_filter)
+            reuse = True
 
             if len(result) == 0:
                 raise zoe_api.exceptions.ZoeAuthException('Unknown user or wrong password.')
@@ -73,5 +80,6 @@ class LDAPSASLAuthenticator(zoe_api.auth.base.BaseAuthenticator):
                 log.exception("LDAP exception")
                 zoe_api.exceptions.ZoeAuthException('LDAP error.')
         finally:
-            self.connection.unbind_s()
+            if connection is not None:
+                self.pool.release(connection, reuse)
         return uid, role
@@ -15,6 +15,8 @@
 
 """ Store adapters to read/write data to from/to PostgresSQL. """
 
+import threading
+
 import zoe_lib.state
 
 from zoe_lib.config import get_conf
@@ -22,12 +24,37 @@ from oauth2.store import AccessTokenStore, ClientStore
 from oauth2.datatype import AccessToken, Client
 from oauth2.error import AccessTokenNotFound, ClientNotFoundError
 
+from zoe_api.auth.oauth2.token_cache import AccessTokenCache
+
+_sql = None
+_sql_lock = threading.Lock()
+
+
+def _sql_manager():
+    """ Return the SQLManager shared by the token and client stores, connected on first use """
+    global _sql
+    with _sql_lock:
+        if _sql is None:
+            _sql = zoe_lib.state.SQLManager(get_conf())
+        return _sql
+
+
 class AccessTokenStorePg(AccessTokenStore):
-    """ AccessTokenStore for postgresql  """
+    """ AccessTokenStore for postgresql, validated access tokens are cached in memory  """
+
+    def __init__(self):
+        self._token_cache = None
+        self._cache_lock = threading.Lock()
+
+    def _cache(self):
+        with self._cache_lock:
+            if self._token_cache is None:
+                self._token_cache = AccessTokenCache(get_conf().oauth_token_cache_ttl)
+            return self._token_cache
 
     def fetch_by_refresh_token(self, refresh_token):
         """ get accesstoken from refreshtoken """
-        sql = zoe_lib.state.SQLManager(get_conf())
+        sql = _sql_manager()
         data = sql.fetch_by_refresh_token(refresh_token)
 
         if data is None:
@@ -47,27 +74,42 @@ class AccessTokenStorePg(AccessTokenStore):
         Deletes (invalidates) an old refresh token after use
         :param refresh_token: The refresh token.
         """
-        sql = zoe_lib.state.SQLManager(get_conf())
+        sql = _sql_manager()
         res = sql.delete_refresh_token(refresh_token)
+        self._cache().forget_token(refresh_token)
         return res
 
     def get_client_id_by_refresh_token(self, refresh_token):
         """ get clientID from refreshtoken """
-        sql = zoe_lib.state.SQLManager(get_conf())
+        sql = _sql_manager()
         data = sql.get_client_id_by_refresh_token(refresh_token)
 
         return data
 
     def get_client_id_by_access_token(self, access_token):
         """ get clientID from accesstoken """
-        sql = zoe_lib.state.SQLManager(get_conf())
+        sql = _sql_manager()
         data = sql.get_client_id_by_access_token(access_token)
 
         return data
 
+    def get_access_token_info(self, access_token):
+        """ get clientID, role, expiry time and refresh token of an accesstoken, from memory if it was seen recently """
+        data = self._cache().get(access_token)
+        if data is not None:
+            return data
+
+        sql = _sql_manager()
+        row = sql.get_access_token_info(access_token)
+        if row is None:
+            return None
+        data = dict(row)
+        self._cache().put(access_token, data)
+        return data
+
     def fetch_existing_token_of_user(self, client_id, grant_type, user_id):
         """ get accesstoken from userid """
-        sql = zoe_lib.state.SQLManager(get_conf())
+        sql = _sql_manager()
         data = sql.fetch_existing_token_of_user(client_id, grant_type, user_id)
 
         if data is None:
@@ -85,7 +127,7 @@ class AccessTokenStorePg(AccessTokenStore):
 
     def save_token(self, access_token):
         """ save accesstoken """
-        sql = zoe_lib.state.SQLManager(get_conf())
+        sql = _sql_manager()
         sql.save_token(access_token.client_id,
                        access_token.grant_type,
                        access_token.token,
@@ -95,6 +137,7 @@ class AccessTokenStorePg(AccessTokenStore):
                        access_token.refresh_expires_at,
                        access_token.scopes,
                        access_token.user_id)
+        self._cache().forget_client(access_token.client_id)
 
         return True
 
@@ -104,7 +147,7 @@ class ClientStorePg(ClientStore):
 
     def save_client(self, identifier, secret, role, redirect_uris, authorized_grants, authorized_response_types):
         """ save client to db """
-        sql = zoe_lib.state.SQLManager(get_conf())
+        sql = _sql_manager()
         sql.save_client(identifier,
                         secret,
                         role,
@@ -115,7 +158,7 @@ class ClientStorePg(ClientStore):
 
     def fetch_by_client_id(self, client_id):
         """ get client by clientid """
-        sql = zoe_lib.state.SQLManager(get_conf())
+        sql = _sql_manager()
         client_data = sql.fetch_by_client_id(client_id)
 
         client_data_grants = client_data["authorized_grants"].split(':')
@@ -131,7 +174,7 @@ class ClientStorePg(ClientStore):
 
     def get_role_by_client_id(self, client_id):
         """ get client role by clientid """
-        sql = zoe_lib.state.SQLManager(get_conf())
+        sql = _sql_manager()
         client_data = sql.fetch_by_client_id(client_id)
 
         if client_data is None:
@@ -0,0 +1,72 @@
+# Copyright (c) 2017, Quang-Nhat HOANG-XUAN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" In-memory cache of the access tokens validated against the database. """
+
+from collections import OrderedDict
+import threading
+import time
+
+TOKEN_CACHE_SIZE = 1024
+
+
+class AccessTokenCache:
+    """
+    LRU of access tokens, with the client ID, role, expiry time and refresh token read from the database.
+
+    An entry is kept at most ttl seconds, so that tokens revoked by other API processes stop working after a while.
+    Tokens revoked or replaced by this process are removed right away.
+    """
+    def __init__(self, ttl, size=TOKEN_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()  # access token -> (time the entry expires, token data)
+        self._lock = threading.Lock()
+
+    def get(self, access_token):
+        """ Return the data of a cached token, or None """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(access_token)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[access_token]
+                return None
+            self._entries.move_to_end(access_token)
+            return entry[1]
+
+    def put(self, access_token, data):
+        """ Cache the data of a token, data must contain client_id, role, expires_at and refresh_token """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[access_token] = (time.time() + self.ttl, data)
+            self._entries.move_to_end(access_token)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def _forget(self, match):
+        with self._lock:
+            for access_token in [token for token, entry in self._entries.items() if match(token, entry[1])]:
+                del self._entries[access_token]
+
+    def forget_token(self, token):
+        """ Remove the entry of an access token, or of the access token paired with a refresh token """
+        self._forget(lambda access_token, data: token in (access_token, data['refresh_token']))
+
+    def forget_client(self, client_id):
+        """ Remove the entries of all the tokens of a client """
+        self._forget(lambda access_token, data: data['client_id'] == client_id)
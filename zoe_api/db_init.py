@@ -15,13 +15,18 @@
 
 """Database initialization."""
 
+import logging
+
 import psycopg2
 import psycopg2.extras
 
 import zoe_api.exceptions
 from zoe_lib.config import get_conf
 
-SQL_SCHEMA_VERSION = 4  # ---> Increment this value every time the schema changes !!! <---
+log = logging.getLogger(__name__)
+
+SQL_SCHEMA_VERSION = 6  # ---> Increment this value every time the schema changes and add a migration to MIGRATIONS !!! <---
+BASE_SCHEMA_VERSION = 4  # Version of the tables created by create_tables(), migrations are applied on top of it
 
 
 def version_table(cur):
@@ -37,18 +42,69 @@ def schema(cur, deployment_name):
 
 
 def check_schema_version(cur, deployment_name):
-    """Check if the schema version matches this source code version."""
+    """Return the schema version of the deployment, or None if its tables need to be created."""
     cur.execute("SELECT version FROM public.versions WHERE deployment = %s", (deployment_name,))
     row = cur.fetchone()
     if row is None:
-        cur.execute("INSERT INTO public.versions (deployment, version) VALUES (%s, %s)", (deployment_name, SQL_SCHEMA_VERSION))
+        cur.execute("INSERT INTO public.versions (deployment, version) VALUES (%s, %s)", (deployment_name, BASE_SCHEMA_VERSION))
         schema(cur, deployment_name)
-        return False  # Tables need to be created
+        return None
+    elif BASE_SCHEMA_VERSION <= row[0] <= SQL_SCHEMA_VERSION:
+        return row[0]
     else:
-        if row[0] == SQL_SCHEMA_VERSION:
-            return True
-        else:
-            raise zoe_api.exceptions.ZoeException('SQL database schema version mismatch: need {}, found {}'.format(SQL_SCHEMA_VERSION, row[0]))
+        raise zoe_api.exceptions.ZoeException('SQL database schema version mismatch: need {}, found {}'.format(SQL_SCHEMA_VERSION, row[0]))
+
+
+def create_index(cur, name, definition):
+    """
+    Create an index without locking out writes to the table, the cursor must be in autocommit mode.
+
+    An interrupted CREATE INDEX CONCURRENTLY leaves behind an invalid index that IF NOT EXISTS would keep, so it is dropped first.
+    """
+    cur.execute("SELECT NOT i.indisvalid FROM pg_catalog.pg_index AS i JOIN pg_catalog.pg_class AS c ON c.oid = i.indexrelid WHERE c.relname = %s AND pg_catalog.pg_table_is_visible(c.oid)", (name,))
+    row = cur.fetchone()
+    if row is not None and row[0]:
+        cur.execute('DROP INDEX CONCURRENTLY IF EXISTS {}'.format(name))
+    cur.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {}'.format(name, definition))
+
+
+def migrate_to_5(cur):
+    """Add indexes for the columns used to filter executions, services and ports."""
+    # Most executions are terminated, index only the statuses the master polls for
+    create_index(cur, 'execution_status_idx', "execution (status) WHERE status IN ('submitted', 'scheduled', 'starting', 'running', 'cleaning up')")
+    create_index(cur, 'execution_user_id_idx', 'execution (user_id)')
+    create_index(cur, 'execution_time_submit_idx', 'execution (time_submit)')
+    create_index(cur, 'execution_time_start_idx', 'execution (time_start)')
+    create_index(cur, 'execution_time_end_idx', 'execution (time_end)')
+    create_index(cur, 'service_execution_id_idx', 'service (execution_id, essential)')
+    create_index(cur, 'service_backend_id_idx', 'service (backend_id) WHERE backend_id IS NOT NULL')
+    create_index(cur, 'port_service_id_idx', 'port (service_id)')
+
+
+def migrate_to_6(cur):
+    """Add indexes for the OAuth2 token lookups."""
+    create_index(cur, 'oauth_token_token_idx', 'oauth_token (token)')
+    create_index(cur, 'oauth_token_refresh_token_idx', 'oauth_token (refresh_token)')
+
+
+MIGRATIONS = {
+    5: migrate_to_5,
+    6: migrate_to_6
+}
+
+
+def upgrade_schema(cur, deployment_name, from_version):
+    """
+    Apply in order all the migrations needed to bring the schema from from_version to SQL_SCHEMA_VERSION.
+
+    The cursor must be in autocommit mode: the migrations create indexes concurrently, so that API and master processes
+    still running on the old version can keep writing while the database is upgraded. Each version is recorded as soon as
+    its migration completes, an interrupted upgrade starts again from the first missing version.
+    """
+    for version in range(from_version + 1, SQL_SCHEMA_VERSION + 1):
+        log.info('Upgrading the database schema of deployment {} to version {}'.format(deployment_name, version))
+        MIGRATIONS[version](cur)
+        cur.execute("UPDATE public.versions SET version = %s WHERE deployment = %s", (version, deployment_name))
 
 
 def create_tables(cur):
@@ -126,10 +182,16 @@ def init(force=False):
         cur.execute("DELETE FROM public.versions WHERE deployment = %s", (get_conf().deployment_name,))
         cur.execute('DROP SCHEMA IF EXISTS {} CASCADE'.format(get_conf().deployment_name))
 
-    if not check_schema_version(cur, get_conf().deployment_name):
+    version = check_schema_version(cur, get_conf().deployment_name)
+    if version is None:
         create_tables(cur)
-
+        version = BASE_SCHEMA_VERSION
     conn.commit()
+
+    if version < SQL_SCHEMA_VERSION:
+        conn.autocommit = True
+        upgrade_schema(cur, get_conf().deployment_name, version)
+
     cur.close()
     conn.close()
     return
@@ -20,9 +20,13 @@ import os
 
 from tornado.httpserver import HTTPServer
 from tornado.ioloop import IOLoop, PeriodicCallback
+from tornado.netutil import bind_sockets
+from tornado.process import fork_processes
 from tornado.web import Application
 
+import zoe_lib.applications
 import zoe_lib.config as config
+from zoe_lib.exceptions import ZoeLibException
 import zoe_api.db_init
 import zoe_api.api_endpoint
 import zoe_api.rest_api
@@ -53,28 +57,45 @@ def zoe_web_main() -> int:
         log.error("LDAP authentication requested, but 'pyldap' module not installed.")
         return 1
 
-    zoe_api.db_init.init()
+    try:
+        zoe_lib.applications.app_validator()
+    except ZoeLibException as e:
+        log.error(e.message)
+        return 1
+
+    if config.get_conf().state_backend == 'postgresql':
+        zoe_api.db_init.init()
+
+    # Sockets are opened before forking, so that all the workers accept connections on the same port
+    sockets = bind_sockets(args.listen_port, args.listen_address)
+    worker_id = None
+    if args.api_processes != 1:
+        log.info("Starting {} API worker processes...".format(args.api_processes if args.api_processes > 0 else 'one per CPU'))
+        worker_id = fork_processes(args.api_processes if args.api_processes > 0 else None)
 
+    # Each worker has its own database connections and master client, created after the fork
     api_endpoint = zoe_api.api_endpoint.APIEndpoint()
 
     app_settings = {
         'static_path': os.path.join(os.path.dirname(__file__), "web", "static"),
         'template_path': os.path.join(os.path.dirname(__file__), "web", "templates"),
         'cookie_secret': config.get_conf().cookie_secret,
-        'debug': args.debug
+        'debug': args.debug,
+        'autoreload': args.debug and worker_id is None  # reloading is not supported with several worker processes
     }
     app = Application(zoe_api.web.web_init(api_endpoint) + zoe_api.rest_api.api_init(api_endpoint), **app_settings)
     JinjaApp.init_app(app)
 
     log.info("Starting HTTP server...")
     http_server = HTTPServer(app)
-    http_server.bind(args.listen_port, args.listen_address)
-    http_server.start(num_processes=1)
+    http_server.add_sockets(sockets)
 
-    retry_cb = PeriodicCallback(api_endpoint.retry_submit_error_executions, 30000)
-    retry_cb.start()
-    retry_cb = PeriodicCallback(api_endpoint.cleanup_dead_executions, 60000)
-    retry_cb.start()
+    # Only the first worker runs the maintenance tasks, fork_processes() restarts it with the same ID if it dies
+    if worker_id is None or worker_id == 0:
+        retry_cb = PeriodicCallback(api_endpoint.retry_submit_error_executions, 30000)
+        retry_cb.start()
+        retry_cb = PeriodicCallback(api_endpoint.cleanup_dead_executions, 60000)
+        retry_cb.start()
 
     try:
         IOLoop.current().start()
@@ -15,10 +15,17 @@
 
 """The client side of the ZeroMQ API."""
 
+import datetime
+import itertools
+import json
 import logging
 from typing import Dict, Any, Tuple
 
+import tornado.concurrent
+import tornado.gen
+import tornado.ioloop
 import zmq
+import zmq.eventloop.future
 
 import zoe_lib.config as config
 
@@ -28,56 +35,68 @@ APIReturnType = Tuple[bool, str]
 
 
 class APIManager:
-    """Main class for the API."""
+    """
+    Main class for the API.
+
+    Requests are sent on a DEALER socket driven by the Tornado IOLoop, so waiting for the master does not block the API
+    process and many requests can be in flight at the same time. Each request carries an ID that the master copies in
+    its reply. All the methods return a Future that resolves to a (success, message) tuple, see APIReturnType.
+    """
     REQUEST_TIMEOUT = 2500  # type: int
-    REQUEST_RETRIES = 1  # type: int
 
     def __init__(self):
-        self.context = zmq.Context(1)
+        self.context = zmq.eventloop.future.Context()
         self.zmq_s = None
-        self.poll = zmq.Poller()
         self.master_uri = config.get_conf().master_url  # type: str
-        self._connect()
+        self._request_ids = itertools.count()
+        self._pending = {}  # request ID -> Future waiting for the reply
 
     def _connect(self):
         if self.zmq_s is not None:
             return
-        self.zmq_s = self.context.socket(zmq.REQ)
-        self.zmq_s.connect(self.master_uri)
-        self.poll.register(self.zmq_s, zmq.POLLIN)
-
-    def _disconnect(self):
+        self.zmq_s = self.context.socket(zmq.DEALER)
         self.zmq_s.setsockopt(zmq.LINGER, 0)
-        self.zmq_s.close()
-        self.poll.unregister(self.zmq_s)
-        self.zmq_s = None
-
-    def _request_reply(self, message: Dict[str, Any]) -> APIReturnType:
-        """
-        Implements the Lazy Pirate Pattern for a reliable client communication.
-        """
+        self.zmq_s.connect(self.master_uri)
+        tornado.ioloop.IOLoop.current().spawn_callback(self._read_replies, self.zmq_s)
+
+    @tornado.gen.coroutine
+    def _read_replies(self, zmq_s):
+        """Resolve the pending requests as their replies arrive, until the socket is closed."""
+        while not zmq_s.closed:
+            try:
+                frames = yield zmq_s.recv_multipart()
+            except Exception:  # the socket has been closed while waiting
+                break
+            reply = json.loads(frames[-1].decode('utf-8'))
+            future = self._pending.pop(reply.get('request_id'), None)
+            if future is not None and not future.done():
+                future.set_result(reply)
+
+    @tornado.gen.coroutine
+    def _request_reply(self, message: Dict[str, Any]):
+        """Send a request and wait for its reply, at most for REQUEST_TIMEOUT milliseconds."""
         self._connect()  # Make sure we are connected
-        retries_left = self.REQUEST_RETRIES
-        while retries_left:
-            self.zmq_s.send_json(message)  # send the message
-            socks = dict(self.poll.poll(self.REQUEST_TIMEOUT))
-            if socks.get(self.zmq_s) == zmq.POLLIN:  # We have a reply
-                reply = self.zmq_s.recv_json()
-                if reply['result'] == 'ok':
-                    return True, '' if 'data' not in reply else reply['data']
-                else:
-                    return False, reply['message']
-            else:  # Timeout
-                retries_left -= 1
-                log.warning('Timeout waiting for master reply')
-                self._disconnect()
-                if retries_left == 0:
-                    log.error('Master is unreachable, abandoning API request')
-                    return False, 'Master is unreachable, abandoning API request'
-                log.warning('Reconnecting and retrying request...')
-                self._connect()
-
-    def execution_start(self, exec_id: int) -> APIReturnType:
+        request_id = next(self._request_ids)
+        message = dict(message, request_id=request_id)
+        future = tornado.concurrent.Future()
+        self._pending[request_id] = future
+        try:
+            yield self.zmq_s.send_multipart([b'', json.dumps(message).encode('utf-8')])
+            reply = yield tornado.gen.with_timeout(datetime.timedelta(milliseconds=self.REQUEST_TIMEOUT), future)
+        except tornado.gen.TimeoutError:
+            # The socket is shared by all the requests in flight, only this one is abandoned. A late reply is ignored
+            # by _read_replies, since its request ID is not pending anymore.
+            log.warning('Timeout waiting for master reply')
+            log.error('Master is unreachable, abandoning API request')
+            return False, 'Master is unreachable, abandoning API request'
+        finally:
+            self._pending.pop(request_id, None)
+        if reply['result'] == 'ok':
+            return True, '' if 'data' not in reply else reply['data']
+        else:
+            return False, reply['message']
+
+    def execution_start(self, exec_id: int) -> tornado.concurrent.Future:
         """Start an execution."""
         msg = {
             'command': 'execution_start',
@@ -85,7 +104,7 @@ class APIManager:
         }
         return self._request_reply(msg)
 
-    def execution_terminate(self, exec_id: int) -> APIReturnType:
+    def execution_terminate(self, exec_id: int) -> tornado.concurrent.Future:
         """Terminate an execution."""
         msg = {
             'command': 'execution_terminate',
@@ -93,7 +112,7 @@ class APIManager:
         }
         return self._request_reply(msg)
 
-    def execution_delete(self, exec_id) -> APIReturnType:
+    def execution_delete(self, exec_id) -> tornado.concurrent.Future:
         """Delete an execution."""
         msg = {
             'command': 'execution_delete',
@@ -101,7 +120,7 @@ class APIManager:
         }
         return self._request_reply(msg)
 
-    def scheduler_statistics(self) -> APIReturnType:
+    def scheduler_statistics(self) -> tornado.concurrent.Future:
         """Query scheduler statistics."""
         msg = {
             'command': 'scheduler_stats'
@@ -17,6 +17,7 @@
 
 from tornado.web import RequestHandler
 import tornado.escape
+import tornado.gen
 
 from zoe_api.rest_api.utils import catch_exceptions, get_auth, manage_cors_headers
 import zoe_api.exceptions
@@ -40,24 +41,26 @@ class ExecutionAPI(RequestHandler):
         self.finish()
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self, execution_id):
         """GET a single execution by its ID."""
-        uid, role = get_auth(self)
+        uid, role = yield get_auth(self)
 
-        e = self.api_endpoint.execution_by_id(uid, role, execution_id)
+        e = yield self.api_endpoint.execution_by_id(uid, role, execution_id)
 
-        self.write(e.serialize())
+        self.write((yield self.api_endpoint.run_blocking(e.serialize)))
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def delete(self, execution_id: int):
         """
         Terminate an execution.
 
         :param execution_id: the execution to be terminated
         """
-        uid, role = get_auth(self)
+        uid, role = yield get_auth(self)
 
-        success, message = self.api_endpoint.execution_terminate(uid, role, execution_id)
+        success, message = yield self.api_endpoint.execution_terminate(uid, role, execution_id)
         if not success:
             raise zoe_api.exceptions.ZoeRestAPIException(message, 400)
 
@@ -86,15 +89,16 @@ class ExecutionDeleteAPI(RequestHandler):
         self.finish()
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def delete(self, execution_id: int):
         """
         Delete an execution.
 
         :param execution_id: the execution to be deleted
         """
-        uid, role = get_auth(self)
+        uid, role = yield get_auth(self)
 
-        success, message = self.api_endpoint.execution_delete(uid, role, execution_id)
+        success, message = yield self.api_endpoint.execution_delete(uid, role, execution_id)
         if not success:
             raise zoe_api.exceptions.ZoeRestAPIException(message, 400)
 
@@ -123,6 +127,7 @@ class ExecutionCollectionAPI(RequestHandler):
         self.finish()
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self):
         """
         Returns a list of all active executions.
@@ -133,6 +138,9 @@ class ExecutionCollectionAPI(RequestHandler):
         * name: execution mane
         * user_id: user_id owning the execution (admin only)
         * limit: limit the number of returned entries
+        * page_size: same as limit, return at most this number of executions, newest first
+        * after_id: return the executions older than this ID, pass the lowest ID of the previous page to get the next one
+        * details: if true, include the application description and the list of service IDs of each execution
         * earlier_than_submit: all execution that where submitted earlier than this timestamp
         * earlier_than_start: all execution that started earlier than this timestamp
         * earlier_than_end: all execution that ended earlier than this timestamp
@@ -146,7 +154,7 @@ class ExecutionCollectionAPI(RequestHandler):
 
         :return:
         """
-        uid, role = get_auth(self)
+        uid, role = yield get_auth(self)
 
         filt_dict = {}
 
@@ -155,6 +163,8 @@ class ExecutionCollectionAPI(RequestHandler):
             ('name', str),
             ('user_id', str),
             ('limit', int),
+            ('page_size', int),
+            ('after_id', int),
             ('earlier_than_submit', int),
             ('earlier_than_start', int),
             ('earlier_than_end', int),
@@ -169,18 +179,28 @@ class ExecutionCollectionAPI(RequestHandler):
                 else:
                     filt_dict[filt[0]] = filt[1](self.request.arguments[filt[0]][0])
 
-        execs = self.api_endpoint.execution_list(uid, role, **filt_dict)
+        if 'page_size' in filt_dict:
+            filt_dict['limit'] = filt_dict.pop('page_size')
 
-        self.write(dict([(e.id, e.serialize()) for e in execs]))
+        if self.get_argument('details', 'false').lower() in ('true', '1', 'yes'):
+            execs = yield self.api_endpoint.execution_list(uid, role, load_services=True, **filt_dict)
+            self.write((yield self.api_endpoint.run_blocking(lambda: dict([(e.id, e.serialize()) for e in execs]))))
+        else:
+            execs = yield self.api_endpoint.execution_summary_list(uid, role, **filt_dict)
+            for e in execs:
+                for key in ['time_submit', 'time_start', 'time_end']:
+                    e[key] = None if e[key] is None else e[key].timestamp()
+            self.write(dict([(e['id'], e) for e in execs]))
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def post(self):
         """
         Starts an execution, given an application description. Takes a JSON object.
 
         :return: the new execution_id
         """
-        uid, role = get_auth(self)
+        uid, role = yield get_auth(self)
 
         try:
             data = tornado.escape.json_decode(self.request.body)
@@ -190,7 +210,7 @@ class ExecutionCollectionAPI(RequestHandler):
         application_description = data['application']
         exec_name = data['name']
 
-        new_id = self.api_endpoint.execution_start(uid, role, exec_name, application_description)
+        new_id = yield self.api_endpoint.execution_start(uid, role, exec_name, application_description)
 
         self.set_status(201)
         self.write({'execution_id': new_id})
@@ -218,16 +238,17 @@ class ExecutionEndpointsAPI(RequestHandler):
         self.finish()
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self, execution_id: int):
         """
         Get a list of execution endpoints.
 
         :param execution_id: the execution to be deleted
         """
-        uid, role = get_auth(self)
+        uid, role = yield get_auth(self)
 
-        execution = self.api_endpoint.execution_by_id(uid, role, execution_id)
-        services_, endpoints = self.api_endpoint.execution_endpoints(uid, role, execution)
+        execution = yield self.api_endpoint.execution_by_id(uid, role, execution_id)
+        services_, endpoints = yield self.api_endpoint.execution_endpoints(uid, role, execution)
 
         self.write({'endpoints': endpoints})
 
@@ -20,6 +20,7 @@ import json
 import psycopg2
 
 from tornado.web import RequestHandler
+import tornado.gen
 
 import oauth2.grant
 
@@ -71,18 +72,19 @@ class OAuthGetAPI(RequestHandler):
         self.finish()
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def post(self):
         """REQUEST/REFRESH token"""
-        uid, role = get_auth(self)
+        uid, role = yield get_auth(self)
 
         grant_type = oauth2.grant.RefreshToken.grant_type + ':' + oauth2.grant.ResourceOwnerGrant.grant_type
 
         try:
-            self.client_store.save_client(uid, '', role, '', grant_type, '')
+            yield self.api_endpoint.run_blocking(self.client_store.save_client, uid, '', role, '', grant_type, '')
         except psycopg2.IntegrityError:
             log.info('User is already had')
 
-        response = self._dispatch_request(uid)
+        response = yield self.api_endpoint.run_blocking(self._dispatch_request, uid)
         self._map_response(response)
 
     def _dispatch_request(self, uid):
@@ -138,11 +140,12 @@ class OAuthRevokeAPI(RequestHandler):
         self.finish()
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def delete(self, token):
         """DELETE token (logout)"""
-        get_auth(self)
+        yield get_auth(self)
 
-        res = self.token_store.delete_refresh_token(token)
+        res = yield self.api_endpoint.run_blocking(self.token_store.delete_refresh_token, token)
 
         if res == 0:
             ret = {'ret' :'No token found in database.'}
@@ -15,18 +15,16 @@
 
 """The Service API endpoint."""
 
-from concurrent.futures import ThreadPoolExecutor
 import logging
 
 from tornado.web import RequestHandler
+import tornado.gen
 
 from zoe_api.rest_api.utils import catch_exceptions, get_auth, manage_cors_headers
 from zoe_api.api_endpoint import APIEndpoint  # pylint: disable=unused-import
 
 log = logging.getLogger(__name__)
 
-THREAD_POOL = ThreadPoolExecutor(20)
-
 
 class ServiceAPI(RequestHandler):
     """The Service API endpoint."""
@@ -46,13 +44,14 @@ class ServiceAPI(RequestHandler):
         self.finish()
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self, service_id):
         """HTTP GET method."""
-        uid, role = get_auth(self)
+        uid, role = yield get_auth(self)
 
-        service = self.api_endpoint.service_by_id(uid, role, service_id)
+        service = yield self.api_endpoint.service_by_id(uid, role, service_id)
 
-        self.write(service.serialize())
+        self.write((yield self.api_endpoint.run_blocking(service.serialize)))
 
     def data_received(self, chunk):
         """Not implemented as we do not use stream uploads"""
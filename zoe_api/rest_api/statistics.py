@@ -16,6 +16,7 @@
 """The Scheduler Statistics API endpoint."""
 
 from tornado.web import RequestHandler
+import tornado.gen
 
 from zoe_api.api_endpoint import APIEndpoint  # pylint: disable=unused-import
 from zoe_api.rest_api.utils import catch_exceptions, manage_cors_headers
@@ -39,9 +40,10 @@ class SchedulerStatsAPI(RequestHandler):
         self.finish()
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self):
         """HTTP GET method."""
-        statistics = self.api_endpoint.statistics_scheduler(0, 'guest')
+        statistics = yield self.api_endpoint.statistics_scheduler(0, 'guest')
         self.write(statistics)
 
     def data_received(self, chunk):
@@ -16,6 +16,7 @@
 """The Info API endpoint."""
 
 from tornado.web import RequestHandler
+import tornado.gen
 from zoe_api.rest_api.utils import get_auth, catch_exceptions, manage_cors_headers
 from zoe_api.api_endpoint import APIEndpoint  # pylint: disable=unused-import
 
@@ -38,9 +39,10 @@ class UserInfoAPI(RequestHandler):
         self.finish()
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self):
         """HTTP GET method."""
-        uid, role = get_auth(self)
+        uid, role = yield get_auth(self)
 
         ret = {
             'uid': uid,
@@ -20,15 +20,12 @@ import base64
 import logging
 import functools
 
+import tornado.concurrent
+import tornado.gen
 import tornado.web
 
-from zoe_lib.config import get_conf
-
 from zoe_api.exceptions import ZoeRestAPIException, ZoeNotFoundException, ZoeAuthException, ZoeException
-from zoe_api.auth.base import BaseAuthenticator  # pylint-bug #1063 pylint: disable=unused-import
-from zoe_api.auth.ldap import LDAPAuthenticator
-from zoe_api.auth.file import PlainTextAuthenticator
-from zoe_api.auth.ldapsasl import LDAPSASLAuthenticator
+from zoe_api.auth.cache import authenticate
 from zoe_api.rest_api.oauth_utils import client_store, token_store
 
 log = logging.getLogger(__name__)
@@ -41,11 +38,15 @@ def catch_exceptions(func):
     :return:
     """
     @functools.wraps(func)
+    @tornado.gen.coroutine
     def func_wrapper(*args, **kwargs):
-        """The actual decorator."""
+        """The actual decorator, handlers that are coroutines are waited for so that their exceptions are caught, too."""
         self = args[0]
         try:
-            return func(*args, **kwargs)
+            result = func(*args, **kwargs)
+            if tornado.concurrent.is_future(result):
+                result = yield result
+            return result
         except ZoeRestAPIException as e:
             if e.status_code != 401:
                 log.exception(e.message)
@@ -68,8 +69,19 @@ def catch_exceptions(func):
     return func_wrapper
 
 
+def _token_data(token, refresh):
+    """Look up an access or refresh token, return None if it does not exist."""
+    if refresh:
+        data = token_store.get_client_id_by_refresh_token(token)
+        if data:
+            data = dict(data, role=client_store.get_role_by_client_id(data["client_id"]))
+        return data
+    return token_store.get_access_token_info(token)
+
+
+@tornado.gen.coroutine
 def get_auth(handler: tornado.web.RequestHandler):
-    """Try to authenticate a request."""
+    """Try to authenticate a request, the returned Future resolves to (uid, role). Tokens and passwords are checked in the API thread pool."""
     if handler.get_secure_cookie('zoe'):
         cookie_val = str(handler.get_secure_cookie('zoe'))
         uid, role = cookie_val[2:-1].split('.')
@@ -84,14 +96,11 @@ def get_auth(handler: tornado.web.RequestHandler):
     if "Bearer" in auth_header:
         token = auth_header[7:]
 
-        if 'token' in handler.request.uri:
-            data = token_store.get_client_id_by_refresh_token(token)
-        else:
-            data = token_store.get_client_id_by_access_token(token)
+        data = yield handler.api_endpoint.run_blocking(_token_data, token, 'token' in handler.request.uri)
 
         if data:
             uid = data["client_id"]
-            role = client_store.get_role_by_client_id(uid)
+            role = data["role"]
         else:
             raise ZoeRestAPIException('Invalid Token', 401, {'WWW-Authenticate': 'Basic realm="Login Required"'})
 
@@ -105,15 +114,7 @@ def get_auth(handler: tornado.web.RequestHandler):
         auth_decoded = base64.decodebytes(bytes(auth_header[6:], 'ascii')).decode('utf-8')
         username, password = auth_decoded.split(':', 2)
 
-    if get_conf().auth_type == 'text':
-        authenticator = PlainTextAuthenticator()  # type: BaseAuthenticator
-    elif get_conf().auth_type == 'ldap':
-        authenticator = LDAPAuthenticator()  # type: BaseAuthenticator
-    elif get_conf().auth_type == 'ldapsasl':
-        authenticator = LDAPSASLAuthenticator()  # type: BaseAuthenticator
-    else:
-        raise ZoeException('Configuration error, unknown authentication method: {}'.format(get_conf().auth_type))
-    uid, role = authenticator.auth(username, password)
+    uid, role = yield handler.api_endpoint.run_blocking(authenticate, username, password)
     if uid is None:
         raise ZoeRestAPIException('missing or wrong authentication information', 401, {'WWW-Authenticate': 'Basic realm="Login Required"'})
     log.debug('Authentication done using auth-mechanism')
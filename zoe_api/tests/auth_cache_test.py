@@ -0,0 +1,61 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_api/auth/cache.py"""
+
+import pytest
+
+from zoe_api.auth.base import BaseAuthenticator
+from zoe_api.auth.cache import AuthCache
+from zoe_api.exceptions import ZoeAuthException
+
+
+class _Authenticator(BaseAuthenticator):
+    """Knows a single user and counts the authentication requests."""
+    def __init__(self):
+        self.calls = 0
+
+    def auth(self, username, password):
+        """Accept only zoeadmin/secret."""
+        self.calls += 1
+        if (username, password) != ('zoeadmin', 'secret'):
+            raise ZoeAuthException('Unknown user or password.')
+        return username, 'admin'
+
+
+def test_positive_and_negative():
+    """Both successful and failed authentications are answered from the cache."""
+    authenticator = _Authenticator()
+    cache = AuthCache(60, 60)
+    for _ in range(3):
+        assert cache.authenticate(authenticator, 'zoeadmin', 'secret') == ('zoeadmin', 'admin')
+        with pytest.raises(ZoeAuthException):
+            cache.authenticate(authenticator, 'zoeadmin', 'wrong')
+    assert authenticator.calls == 2
+
+
+def test_expiry():
+    """Expired entries and a disabled cache make the authenticator run again."""
+    authenticator = _Authenticator()
+    cache = AuthCache(60, 0)
+    for _ in range(2):
+        with pytest.raises(ZoeAuthException):
+            cache.authenticate(authenticator, 'zoeadmin', 'wrong')
+    assert authenticator.calls == 2
+
+    cache = AuthCache(0, 0)
+    cache.authenticate(authenticator, 'zoeadmin', 'secret')
+    cache.authenticate(authenticator, 'zoeadmin', 'secret')
+    assert authenticator.calls == 4
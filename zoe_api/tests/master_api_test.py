@@ -0,0 +1,76 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_api/master_api.py"""
+
+import argparse
+import json
+
+import tornado.gen
+import tornado.ioloop
+import zmq
+import zmq.eventloop.future
+
+from zoe_lib import config
+from zoe_api.master_api import APIManager
+
+
+@tornado.gen.coroutine
+def _reply(router, frames, delay):
+    yield tornado.gen.sleep(delay)
+    request = json.loads(frames[-1].decode('utf-8'))
+    reply = {'result': 'ok', 'request_id': request['request_id']}
+    yield router.send_multipart(frames[:-1] + [json.dumps(reply).encode('utf-8')])
+
+
+@tornado.gen.coroutine
+def _fake_master(router):
+    """Never reply for execution 1, reply for execution 2 after a while and immediately for the others."""
+    while True:
+        frames = yield router.recv_multipart()
+        exec_id = json.loads(frames[-1].decode('utf-8')).get('exec_id')
+        if exec_id != 1:
+            tornado.ioloop.IOLoop.current().spawn_callback(_reply, router, frames, 0.4 if exec_id == 2 else 0)
+
+
+def test_timeout_keeps_other_requests():
+    """A request that times out does not disturb the requests in flight on the same socket, nor the following ones."""
+    context = zmq.eventloop.future.Context()
+    router = context.socket(zmq.ROUTER)
+    router.setsockopt(zmq.LINGER, 0)
+    port = router.bind_to_random_port('tcp://127.0.0.1')
+    config.load_configuration(argparse.Namespace(master_url='tcp://127.0.0.1:{}'.format(port)))
+    api = APIManager()
+    api.REQUEST_TIMEOUT = 500
+
+    @tornado.gen.coroutine
+    def _requests():
+        tornado.ioloop.IOLoop.current().spawn_callback(_fake_master, router)
+        lost = api.execution_start(1)
+        yield tornado.gen.sleep(0.3)
+        other = api.execution_start(2)  # its reply arrives after the first request has timed out
+        lost, other = yield [lost, other]
+        after = yield api.execution_terminate(3)
+        return lost, other, after
+
+    try:
+        lost, other, after = tornado.ioloop.IOLoop.current().run_sync(_requests, timeout=10)
+    finally:
+        router.close()
+        if api.zmq_s is not None:
+            api.zmq_s.close()
+    assert lost[0] is False
+    assert other == (True, '')
+    assert after == (True, '')
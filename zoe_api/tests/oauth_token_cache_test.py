@@ -0,0 +1,55 @@
+# Copyright (c) 2017, Quang-Nhat HOANG-XUAN
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the access token cache of zoe_api/auth/oauth2/postgresql.py"""
+
+import argparse
+import datetime
+
+from zoe_lib import config
+from zoe_api.auth.oauth2 import postgresql
+
+
+class _SQL:
+    """Holds one token and counts the lookups."""
+    def __init__(self):
+        self.lookups = 0
+        self.tokens = {'access': {'client_id': 'zoeadmin', 'role': 'admin', 'expires_at': datetime.datetime.now(), 'refresh_token': 'refresh'}}
+
+    def get_access_token_info(self, access_token):
+        """Return the token row."""
+        self.lookups += 1
+        return self.tokens.get(access_token)
+
+    def delete_refresh_token(self, refresh_token):
+        """Delete the token paired with the refresh token."""
+        self.tokens = {}
+        return 1
+
+
+def test_revocation(monkeypatch):
+    """Tokens are read once from the database and forgotten as soon as they are revoked."""
+    config.load_configuration(argparse.Namespace(oauth_token_cache_ttl=60))
+    sql = _SQL()
+    monkeypatch.setattr(postgresql, '_sql', sql)
+    store = postgresql.AccessTokenStorePg()
+
+    assert store.get_access_token_info('access')['role'] == 'admin'
+    assert store.get_access_token_info('access')['client_id'] == 'zoeadmin'
+    assert sql.lookups == 1
+
+    store.delete_refresh_token('refresh')
+    assert store.get_access_token_info('access') is None
+    assert sql.lookups == 2
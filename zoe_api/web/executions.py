@@ -17,6 +17,8 @@
 
 import json
 
+import tornado.gen
+
 import zoe_api.exceptions
 from zoe_api.web.utils import get_auth, catch_exceptions
 from zoe_api.api_endpoint import APIEndpoint  # pylint: disable=unused-import
@@ -46,6 +48,7 @@ class ExecutionStartWeb(ZoeRequestHandler):
         self.api_endpoint = kwargs['api_endpoint']  # type: APIEndpoint
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def post(self):
         """Start an execution."""
         uid, role = get_auth(self)
@@ -54,7 +57,7 @@ class ExecutionStartWeb(ZoeRequestHandler):
         app_descr = json.loads(app_descr_json)
         exec_name = self.get_argument('exec_name')
 
-        new_id = self.api_endpoint.execution_start(uid, role, exec_name, app_descr)
+        new_id = yield self.api_endpoint.execution_start(uid, role, exec_name, app_descr)
 
         self.redirect(self.reverse_url('execution_inspect', new_id))
 
@@ -67,12 +70,13 @@ class ExecutionRestartWeb(ZoeRequestHandler):
         self.api_endpoint = kwargs['api_endpoint']  # type: APIEndpoint
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self, execution_id: int):
         """Restart an already defined (and not running) execution."""
         uid, role = get_auth(self)
 
-        e = self.api_endpoint.execution_by_id(uid, role, execution_id)
-        new_id = self.api_endpoint.execution_start(uid, role, e.name, e.description)
+        e = yield self.api_endpoint.execution_by_id(uid, role, execution_id)
+        new_id = yield self.api_endpoint.execution_start(uid, role, e.name, e.description)
 
         self.redirect(self.reverse_url('execution_inspect', new_id))
 
@@ -85,11 +89,12 @@ class ExecutionTerminateWeb(ZoeRequestHandler):
         self.api_endpoint = kwargs['api_endpoint']  # type: APIEndpoint
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self, execution_id: int):
         """Terminate an execution."""
         uid, role = get_auth(self)
 
-        success, message = self.api_endpoint.execution_terminate(uid, role, execution_id)
+        success, message = yield self.api_endpoint.execution_terminate(uid, role, execution_id)
         if not success:
             raise zoe_api.exceptions.ZoeException(message)
 
@@ -104,11 +109,12 @@ class ExecutionDeleteWeb(ZoeRequestHandler):
         self.api_endpoint = kwargs['api_endpoint']  # type: APIEndpoint
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self, execution_id: int):
         """Delete an execution."""
         uid, role = get_auth(self)
 
-        success, message = self.api_endpoint.execution_delete(uid, role, execution_id)
+        success, message = yield self.api_endpoint.execution_delete(uid, role, execution_id)
         if not success:
             raise zoe_api.exceptions.ZoeException(message)
 
@@ -123,15 +129,14 @@ class ExecutionInspectWeb(ZoeRequestHandler):
         self.api_endpoint = kwargs['api_endpoint']  # type: APIEndpoint
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self, execution_id):
         """Gather details about an execution."""
         uid, role = get_auth(self)
 
-        e = self.api_endpoint.execution_by_id(uid, role, execution_id)
+        e = yield self.api_endpoint.execution_by_id(uid, role, execution_id)
 
-        services_info = []
-        for service in e.services:
-            services_info.append(self.api_endpoint.service_by_id(uid, role, service.id))
+        services_info = yield self.api_endpoint.run_blocking(lambda: [s.serialize() for s in e.services])
 
         template_vars = {
             "e": e,
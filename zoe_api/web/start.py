@@ -18,6 +18,8 @@
 from random import randint
 import json
 
+import tornado.gen
+
 from zoe_api.api_endpoint import APIEndpoint  # pylint: disable=unused-import
 from zoe_api.web.utils import get_auth_login, get_auth, catch_exceptions
 from zoe_api.web.custom_request_handler import ZoeRequestHandler
@@ -49,11 +51,12 @@ class LoginWeb(ZoeRequestHandler):
         self.render('login.html')
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def post(self):
         """Try to authenticate."""
         username = self.get_argument("username", "")
         password = self.get_argument("password", "")
-        uid, role = get_auth_login(username, password)
+        uid, role = yield self.api_endpoint.run_blocking(get_auth_login, username, password)
 
         if not self.get_secure_cookie('zoe'):
             cookie_val = uid + '.' + role
@@ -69,12 +72,13 @@ class HomeWeb(ZoeRequestHandler):
         self.api_endpoint = kwargs['api_endpoint']  # type: APIEndpoint
 
     @catch_exceptions
+    @tornado.gen.coroutine
     def get(self):
         """Home page with authentication."""
         uid, role = get_auth(self)
 
         if role == 'user' or role == 'admin':
-            executions = self.api_endpoint.execution_list(uid, role)
+            executions = yield self.api_endpoint.execution_list(uid, role)
 
             template_vars = {
                 'executions': sorted(executions, key=lambda e: e.id),
@@ -89,9 +93,9 @@ class HomeWeb(ZoeRequestHandler):
             }
 
             app_descr = json.load(open('contrib/zoeapps/eurecom_aml_lab.json', 'r'))
-            execution = self.api_endpoint.execution_list(uid, role, name='aml-lab')
+            execution = yield self.api_endpoint.execution_list(uid, role, name='aml-lab')
             if len(execution) == 0 or execution[0]['status'] == 'terminated' or execution[0]['status'] == 'finished':
-                self.api_endpoint.execution_start(uid, role, 'aml-lab', app_descr)
+                yield self.api_endpoint.execution_start(uid, role, 'aml-lab', app_descr)
                 template_vars['execution_status'] = 'submitted'
                 return self.render('home_guest.html', **template_vars)
             else:
@@ -17,12 +17,10 @@
 
 import logging
 
-from zoe_lib.config import get_conf
+import tornado.concurrent
+import tornado.gen
 
-from zoe_api.auth.base import BaseAuthenticator  # pylint: disable=unused-import
-from zoe_api.auth.ldap import LDAPAuthenticator
-from zoe_api.auth.ldapsasl import LDAPSASLAuthenticator
-from zoe_api.auth.file import PlainTextAuthenticator
+from zoe_api.auth.cache import authenticate
 import zoe_api.exceptions
 from zoe_api.web.custom_request_handler import ZoeRequestHandler
 
@@ -35,11 +33,15 @@ def catch_exceptions(func):
     :param func:
     :return:
     """
+    @tornado.gen.coroutine
     def func_wrapper(*args, **kwargs):
-        """The actual decorator."""
+        """The actual decorator, handlers that are coroutines are waited for so that their exceptions are caught, too."""
         self = args[0]
         try:
-            return func(*args, **kwargs)
+            result = func(*args, **kwargs)
+            if tornado.concurrent.is_future(result):
+                result = yield result
+            return result
         except zoe_api.exceptions.ZoeAuthException:
             return missing_auth(self)
         except zoe_api.exceptions.ZoeNotFoundException as e:
@@ -60,15 +62,7 @@ def missing_auth(handler: ZoeRequestHandler):
 
 def get_auth_login(username, password):
     """Authenticate username and password against the configured user store."""
-    if get_conf().auth_type == 'text':
-        authenticator = PlainTextAuthenticator()  # type: BaseAuthenticator
-    elif get_conf().auth_type == 'ldap':
-        authenticator = LDAPAuthenticator()  # type: BaseAuthenticator
-    elif get_conf().auth_type == 'ldapsasl':
-        authenticator = LDAPSASLAuthenticator()  # type: BaseAuthenticator
-    else:
-        raise zoe_api.exceptions.ZoeException('Configuration error, unknown authentication method: {}'.format(get_conf().auth_type))
-    uid, role = authenticator.auth(username, password)
+    uid, role = authenticate(username, password)
     if uid is None:
         raise zoe_api.exceptions.ZoeAuthException
 
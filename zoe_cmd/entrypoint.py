@@ -74,6 +74,7 @@ def exec_list_cmd(args):
         'name',
         'user_id',
         'limit',
+        'after_id',
         'earlier_than_submit',
         'earlier_than_start',
         'earlier_than_end',
@@ -174,7 +175,9 @@ def stats_cmd(args_):
     stats_api = ZoeStatisticsAPI(utils.zoe_url(), utils.zoe_user(), utils.zoe_pass())
     sched = stats_api.scheduler()
     print('Scheduler queue length: {}'.format(sched['queue_length']))
-    print('Termination threads count: {}'.format(sched['termination_threads_count']))
+    print('Executions being terminated: {}'.format(sched['termination_threads_count']))
+    for exec_id, progress in sorted(sched.get('terminations', {}).items()):
+        print('  execution {}: {} of {} services terminated'.format(exec_id, progress['terminated'], '?' if progress['total'] is None else progress['total']))
 
 ENV_HELP_TEXT = '''To use this tool you need also to define three environment variables:
 ZOE_URL: point to the URL of the Zoe Scheduler (ex.: http://localhost:5000/
@@ -204,6 +207,7 @@ def process_arguments() -> Tuple[ArgumentParser, Namespace]:
 
     argparser_app_list = subparser.add_parser('exec-ls', help="List all executions for the calling user")
     argparser_app_list.add_argument('--limit', type=int, help='Limit the number of executions')
+    argparser_app_list.add_argument('--after-id', type=int, help='Show only executions with an ID lower than this one, to page through the results together with --limit')
     argparser_app_list.add_argument('--name', help='Show only executions with this name')
     argparser_app_list.add_argument('--user', help='Show only executions belonging to this user')
     argparser_app_list.add_argument('--status', choices=["submitted", "scheduled", "starting", "error", "running", "cleaning up", "terminated"], help='Show only executions with this status')
@@ -17,8 +17,12 @@
 This module contains code to validate application descriptions.
 """
 
+from collections import OrderedDict
+import hashlib
 import logging
 import json
+import os
+import threading
 
 import jsonschema
 
@@ -27,39 +31,104 @@ import zoe_lib.version
 
 log = logging.getLogger(__name__)
 
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'schemas', 'app_description_schema.json')
+VALIDATION_CACHE_SIZE = 256
 
-def app_validate(data):
+_validator = None
+_validation_cache = OrderedDict()  # description hash -> None if valid, the validation exception otherwise
+_lock = threading.Lock()
+
+
+def app_validator():
     """
-    Validates an application description, making sure all required fields are present and of the correct type.
-    If the description is not valid, an InvalidApplicationDescription exception is thrown.
-    Uses a JSON schema definition.
+    Return the validator for application descriptions, loading and checking the JSON schema on the first call.
 
-    :param data: an open file descriptor containing JSON data
-    :return: None if the application description is correct
+    Call it at startup to find out early if the schema is missing or broken.
     """
+    global _validator
+    with _lock:
+        if _validator is None:
+            try:
+                with open(SCHEMA_PATH, 'r') as schema_fp:
+                    schema = json.load(schema_fp)
+                validator_class = jsonschema.validators.validator_for(schema)
+                validator_class.check_schema(schema)
+            except (OSError, ValueError, jsonschema.SchemaError):
+                log.exception('BUG: invalid schema for application descriptions')
+                raise ZoeLibException('BUG: invalid schema for application descriptions')
+            _validator = validator_class(schema)
+        return _validator
+
+
+def _description_hash(data):
+    try:
+        serialized = json.dumps(data, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def _check_services(data):
+    found_monitor = False
+    for service in data['services']:
+        found_monitor = found_monitor or service['monitor']
+        for resource in ('memory', 'cores'):
+            limits = service['resources'][resource]
+            if limits['min'] is not None and limits['max'] is not None and limits['min'] > limits['max']:
+                raise InvalidApplicationDescription(msg='service {} has mismatching min and max {} limits'.format(service['name'], resource))
+
+    if not found_monitor:
+        raise InvalidApplicationDescription(msg="at least one process should have the monitor property set to true")
+
 
-    schema = json.load(open('schemas/app_description_schema.json', 'r'))
+def _validate(data):
     try:
-        jsonschema.validate(data, schema)
+        app_validator().validate(data)
     except jsonschema.ValidationError as e:
         raise InvalidApplicationDescription(str(e))
-    except jsonschema.SchemaError:
-        log.exception('BUG: invalid schema for application descriptions')
-        raise ZoeLibException('BUG: invalid schema for application descriptions')
 
     # Start non-schema, semantic checks
     if data['version'] != zoe_lib.version.ZOE_APPLICATION_FORMAT_VERSION:
         raise InvalidApplicationDescription('Application description version mismatch (expected: {}, found: {}'.format(zoe_lib.version.ZOE_APPLICATION_FORMAT_VERSION, data['version']))
 
-    found_monitor = False
-    for service in data['services']:
-        if service['monitor']:
-            found_monitor = True
-            break
-        if service['resources']['memory']['min'] is not None and service['resources']['memory']['min'] > service['resources']['memory']['max']:
-            raise InvalidApplicationDescription(msg='service {} has mismatching min and max memory limits'.format(service['name']))
-        if service['resources']['cores']['min'] is not None and service['resources']['cores']['min'] > service['resources']['cores']['max']:
-            raise InvalidApplicationDescription(msg='service {} has mismatching min and max memory limits'.format(service['name']))
+    _check_services(data)
 
-    if not found_monitor:
-        raise InvalidApplicationDescription(msg="at least one process should have the monitor property set to true")
+
+def app_validate(data):
+    """
+    Validates an application description, making sure all required fields are present and of the correct type.
+    If the description is not valid, an InvalidApplicationDescription exception is thrown.
+    Uses a JSON schema definition.
+
+    The outcome is remembered by the hash of the description content, so validating again the same ZApp does not
+    run the checks again.
+
+    :param data: the application description, as decoded from JSON
+    :return: None if the application description is correct
+    """
+    key = _description_hash(data)
+    if key is not None:
+        with _lock:
+            if key in _validation_cache:
+                _validation_cache.move_to_end(key)
+                error = _validation_cache[key]
+                if error is not None:
+                    raise error.with_traceback(None)
+                return
+
+    try:
+        _validate(data)
+    except InvalidApplicationDescription as e:
+        _remember(key, e)
+        raise
+    _remember(key, None)
+
+
+def _remember(key, error):
+    """Cache the outcome of a validation, other exceptions than InvalidApplicationDescription are never cached."""
+    if key is None:
+        return
+    with _lock:
+        _validation_cache[key] = error
+        if len(_validation_cache) > VALIDATION_CACHE_SIZE:
+            _validation_cache.popitem(last=False)
@@ -51,14 +51,24 @@ def load_configuration(test_conf=None):
         argparser.add_argument('--debug', action='store_true', help='Enable debug output')
         argparser.add_argument('--deployment-name', help='name of this Zoe deployment', default='prod')
 
+        argparser.add_argument('--state-backend', choices=['postgresql', 'sqlite'], help='Where the API and the master keep the state of executions, services and ports', default='postgresql')
+        argparser.add_argument('--state-sqlite-path', help='SQLite database file used by the sqlite state backend, must be reachable by the API and the master', default='/var/lib/zoe/zoe-state.sqlite')
+
         argparser.add_argument('--dbname', help='DB name', default='zoe')
         argparser.add_argument('--dbuser', help='DB user', default='zoe')
         argparser.add_argument('--dbpass', help='DB password', default='')
         argparser.add_argument('--dbhost', help='DB hostname', default='localhost')
         argparser.add_argument('--dbport', type=int, help='DB port', default=5432)
+        argparser.add_argument('--dbpool-enable', action='store_true', help='Use a pool of DB connections, one per concurrent thread, instead of a single shared connection')
+        argparser.add_argument('--dbpool-min', type=int, help='Minimum number of connections kept open in the DB connection pool', default=1)
+        argparser.add_argument('--dbpool-max', type=int, help='Maximum number of connections in the DB connection pool', default=10)
+        argparser.add_argument('--dbwrite-behind', action='store_true', help='Queue updates to executions, services and ports and write them to the DB in batches')
+        argparser.add_argument('--dbwrite-behind-interval', type=float, help='Seconds between writes of the queued state updates', default=0.2)
+        argparser.add_argument('--dbwrite-behind-size', type=int, help='Write the queued state updates as soon as this many rows are waiting', default=100)
 
         # Master options
         argparser.add_argument('--api-listen-uri', help='ZMQ API listen address', default='tcp://*:4850')
+        argparser.add_argument('--master-api-threads', type=int, help='Threads used by the master to process API commands for different executions in parallel', default=4)
         argparser.add_argument('--influxdb-dbname', help='Name of the InfluxDB database to use for storing metrics', default='zoe')
         argparser.add_argument('--influxdb-url', help='URL of the InfluxDB service (ex. http://localhost:8086)', default='http://localhost:8086')
         argparser.add_argument('--influxdb-enable', action="store_true", help='Enable metric output toward influxDB')
@@ -69,26 +79,36 @@ def load_configuration(test_conf=None):
         # API options
         argparser.add_argument('--listen-address', type=str, help='Address to listen to for incoming connections', default="0.0.0.0")
         argparser.add_argument('--listen-port', type=int, help='Port to listen to for incoming connections', default=5001)
+        argparser.add_argument('--api-processes', type=int, help='Number of API worker processes sharing the listening port, 0 for one per CPU', default=1)
         argparser.add_argument('--master-url', help='URL of the Zoe master process', default='tcp://127.0.0.1:4850')
+        argparser.add_argument('--api-executor-threads', type=int, help='Number of threads running database queries and authentication for the API', default=20)
 
         # API auth options
         argparser.add_argument('--auth-type', help='Authentication type (text or ldap)', default='text')
 
         argparser.add_argument('--auth-file', help='Path to the CSV file containing user,pass,role lines for text authentication', default='zoepass.csv')
+        argparser.add_argument('--auth-cache-ttl', type=float, help='Seconds a successful authentication is remembered, 0 to disable the cache', default=60)
+        argparser.add_argument('--auth-cache-negative-ttl', type=float, help='Seconds a failed authentication is remembered', default=5)
+        argparser.add_argument('--oauth-token-cache-ttl', type=float, help='Seconds a validated OAuth2 access token is remembered, 0 to disable the cache', default=60)
 
         argparser.add_argument('--ldap-server-uri', help='LDAP server to use for authentication', default='ldap://localhost')
         argparser.add_argument('--ldap-base-dn', help='LDAP base DN for users', default='ou=something,dc=any,dc=local')
         argparser.add_argument('--ldap-admin-gid', type=int, help='LDAP group ID for admins', default=5000)
         argparser.add_argument('--ldap-user-gid', type=int, help='LDAP group ID for users', default=5001)
         argparser.add_argument('--ldap-guest-gid', type=int, help='LDAP group ID for guests', default=5002)
+        argparser.add_argument('--ldap-pool-size', type=int, help='Number of idle LDAP connections kept open for reuse', default=4)
 
         # Proxy options
         argparser.add_argument('--proxy-path', help='Proxy base path', default='127.0.0.1')
 
         argparser.add_argument('--scheduler-class', help='Scheduler class to use for scheduling ZApps', choices=['ZoeSimpleScheduler', 'ZoeElasticScheduler'], default='ZoeSimpleScheduler')
         argparser.add_argument('--scheduler-policy', help='Scheduler policy to use for scheduling ZApps', choices=['FIFO', 'SIZE'], default='FIFO')
+        argparser.add_argument('--scheduler-placement', help='Strategy used by the elastic scheduler to choose the node for each service', choices=['least-loaded', 'best-fit', 'dominant-resource-fit'], default='least-loaded')
 
         argparser.add_argument('--backend', choices=['Swarm', 'Kubernetes'], default='Swarm')
+        argparser.add_argument('--backend-threads', type=int, help='Maximum number of services that are created or terminated in parallel', default=10)
+        argparser.add_argument('--max-concurrent-terminations', type=int, help='Maximum number of executions that are terminated in parallel', default=8)
+        argparser.add_argument('--platform-state-max-age', type=float, help='Maximum age in seconds of the platform state snapshot used by the scheduler, 0 to query the backend every time', default=10)
 
         # Docker Swarm backend options
         argparser.add_argument('--backend-swarm-url', help='Swarm/Docker API endpoint (ex.: zk://zk1:2181,zk2:2181 or http://swarm:2380)', default='http://localhost:2375')
@@ -100,6 +120,7 @@ def load_configuration(test_conf=None):
         # Kubernetes backend
         argparser.add_argument('--kube-config-file', help='Kubernetes configuration file', default='/opt/zoe/kube.conf')
         argparser.add_argument('--kube-namespace', help='The namespace that Zoe operates on', default='default')
+        argparser.add_argument('--kube-workload', choices=['ReplicationController', 'Deployment'], help='Kubernetes object created for Zoe services: one ReplicationController per service or one Deployment per service group', default='ReplicationController')
 
         argparser.add_argument('--cookie-secret', help='secret used to encrypt cookies', default='changeme')
         argparser.add_argument('--log-file', help='output logs to a file', default='stderr')
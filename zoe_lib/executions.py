@@ -71,6 +71,9 @@ class ZoeExecutionsAPI(ZoeAPIBase):
         * name: execution mane
         * user_id: user_id owning the execution (admin only)
         * limit: limit the number of returned entries
+        * page_size: same as limit, return at most this number of executions, newest first
+        * after_id: return the executions older than this ID, pass the lowest ID of the previous page to get the next one
+        * details: if true, include the application description and the list of service IDs of each execution
         * earlier_than_submit: all execution that where submitted earlier than this timestamp
         * earlier_than_start: all execution that started earlier than this timestamp
         * earlier_than_end: all execution that ended earlier than this timestamp
@@ -50,6 +50,23 @@ class BaseMetricSender:
         point = "api latency: {} took {} ms".format(action, diff)
         self._queue.put(point)
 
+    def metric_scheduler(self, measure, value, tags=None, fields=None):
+        """
+        Pass a scheduler metric point to the sender thread.
+
+        :param measure: what is measured, for example loop_time
+        :param value: the measured value, times are in milliseconds
+        :param tags: optional dictionary of tags that identify the series, their values must come from a small set, for example the policy
+        :param fields: optional dictionary of integer values stored with the point, for example the execution ID
+        """
+        details = dict(tags or {})
+        details.update(fields or {})
+        details_str = ''
+        if len(details) > 0:
+            details_str = ' (' + ', '.join('{}={}'.format(k, v) for k, v in sorted(details.items())) + ')'
+        point = "scheduler: {} is {}{}".format(measure, value, details_str)
+        self._queue.put(point)
+
     def _send_buffer(self):
         """
         Sends the buffered data.
@@ -70,3 +70,18 @@ class InfluxDBMetricSender(zoe_lib.metrics.base.BaseMetricSender):
         point_str += " " + str(int(time_end * 1000))
 
         self._queue.put(point_str)
+
+    def metric_scheduler(self, measure, value, tags=None, fields=None):
+        """Emit a scheduler metric, as the value of the scheduler_<measure> series. Fields are not indexed, so they do not create new series."""
+        point_str = "scheduler_" + measure
+        point_str += ',' + 'deployment' + '=' + self.deployment_name
+        if tags is not None:
+            for key, tag_value in sorted(tags.items()):
+                point_str += ',' + key + '=' + str(tag_value)
+        point_str += " value=" + str(value)
+        if fields is not None:
+            for key, field_value in sorted(fields.items()):
+                point_str += ',' + key + '=' + str(int(field_value)) + 'i'
+        point_str += " " + str(int(time.time() * 1000))
+
+        self._queue.put(point_str)
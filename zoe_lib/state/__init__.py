@@ -18,5 +18,7 @@
 from zoe_lib.state.base import Base
 from zoe_lib.state.execution import Execution
 from zoe_lib.state.sql_manager import SQLManager
+from zoe_lib.state.memory import MemoryStateManager
+from zoe_lib.state.sqlite import SQLiteStateManager
 from zoe_lib.state.service import Service, VolumeDescription, VolumeDescriptionHostPath
 from zoe_lib.state.port import Port
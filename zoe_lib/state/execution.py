@@ -52,6 +52,14 @@ class Execution:
         else:
             self.time_submit = datetime.datetime.fromtimestamp(d['time_submit'])
 
+        self._load_row(d)
+
+        self.size = self.description['size']
+
+        self.termination_lock = threading.Lock()
+
+    def _load_row(self, d):
+        """Load the fields that can change during the lifetime of the execution and forget the cached service list."""
         if isinstance(d['time_submit'], datetime.datetime):
             self.time_start = d['time_start']
         else:
@@ -65,9 +73,7 @@ class Execution:
         self._status = d['status']
         self.error_message = d['error_message']
 
-        self.size = self.description['size']
-
-        self.termination_lock = threading.Lock()
+        self._services = None
 
     def serialize(self):
         """Generates a dictionary that can be serialized in JSON."""
@@ -145,24 +151,28 @@ class Execution:
 
     @property
     def services(self):
-        """Getter for this execution service list."""
-        return self.sql_manager.service_list(execution_id=self.id)
+        """Getter for this execution service list. Services are loaded once and then cached, see also SQLManager.execution_list(load_services=True)."""
+        services = self._services  # read once, other threads can reset the cache at any time
+        if services is None:
+            services = sorted(self.sql_manager.service_list(execution_id=self.id), key=lambda s: s.id)
+            self._services = services
+        return list(services)
 
     @property
     def essential_services(self):
         """Getter for this execution essential service list."""
-        return self.sql_manager.service_list(execution_id=self.id, essential=True)
+        return [s for s in self.services if s.essential]
 
     @property
     def elastic_services(self):
         """Getter for this execution elastic service list."""
-        return self.sql_manager.service_list(execution_id=self.id, essential=False)
+        return [s for s in self.services if not s.essential]
 
     @property
     def essential_services_running(self) -> bool:
         """Returns True if all essential services of this execution have started."""
         for service in self.services:
-            if service.essential and service.is_dead():
+            if service.essential and not service.is_running():
                 return False
         return True
 
@@ -170,7 +180,7 @@ class Execution:
     def all_services_running(self) -> bool:
         """Return True if all services of this execution are running/active"""
         for service in self.services:
-            if service.is_dead():
+            if not service.is_running():
                 return False
         return True
 
@@ -179,7 +189,7 @@ class Execution:
         """Returns the number of services of this execution that are running."""
         count = 0
         for service in self.services:
-            if not service.is_dead():
+            if service.is_running():
                 count += 1
         return count
 
@@ -0,0 +1,217 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-memory Zoe state, with the same interface as SQLManager, for simulations and tests."""
+
+import datetime
+import itertools
+import logging
+import threading
+
+from zoe_lib.state.execution import Execution
+from zoe_lib.state.service import Service
+from zoe_lib.state.port import Port
+
+log = logging.getLogger(__name__)
+
+
+class MemoryStateManager:
+    """
+    Keeps executions, services and ports in Python dictionaries.
+
+    Rows are stored as dictionaries with the same fields as the SQL tables and are turned into Execution, Service and Port
+    objects when queried. As in SQLManager, there is at most one object per row, so all callers share the same instances.
+    Nothing is persisted.
+    """
+    def __init__(self, conf=None):
+        self.conf = conf
+        self._lock = threading.RLock()
+        self._tables = {
+            'execution': {},
+            'service': {},
+            'port': {}
+        }
+        self._ids = dict((table, itertools.count(1)) for table in self._tables)
+        self._objects = {}
+
+    def _new_row(self, table, row):
+        with self._lock:
+            row['id'] = next(self._ids[table])
+            self._tables[table][row['id']] = row
+            return row['id']
+
+    def _from_row(self, cls, row):
+        """Return the object for a row, reusing the existing instance if there is one."""
+        key = (cls, row['id'])
+        obj = self._objects.get(key)
+        if obj is None:
+            obj = cls(row, self)
+            self._objects[key] = obj
+        else:
+            obj._load_row(row)  # pylint: disable=protected-access
+        return obj
+
+    def _select(self, table, cls, only_one, filters):
+        with self._lock:
+            rows = [row for row in self._tables[table].values() if all(row[key] == value for key, value in filters.items())]
+            rows.sort(key=lambda r: r['id'])
+            objects = [self._from_row(cls, row) for row in rows]
+        if only_one:
+            return objects[0] if len(objects) > 0 else None
+        return objects
+
+    def _update(self, table, row_id, fields):
+        with self._lock:
+            row = self._tables[table].get(row_id)
+            if row is not None:
+                row.update(fields)
+
+    def flush(self):
+        """Nothing to write, updates are applied immediately."""
+        pass
+
+    @staticmethod
+    def _execution_matches(row, filters):
+        """Apply the execution_list() filters to a row."""
+        for key, value in filters.items():
+            if key.startswith('earlier_than_') or key.startswith('later_than_'):
+                column = 'time_' + key.split('_')[-1]
+                if row[column] is None:
+                    return False
+                timestamp = row[column].timestamp()
+                if key.startswith('earlier_than_') and timestamp > value:
+                    return False
+                if key.startswith('later_than_') and timestamp < value:
+                    return False
+            elif key == 'after_id':
+                if row['id'] >= value:
+                    return False
+            elif row[key] != value:
+                return False
+        return True
+
+    def _execution_rows(self, limit, filters):
+        with self._lock:
+            rows = [row for row in self._tables['execution'].values() if self._execution_matches(row, filters)]
+        if limit > 0 or 'after_id' in filters:
+            rows.sort(key=lambda r: r['id'], reverse=True)
+        else:
+            rows.sort(key=lambda r: r['id'])
+        if limit > 0:
+            rows = rows[:limit]
+        return rows
+
+    def execution_list(self, only_one=False, limit=-1, load_services=False, **kwargs):  # pylint: disable=unused-argument
+        """Return a list of executions, see SQLManager.execution_list()."""
+        with self._lock:
+            executions = [self._from_row(Execution, row) for row in self._execution_rows(limit, kwargs)]
+        if only_one:
+            return executions[0] if len(executions) > 0 else None
+        return executions
+
+    def execution_summary_list(self, limit=-1, **kwargs):
+        """Return a list of executions without their description, as dictionaries, see SQLManager.execution_summary_list()."""
+        fields = ['id', 'user_id', 'name', 'status', 'time_submit', 'time_start', 'time_end', 'error_message']
+        return [dict((field, row[field]) for field in fields) for row in self._execution_rows(limit, kwargs)]
+
+    def execution_update(self, exec_id, **kwargs):
+        """Update the state of an execution."""
+        self._update('execution', exec_id, kwargs)
+
+    def execution_new(self, name, user_id, description):
+        """Create a new execution in the state."""
+        return self._new_row('execution', {
+            'name': name,
+            'user_id': user_id,
+            'description': description,
+            'status': Execution.SUBMIT_STATUS,
+            'execution_manager_id': None,
+            'time_submit': datetime.datetime.now(),
+            'time_start': None,
+            'time_end': None,
+            'error_message': None
+        })
+
+    def execution_delete(self, execution_id):
+        """Delete an execution and its services from the state."""
+        with self._lock:
+            self._tables['execution'].pop(execution_id, None)
+            self._objects.pop((Execution, execution_id), None)
+            for service_id in [s['id'] for s in self._tables['service'].values() if s['execution_id'] == execution_id]:
+                self._tables['service'].pop(service_id)
+                self._objects.pop((Service, service_id), None)
+                for port_id in [p['id'] for p in self._tables['port'].values() if p['service_id'] == service_id]:
+                    self._tables['port'].pop(port_id)
+                    self._objects.pop((Port, port_id), None)
+
+    def service_list(self, only_one=False, **kwargs):
+        """Return a list of services, see SQLManager.service_list()."""
+        return self._select('service', Service, only_one, kwargs)
+
+    def service_update(self, service_id, **kwargs):
+        """Update the state of an existing service."""
+        self._update('service', service_id, kwargs)
+
+    def service_new(self, execution_id, name, service_group, description, is_essential):
+        """Adds a new service to the state."""
+        service_id = self._new_row('service', {
+            'status': 'created',
+            'error_message': None,
+            'execution_id': execution_id,
+            'name': name,
+            'service_group': service_group,
+            'description': description,
+            'essential': is_essential,
+            'backend_id': None,
+            'backend_status': Service.BACKEND_UNDEFINED_STATUS,
+            'ip_address': None
+        })
+        execution = self._objects.get((Execution, execution_id))
+        if execution is not None:
+            execution._services = None  # pylint: disable=protected-access
+        return service_id
+
+    def services_new(self, execution_id, services):
+        """Adds many services and their ports to the state, see SQLManager.services_new()."""
+        service_ids = []
+        with self._lock:
+            for service in services:
+                service_id = self.service_new(execution_id, service['name'], service['service_group'], service['description'], service['essential'])
+                for internal_name, description in service['ports']:
+                    self.port_new(service_id, internal_name, description)
+                service_ids.append(service_id)
+        return service_ids
+
+    def port_list(self, only_one=False, **kwargs):
+        """Return a list of ports, see SQLManager.port_list()."""
+        return self._select('port', Port, only_one, kwargs)
+
+    def port_update(self, port_id, **kwargs):
+        """Update the state of an existing port."""
+        self._update('port', port_id, kwargs)
+
+    def port_new(self, service_id, internal_name, description):
+        """Adds a new port to the state."""
+        port_id = self._new_row('port', {
+            'service_id': service_id,
+            'internal_name': internal_name,
+            'external_ip': None,
+            'external_port': None,
+            'description': description
+        })
+        service = self._objects.get((Service, service_id))
+        if service is not None:
+            service._ports = None  # pylint: disable=protected-access
+        return port_id
@@ -44,15 +44,20 @@ class Port:
         self.sql_manager = sql_manager
         self.id = d['id']
 
+        self.service_id = d['service_id']
         self.internal_name = d['internal_name']
-        self.external_ip = d['external_ip']
-        self.external_port = d['external_port']
         self.description = d['description']
+        self._load_row(d)
 
         self.internal_number = self.description['port_number']
         self.protocol = self.description['protocol']
         self.url_template = self.description['url_template']
 
+    def _load_row(self, d):
+        """Load the fields that can change during the lifetime of the port."""
+        self.external_ip = d['external_ip']
+        self.external_port = d['external_port']
+
     def serialize(self):
         """Generates a dictionary that can be serialized in JSON."""
         return {
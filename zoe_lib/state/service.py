@@ -98,20 +98,13 @@ class Service:
         self.id = d['id']
 
         self.name = d['name']
-        self.status = d['status']
-        self.error_message = d['error_message']
         self.execution_id = d['execution_id']
         self.description = d['description']
         self.service_group = d['service_group']
-        self.backend_id = d['backend_id']
-        self.backend_status = d['backend_status']
-
-        self.ip_address = d['ip_address']
-        if self.ip_address is not None and ('/32' in self.ip_address or '/128' in self.ip_address):
-            self.ip_address = self.ip_address.split('/')[0]
-
         self.essential = d['essential']
 
+        self._load_row(d)
+
         # Fields parsed from the JSON description
         self.image_name = self.description['image']
         self.is_monitor = self.description['monitor']
@@ -122,6 +115,18 @@ class Service:
         self.volumes = [VolumeDescriptionHostPath(v['path'], v['name'], v['read_only']) for v in self.description['volumes']]
         self.replicas = self.description['replicas']
 
+    def _load_row(self, d):
+        """Load the fields that can change during the lifetime of the service."""
+        self.status = d['status']
+        self.error_message = d['error_message']
+        self.backend_id = d['backend_id']
+        self.backend_status = d['backend_status']
+        self._ports = None  # the ports may have changed together with the row, they are loaded again when needed
+
+        self.ip_address = d['ip_address']
+        if self.ip_address is not None and ('/32' in self.ip_address or '/128' in self.ip_address):
+            self.ip_address = self.ip_address.split('/')[0]
+
     def serialize(self):
         """Generates a dictionary that can be serialized in JSON."""
         return {
@@ -159,6 +164,11 @@ class Service:
         self.sql_manager.service_update(self.id, status=self.STARTING_STATUS)
         self.status = self.STARTING_STATUS
 
+    def set_runnable(self):
+        """The scheduler has found room for this elastic service, it can be started."""
+        self.sql_manager.service_update(self.id, status=self.RUNNABLE_STATUS)
+        self.status = self.RUNNABLE_STATUS
+
     def set_active(self, backend_id, ip_address):
         """The service is running and has a valid backend_id."""
         self.sql_manager.service_update(self.id, status=self.ACTIVE_STATUS, backend_id=backend_id, error_message=None, ip_address=ip_address)
@@ -192,8 +202,12 @@ class Service:
 
     @property
     def ports(self):
-        """Getter for the ports exposed by this service."""
-        return self.sql_manager.port_list(service_id=self.id)
+        """Getter for the ports exposed by this service. Ports are loaded once and then cached."""
+        ports = self._ports  # read once, other threads can reset the cache at any time
+        if ports is None:
+            ports = sorted(self.sql_manager.port_list(service_id=self.id), key=lambda p: p.id)
+            self._ports = ports
+        return list(ports)
 
     @property
     def proxy_address(self):
@@ -207,6 +221,10 @@ class Service:
         """Returns True if this service is not running."""
         return self.backend_status == self.BACKEND_DESTROY_STATUS or self.backend_status == self.BACKEND_OOM_STATUS or self.backend_status == self.BACKEND_DIE_STATUS
 
+    def is_running(self):
+        """Returns True if this service has been started and its container has not died since."""
+        return self.status == self.ACTIVE_STATUS and not self.is_dead()
+
     @property
     def unique_name(self):
         """Returns a name for this service that is unique across multiple Zoe instances running on the same backend."""
@@ -15,11 +15,17 @@
 
 """Interface to PostgresQL for Zoe state."""
 
+import collections
+import contextlib
 import datetime
 import logging
+import threading
+import time
+import weakref
 
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
 
 from .service import Service
 from .execution import Execution
@@ -29,9 +35,17 @@ log = logging.getLogger(__name__)
 
 psycopg2.extensions.register_adapter(dict, psycopg2.extras.Json)
 
+_TABLES = {Execution: 'execution', Service: 'service', Port: 'port'}
+
 
 class SQLManager:
-    """The SQLManager class, should be used as a singleton."""
+    """
+    The SQLManager class, should be used as a singleton.
+
+    By default a single connection is shared by all threads. If the ``dbpool-enable`` option is set, connections are taken from a pool
+    sized between ``dbpool-min`` and ``dbpool-max``: each thread checks out its own connection for the duration of a query, so
+    concurrent state updates do not queue behind each other on the same socket.
+    """
     def __init__(self, conf):
         self.user = conf.dbuser
         self.password = conf.dbpass
@@ -39,8 +53,26 @@ class SQLManager:
         self.port = conf.dbport
         self.dbname = conf.dbname
         self.schema = conf.deployment_name
+        self.pool_enable = conf.dbpool_enable
+        self.pool_min = conf.dbpool_min
+        self.pool_max = conf.dbpool_max
         self.conn = None
+        self.pool = None
+        self._conn_lock = threading.RLock()
+        self._pool_slots = None
+        self._identity_map = weakref.WeakValueDictionary()
+        self._identity_lock = threading.Lock()
+        self.write_behind = conf.dbwrite_behind
+        self.write_behind_interval = conf.dbwrite_behind_interval
+        self.write_behind_size = conf.dbwrite_behind_size
+        self._pending_updates = collections.OrderedDict()
+        self._flushing = {}  # updates being written by flush()
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
         self._connect()
+        if self.write_behind:
+            self._flush_th = threading.Thread(target=self._flush_loop, name='db_flush', daemon=True)
+            self._flush_th.start()
 
     def _connect(self):
         dsn = 'dbname=' + self.dbname + \
@@ -48,19 +80,195 @@ class SQLManager:
               ' password=' + self.password + \
               ' host=' + self.host + \
               ' port=' + str(self.port)
+        # The search path is set once, when the connection is established, instead of before every query
+        options = '-c search_path={},public'.format(self.schema)
 
-        self.conn = psycopg2.connect(dsn)
+        if self.pool_enable:
+            self.pool = psycopg2.pool.ThreadedConnectionPool(self.pool_min, self.pool_max, dsn, options=options)
+            self._pool_slots = threading.BoundedSemaphore(self.pool_max)
+        else:
+            self.conn = psycopg2.connect(dsn, options=options)
+
+    def _get_connection(self):
+        """Return a usable connection, from the pool or the shared one."""
+        if self.pool is not None:
+            self._pool_slots.acquire()
+            try:
+                conn = self.pool.getconn()
+                if conn.closed:
+                    self.pool.putconn(conn, close=True)
+                    conn = self.pool.getconn()
+            except Exception:
+                self._pool_slots.release()
+                raise
+            return conn
+
+        self._conn_lock.acquire()
+        try:
+            if self.conn.closed:
+                self._connect()
+        except Exception:
+            self._conn_lock.release()
+            raise
+        return self.conn
+
+    def _put_connection(self, conn, broken=False):
+        """Give back a connection obtained with _get_connection()."""
+        if self.pool is not None:
+            self.pool.putconn(conn, close=broken or bool(conn.closed))
+            self._pool_slots.release()
+        else:
+            self._conn_lock.release()
 
+    @contextlib.contextmanager
     def _cursor(self):
+        """Context manager that yields a cursor and commits the transaction when the block exits without errors."""
+        conn = self._get_connection()
+        broken = False
         try:
-            cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        except psycopg2.InterfaceError:
-            self._connect()
-            cur = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cur.execute('SET search_path TO {},public'.format(self.schema))
-        return cur
-
-    def execution_list(self, only_one=False, limit=-1, **kwargs):
+            cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            yield cur
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            log.warning('Lost connection to the database, it will be re-established at the next query')
+            if self.pool is None:
+                conn.close()
+            raise
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self._put_connection(conn, broken)
+
+    def _update(self, table, row_id, fields, sync=False):
+        """Write an update to a row, immediately or through the write-behind queue."""
+        if not self.write_behind:
+            with self._cursor() as cur:
+                self._execute_updates(cur, [(table, row_id, fields)])
+            return
+
+        with self._pending_lock:
+            self._pending_updates.setdefault((table, row_id), {}).update(fields)
+            queue_full = len(self._pending_updates) >= self.write_behind_size
+        if sync or queue_full:
+            self.flush()
+
+    @staticmethod
+    def _execute_updates(cur, updates):
+        """Run a list of (table, id, fields) updates, batching together the ones that touch the same columns."""
+        batches = collections.OrderedDict()
+        for table, row_id, fields in updates:
+            columns = tuple(sorted(fields.keys()))
+            batches.setdefault((table, columns), []).append([fields[column] for column in columns] + [row_id])
+        for (table, columns), args_list in batches.items():
+            query = 'UPDATE {} SET '.format(table) + ', '.join('{} = %s'.format(column) for column in columns) + ' WHERE id=%s'
+            psycopg2.extras.execute_batch(cur, query, args_list)
+
+    def flush(self, match=None):
+        """
+        Write the queued updates to the database in a single transaction.
+
+        :param match: if given, a function of the table name and the updated fields, only the updates it accepts are written
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                if match is None:
+                    pending = self._pending_updates
+                    self._pending_updates = collections.OrderedDict()
+                else:
+                    pending = collections.OrderedDict((key, fields) for key, fields in self._pending_updates.items() if match(key[0], fields))
+                    for key in pending:
+                        del self._pending_updates[key]
+                if len(pending) == 0:
+                    return
+                self._flushing = pending
+            try:
+                with self._cursor() as cur:
+                    self._execute_updates(cur, [(table, row_id, fields) for (table, row_id), fields in pending.items()])
+            except Exception:
+                with self._pending_lock:  # put the updates back, without overwriting newer ones
+                    for key, fields in self._pending_updates.items():
+                        pending.setdefault(key, {}).update(fields)
+                    self._pending_updates = pending
+                    self._flushing = {}
+                raise
+            with self._pending_lock:
+                self._flushing = {}
+
+    def _flush_filters(self, table, columns):
+        """Write the queued updates to the columns a query filters on, so that the database selects the right rows."""
+        if not self.write_behind:
+            return
+        columns = set(columns)
+        self.flush(lambda update_table, fields: update_table == table and not columns.isdisjoint(fields))
+
+    def _pending_fields(self, table, row_id):
+        """Return the queued updates to a row not yet committed to the database, or None."""
+        if not self.write_behind:
+            return None
+        with self._pending_lock:
+            flushing = self._flushing.get((table, row_id))
+            pending = self._pending_updates.get((table, row_id))
+            if flushing is None and pending is None:
+                return None
+            fields = dict(flushing or {})
+            fields.update(pending or {})
+        return fields
+
+    def _flush_loop(self):
+        """Background thread that periodically flushes the write-behind queue."""
+        while True:
+            time.sleep(self.write_behind_interval)
+            try:
+                self.flush()
+            except Exception:
+                log.exception('Error writing queued state updates, will retry')
+
+    def _from_row(self, cls, row):
+        """Return the object for a row, reusing the instance in the identity map if there is one."""
+        key = (cls, row['id'])
+        pending = self._pending_fields(_TABLES[cls], row['id'])
+        if pending is not None:  # the row was read before the queued updates were written, the objects must not lose them
+            row = dict(row)
+            row.update(pending)
+        with self._identity_lock:
+            obj = self._identity_map.get(key)
+            if obj is None:
+                obj = cls(row, self)
+                self._identity_map[key] = obj
+            else:
+                obj._load_row(row)  # pylint: disable=protected-access
+        return obj
+
+    def _cached(self, cls, obj_id):
+        """Return the object with the given ID if it is in the identity map, None otherwise."""
+        with self._identity_lock:
+            return self._identity_map.get((cls, obj_id))
+
+    def _load_services(self, executions):
+        """Load the services and ports of a list of executions with two queries and attach them to their parents."""
+        if len(executions) == 0:
+            return
+        exec_ids = tuple(e.id for e in executions)
+        with self._cursor() as cur:
+            cur.execute('SELECT * FROM service WHERE execution_id IN %s ORDER BY id', (exec_ids,))
+            services = [self._from_row(Service, row) for row in cur]
+            cur.execute('SELECT port.* FROM port JOIN service ON port.service_id = service.id WHERE service.execution_id IN %s ORDER BY port.id', (exec_ids,))
+            ports = [self._from_row(Port, row) for row in cur]
+
+        ports_by_service = {}
+        for port in ports:
+            ports_by_service.setdefault(port.service_id, []).append(port)
+        services_by_execution = {}
+        for service in services:
+            service._ports = ports_by_service.get(service.id, [])  # pylint: disable=protected-access
+            services_by_execution.setdefault(service.execution_id, []).append(service)
+        for execution in executions:
+            execution._services = services_by_execution.get(execution.id, [])  # pylint: disable=protected-access
+
+    def execution_list(self, only_one=False, limit=-1, load_services=False, **kwargs):
         """
         Return a list of executions.
 
@@ -68,80 +276,112 @@ class SQLManager:
         :type only_one: bool
         :param limit: limit the result to this number of entries
         :type limit: int
-        :param kwargs: filter executions based on their fields/columns
+        :param load_services: also load the services and ports of the returned executions, using two queries in total
+        :type load_services: bool
+        :param kwargs: filter executions based on their fields/columns, after_id selects the executions with a lower ID, for keyset pagination
         :return: one or more executions
         """
-        cur = self._cursor()
-        q_base = 'SELECT * FROM execution'
-        if len(kwargs) > 0:
-            q = q_base + " WHERE "
-            filter_list = []
-            args_list = []
-            for key, value in kwargs.items():
-                if key == 'earlier_than_submit':
-                    filter_list.append('"time_submit" <= to_timestamp(%s)')
-                elif key == 'earlier_than_start':
-                    filter_list.append('"time_start" <= to_timestamp(%s)')
-                elif key == 'earlier_than_end':
-                    filter_list.append('"time_end" <= to_timestamp(%s)')
-                elif key == 'later_than_submit':
-                    filter_list.append('"time_submit" >= to_timestamp(%s)')
-                elif key == 'later_than_start':
-                    filter_list.append('"time_start" >= to_timestamp(%s)')
-                elif key == 'later_than_end':
-                    filter_list.append('"time_end" >= to_timestamp(%s)')
-                else:
-                    filter_list.append('{} = %s'.format(key))
-                args_list.append(value)
-            q += ' AND '.join(filter_list)
-            if limit > 0:
-                q += ' ORDER BY id DESC LIMIT {}'.format(limit)
-            query = cur.mogrify(q, args_list)
-        else:
-            if limit > 0:
-                q_base += ' ORDER BY id DESC LIMIT {}'.format(limit)
-            query = cur.mogrify(q_base)
-
-        cur.execute(query)
+        self._flush_filters('execution', [self._filter_column(key) for key in kwargs])
+        with self._cursor() as cur:
+            where, args_list = self._execution_filters(limit, kwargs)
+            cur.execute('SELECT * FROM execution' + where, args_list)
+            if only_one:
+                row = cur.fetchone()
+                if row is None:
+                    return None
+                executions = [self._from_row(Execution, row)]
+            else:
+                executions = [self._from_row(Execution, x) for x in cur]
+
+        if load_services:
+            self._load_services(executions)
         if only_one:
-            row = cur.fetchone()
-            if row is None:
-                return None
-            return Execution(row, self)
-        else:
-            return [Execution(x, self) for x in cur]
+            return executions[0]
+        return executions
+
+    def execution_summary_list(self, limit=-1, **kwargs):
+        """
+        Return a list of executions without their description, as dictionaries. Accepts the same filters as execution_list().
+
+        :param limit: limit the result to this number of entries
+        :type limit: int
+        :param kwargs: filter executions based on their fields/columns
+        :return: a list of dictionaries with the id, user_id, name, status, time_submit, time_start, time_end and error_message fields
+        """
+        self._flush_filters('execution', [self._filter_column(key) for key in kwargs])
+        with self._cursor() as cur:
+            where, args_list = self._execution_filters(limit, kwargs)
+            cur.execute('SELECT id, user_id, name, status, time_submit, time_start, time_end, error_message FROM execution' + where, args_list)
+            summaries = [dict(row) for row in cur]
+        for summary in summaries:
+            pending = self._pending_fields('execution', summary['id'])
+            if pending is not None:
+                summary.update((column, value) for column, value in pending.items() if column in summary)
+        return summaries
+
+    @staticmethod
+    def _filter_column(key):
+        """Return the column an execution filter looks at."""
+        if key.startswith('earlier_than_') or key.startswith('later_than_'):
+            return 'time_' + key.rsplit('_', 1)[1]
+        elif key == 'after_id':
+            return 'id'
+        return key
+
+    @staticmethod
+    def _execution_filters(limit, filters):
+        """Build the WHERE, ORDER BY and LIMIT clauses for an execution query."""
+        filter_list = []
+        args_list = []
+        for key, value in filters.items():
+            if key == 'earlier_than_submit':
+                filter_list.append('"time_submit" <= to_timestamp(%s)')
+            elif key == 'earlier_than_start':
+                filter_list.append('"time_start" <= to_timestamp(%s)')
+            elif key == 'earlier_than_end':
+                filter_list.append('"time_end" <= to_timestamp(%s)')
+            elif key == 'later_than_submit':
+                filter_list.append('"time_submit" >= to_timestamp(%s)')
+            elif key == 'later_than_start':
+                filter_list.append('"time_start" >= to_timestamp(%s)')
+            elif key == 'later_than_end':
+                filter_list.append('"time_end" >= to_timestamp(%s)')
+            elif key == 'after_id':
+                filter_list.append('id < %s')
+            else:
+                filter_list.append('{} = %s'.format(key))
+            args_list.append(value)
+
+        q = ''
+        if len(filter_list) > 0:
+            q += ' WHERE ' + ' AND '.join(filter_list)
+        if limit > 0 or 'after_id' in filters:
+            q += ' ORDER BY id DESC'
+        if limit > 0:
+            q += ' LIMIT {:d}'.format(limit)
+        return q, args_list
 
     def execution_update(self, exec_id, **kwargs):
         """Update the state of an execution."""
-        cur = self._cursor()
-        arg_list = []
-        value_list = []
-        for key, value in kwargs.items():
-            arg_list.append('{} = %s'.format(key))
-            value_list.append(value)
-        set_q = ", ".join(arg_list)
-        value_list.append(exec_id)
-        q_base = 'UPDATE execution SET ' + set_q + ' WHERE id=%s'
-        query = cur.mogrify(q_base, value_list)
-        cur.execute(query)
-        self.conn.commit()
+        sync = kwargs.get('status') in (Execution.TERMINATED_STATUS, Execution.ERROR_STATUS)
+        self._update('execution', exec_id, kwargs, sync)
 
     def execution_new(self, name, user_id, description):
         """Create a new execution in the state."""
-        cur = self._cursor()
-        status = Execution.SUBMIT_STATUS
-        time_submit = datetime.datetime.now()
-        query = cur.mogrify('INSERT INTO execution (id, name, user_id, description, status, time_submit) VALUES (DEFAULT, %s,%s,%s,%s,%s) RETURNING id', (name, user_id, description, status, time_submit))
-        cur.execute(query)
-        self.conn.commit()
-        return cur.fetchone()[0]
+        with self._cursor() as cur:
+            status = Execution.SUBMIT_STATUS
+            time_submit = datetime.datetime.now()
+            query = cur.mogrify('INSERT INTO execution (id, name, user_id, description, status, time_submit) VALUES (DEFAULT, %s,%s,%s,%s,%s) RETURNING id', (name, user_id, description, status, time_submit))
+            cur.execute(query)
+            return cur.fetchone()[0]
 
     def execution_delete(self, execution_id):
         """Delete an execution and its services from the state."""
-        cur = self._cursor()
-        query = "DELETE FROM execution WHERE id = %s"
-        cur.execute(query, (execution_id,))
-        self.conn.commit()
+        with self._pending_lock:  # queued updates to its services and ports will not find their rows, which is harmless
+            self._pending_updates.pop(('execution', execution_id), None)
+        with self._cursor() as cur:
+            query = "DELETE FROM execution WHERE id = %s"
+            cur.execute(query, (execution_id,))
 
     def service_list(self, only_one=False, **kwargs):
         """
@@ -152,52 +392,87 @@ class SQLManager:
         :param kwargs: filter services based on their fields/columns
         :return: one or more services
         """
-        cur = self._cursor()
-        q_base = 'SELECT * FROM service'
-        if len(kwargs) > 0:
-            q = q_base + " WHERE "
-            filter_list = []
-            args_list = []
-            for key, value in kwargs.items():
-                filter_list.append('{} = %s'.format(key))
-                args_list.append(value)
-            q += ' AND '.join(filter_list)
-            query = cur.mogrify(q, args_list)
-        else:
-            query = cur.mogrify(q_base)
-
-        cur.execute(query)
-        if only_one:
-            row = cur.fetchone()
-            if row is None:
-                return None
-            return Service(row, self)
-        else:
-            return [Service(x, self) for x in cur]
+        self._flush_filters('service', kwargs.keys())
+        with self._cursor() as cur:
+            q_base = 'SELECT * FROM service'
+            if len(kwargs) > 0:
+                q = q_base + " WHERE "
+                filter_list = []
+                args_list = []
+                for key, value in kwargs.items():
+                    filter_list.append('{} = %s'.format(key))
+                    args_list.append(value)
+                q += ' AND '.join(filter_list)
+                query = cur.mogrify(q, args_list)
+            else:
+                query = cur.mogrify(q_base)
+
+            cur.execute(query)
+            if only_one:
+                row = cur.fetchone()
+                if row is None:
+                    return None
+                return self._from_row(Service, row)
+            else:
+                return [self._from_row(Service, x) for x in cur]
 
     def service_update(self, service_id, **kwargs):
         """Update the state of an existing service."""
-        cur = self._cursor()
-        arg_list = []
-        value_list = []
-        for key, value in kwargs.items():
-            arg_list.append('{} = %s'.format(key))
-            value_list.append(value)
-        set_q = ", ".join(arg_list)
-        value_list.append(service_id)
-        q_base = 'UPDATE service SET ' + set_q + ' WHERE id=%s'
-        query = cur.mogrify(q_base, value_list)
-        cur.execute(query)
-        self.conn.commit()
+        sync = kwargs.get('status') == Service.ERROR_STATUS
+        self._update('service', service_id, kwargs, sync)
 
     def service_new(self, execution_id, name, service_group, description, is_essential):
         """Adds a new service to the state."""
-        cur = self._cursor()
-        status = 'created'
-        query = cur.mogrify('INSERT INTO service (id, status, error_message, execution_id, name, service_group, description, essential) VALUES (DEFAULT, %s,NULL,%s,%s,%s,%s,%s) RETURNING id', (status, execution_id, name, service_group, description, is_essential))
-        cur.execute(query)
-        self.conn.commit()
-        return cur.fetchone()[0]
+        with self._cursor() as cur:
+            status = 'created'
+            query = cur.mogrify('INSERT INTO service (id, status, error_message, execution_id, name, service_group, description, essential) VALUES (DEFAULT, %s,NULL,%s,%s,%s,%s,%s) RETURNING id', (status, execution_id, name, service_group, description, is_essential))
+            cur.execute(query)
+            service_id = cur.fetchone()[0]
+        execution = self._cached(Execution, execution_id)
+        if execution is not None:
+            execution._services = None  # pylint: disable=protected-access
+        return service_id
+
+    def services_new(self, execution_id, services):
+        """
+        Adds many services and their ports to the state, in a single transaction.
+
+        :param execution_id: the execution the services belong to
+        :param services: a list of dictionaries with the name, service_group, description and essential fields of each service, plus a ports list of (internal_name, description) tuples
+        :return: the list of the new service IDs, in the same order as services
+        """
+        return [service.id for service in self._services_new(execution_id, services)]
+
+    def _services_new(self, execution_id, services):
+        """Insert services and ports with one multi-row INSERT per table, return the new Service objects with their ports."""
+        if len(services) == 0:
+            return []
+        # Generated names can collide across groups ("a" + "11" and "a1" + "1"), the group and the name together cannot
+        keys = [(s['service_group'], s['name']) for s in services]
+        if len(set(keys)) != len(keys):
+            raise ValueError('Duplicate service names in execution {}'.format(execution_id))
+        with self._cursor() as cur:
+            service_rows = psycopg2.extras.execute_values(cur, 'INSERT INTO service (status, error_message, execution_id, name, service_group, description, essential) VALUES %s RETURNING *',
+                                                          [('created', None, execution_id, s['name'], s['service_group'], s['description'], s['essential']) for s in services],
+                                                          page_size=len(services), fetch=True)
+            service_ids = dict(((row['service_group'], row['name']), row['id']) for row in service_rows)
+            port_values = [(service_ids[(s['service_group'], s['name'])], internal_name, description) for s in services for internal_name, description in s['ports']]
+            port_rows = []
+            if len(port_values) > 0:
+                port_rows = psycopg2.extras.execute_values(cur, 'INSERT INTO port (service_id, internal_name, external_ip, external_port, description) VALUES %s RETURNING *',
+                                                           [(service_id, internal_name, None, None, description) for service_id, internal_name, description in port_values],
+                                                           page_size=len(port_values), fetch=True)
+
+        new_services = dict((row['id'], self._from_row(Service, row)) for row in service_rows)
+        ports = dict((service_id, []) for service_id in new_services)
+        for row in sorted(port_rows, key=lambda r: r['id']):
+            ports[row['service_id']].append(self._from_row(Port, row))
+        for service_id, service in new_services.items():
+            service._ports = ports[service_id]  # pylint: disable=protected-access
+        execution = self._cached(Execution, execution_id)
+        if execution is not None:
+            execution._services = None  # pylint: disable=protected-access
+        return [new_services[service_ids[(s['service_group'], s['name'])]] for s in services]
 
     def port_list(self, only_one=False, **kwargs):
         """
@@ -208,123 +483,121 @@ class SQLManager:
         :param kwargs: filter services based on their fields/columns
         :return: one or more ports
         """
-        cur = self._cursor()
-        q_base = 'SELECT * FROM port'
-        if len(kwargs) > 0:
-            q = q_base + " WHERE "
-            filter_list = []
-            args_list = []
-            for key, value in kwargs.items():
-                filter_list.append('{} = %s'.format(key))
-                args_list.append(value)
-            q += ' AND '.join(filter_list)
-            query = cur.mogrify(q, args_list)
-        else:
-            query = cur.mogrify(q_base)
-
-        cur.execute(query)
-        if only_one:
-            row = cur.fetchone()
-            if row is None:
-                return None
-            return Port(row, self)
-        else:
-            return [Port(x, self) for x in cur]
+        self._flush_filters('port', kwargs.keys())
+        with self._cursor() as cur:
+            q_base = 'SELECT * FROM port'
+            if len(kwargs) > 0:
+                q = q_base + " WHERE "
+                filter_list = []
+                args_list = []
+                for key, value in kwargs.items():
+                    filter_list.append('{} = %s'.format(key))
+                    args_list.append(value)
+                q += ' AND '.join(filter_list)
+                query = cur.mogrify(q, args_list)
+            else:
+                query = cur.mogrify(q_base)
+
+            cur.execute(query)
+            if only_one:
+                row = cur.fetchone()
+                if row is None:
+                    return None
+                return self._from_row(Port, row)
+            else:
+                return [self._from_row(Port, x) for x in cur]
 
     def port_update(self, port_id, **kwargs):
         """Update the state of an existing port."""
-        cur = self._cursor()
-        arg_list = []
-        value_list = []
-        for key, value in kwargs.items():
-            arg_list.append('{} = %s'.format(key))
-            value_list.append(value)
-        set_q = ", ".join(arg_list)
-        value_list.append(port_id)
-        q_base = 'UPDATE port SET ' + set_q + ' WHERE id=%s'
-        query = cur.mogrify(q_base, value_list)
-        cur.execute(query)
-        self.conn.commit()
+        self._update('port', port_id, kwargs)
 
     def port_new(self, service_id, internal_name, description):
         """Adds a new port to the state."""
-        cur = self._cursor()
-        query = cur.mogrify('INSERT INTO port (id, service_id, internal_name, external_ip, external_port, description) VALUES (DEFAULT, %s, %s, NULL, NULL, %s) RETURNING id', (service_id, internal_name, description))
-        cur.execute(query)
-        self.conn.commit()
-        return cur.fetchone()[0]
+        with self._cursor() as cur:
+            query = cur.mogrify('INSERT INTO port (id, service_id, internal_name, external_ip, external_port, description) VALUES (DEFAULT, %s, %s, NULL, NULL, %s) RETURNING id', (service_id, internal_name, description))
+            cur.execute(query)
+            port_id = cur.fetchone()[0]
+        service = self._cached(Service, service_id)
+        if service is not None:
+            service._ports = None  # pylint: disable=protected-access
+        return port_id
 
     # The section below is used for Oauth2 authentication mechanism
 
     def fetch_by_refresh_token(self, refresh_token):
         """ get info from refreshtoken """
-        cur = self._cursor()
-        query = 'SELECT * FROM oauth_token WHERE refresh_token = %s'
-        cur.execute(query, (refresh_token,))
+        with self._cursor() as cur:
+            query = 'SELECT * FROM oauth_token WHERE refresh_token = %s'
+            cur.execute(query, (refresh_token,))
 
-        return cur.fetchone()
+            return cur.fetchone()
 
     def delete_refresh_token(self, refresh_token):
         """ delete info by refreshtoken """
-        cur = self._cursor()
-        check_exists = 'SELECT * FROM oauth_token WHERE refresh_token = %s OR token = %s'
-        cur.execute(check_exists, (refresh_token, refresh_token))
-        res = 0
-        if cur.fetchone():
-            res = 1
-        query = 'DELETE FROM oauth_token WHERE refresh_token = %s OR token = %s'
-        cur.execute(query, (refresh_token, refresh_token))
-        self.conn.commit()
+        with self._cursor() as cur:
+            check_exists = 'SELECT * FROM oauth_token WHERE refresh_token = %s OR token = %s'
+            cur.execute(check_exists, (refresh_token, refresh_token))
+            res = 0
+            if cur.fetchone():
+                res = 1
+            query = 'DELETE FROM oauth_token WHERE refresh_token = %s OR token = %s'
+            cur.execute(query, (refresh_token, refresh_token))
         return res
 
     def fetch_existing_token_of_user(self, client_id, grant_type, user_id):
         """ get info from clientid granttype userid """
-        cur = self._cursor()
-        query = 'SELECT * FROM oauth_token WHERE client_id = %s AND grant_type = %s AND user_id = %s'
-        cur.execute(query, (client_id, grant_type, user_id,))
+        with self._cursor() as cur:
+            query = 'SELECT * FROM oauth_token WHERE client_id = %s AND grant_type = %s AND user_id = %s'
+            cur.execute(query, (client_id, grant_type, user_id,))
 
-        return cur.fetchone()
+            return cur.fetchone()
 
     def get_client_id_by_access_token(self, access_token):
         """ get clientid from accesstoken """
-        cur = self._cursor()
-        query = 'SELECT * FROM oauth_token WHERE token = %s'
-        cur.execute(query, (access_token,))
+        with self._cursor() as cur:
+            query = 'SELECT * FROM oauth_token WHERE token = %s'
+            cur.execute(query, (access_token,))
+
+            return cur.fetchone()
 
-        return cur.fetchone()
+    def get_access_token_info(self, access_token):
+        """ get clientid, role, expiry time and refreshtoken from accesstoken, in a single query """
+        with self._cursor() as cur:
+            query = 'SELECT t.client_id, c.role, t.expires_at, t.refresh_token FROM oauth_token AS t JOIN oauth_client AS c ON c.identifier = t.client_id WHERE t.token = %s'
+            cur.execute(query, (access_token,))
+
+            return cur.fetchone()
 
     def get_client_id_by_refresh_token(self, refresh_token):
         """ get clientid from refreshtoken """
-        cur = self._cursor()
-        query = 'SELECT * FROM oauth_token WHERE refresh_token = %s'
-        cur.execute(query, (refresh_token,))
+        with self._cursor() as cur:
+            query = 'SELECT * FROM oauth_token WHERE refresh_token = %s'
+            cur.execute(query, (refresh_token,))
 
-        return cur.fetchone()
+            return cur.fetchone()
 
     def save_token(self, client_id, grant_type, token, data, expires_at, refresh_token, refresh_expires_at, scopes, user_id): #pylint: disable=too-many-arguments
         """ save token to db """
-        cur = self._cursor()
-        expires_at = datetime.datetime.fromtimestamp(expires_at)
-        if refresh_expires_at is None:
-            query = cur.mogrify('UPDATE oauth_token SET token = %s, expires_at = %s WHERE client_id=%s', (token, expires_at, client_id))
-        else:
-            refresh_token_expires_at = datetime.datetime.fromtimestamp(refresh_expires_at)
-            query = cur.mogrify('INSERT INTO oauth_token (client_id, grant_type, token, data, expires_at, refresh_token, refresh_token_expires_at, scopes, user_id) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s) ON CONFLICT (client_id) DO UPDATE SET token = %s, expires_at = %s, refresh_token = %s, refresh_token_expires_at = %s', (client_id, grant_type, token, data, expires_at, refresh_token, refresh_token_expires_at, scopes, user_id, token, expires_at, refresh_token, refresh_token_expires_at))
+        with self._cursor() as cur:
+            expires_at = datetime.datetime.fromtimestamp(expires_at)
+            if refresh_expires_at is None:
+                query = cur.mogrify('UPDATE oauth_token SET token = %s, expires_at = %s WHERE client_id=%s', (token, expires_at, client_id))
+            else:
+                refresh_token_expires_at = datetime.datetime.fromtimestamp(refresh_expires_at)
+                query = cur.mogrify('INSERT INTO oauth_token (client_id, grant_type, token, data, expires_at, refresh_token, refresh_token_expires_at, scopes, user_id) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s) ON CONFLICT (client_id) DO UPDATE SET token = %s, expires_at = %s, refresh_token = %s, refresh_token_expires_at = %s', (client_id, grant_type, token, data, expires_at, refresh_token, refresh_token_expires_at, scopes, user_id, token, expires_at, refresh_token, refresh_token_expires_at))
 
-        cur.execute(query)
-        self.conn.commit()
+            cur.execute(query)
 
     def save_client(self, identifier, secret, role, redirect_uris, authorized_grants, authorized_response_types):
         """ save clientinfo to db """
-        cur = self._cursor()
-        query = cur.mogrify('INSERT INTO oauth_client (identifier, secret, role, redirect_uris, authorized_grants, authorized_response_types) VALUES (%s,%s,%s,%s,%s,%s)', (identifier, secret, role, redirect_uris, authorized_grants, authorized_response_types))
-        cur.execute(query)
-        self.conn.commit()
+        with self._cursor() as cur:
+            query = cur.mogrify('INSERT INTO oauth_client (identifier, secret, role, redirect_uris, authorized_grants, authorized_response_types) VALUES (%s,%s,%s,%s,%s,%s)', (identifier, secret, role, redirect_uris, authorized_grants, authorized_response_types))
+            cur.execute(query)
 
     def fetch_by_client_id(self, client_id):
         """ get info from clientid """
-        cur = self._cursor()
-        query = 'SELECT * FROM oauth_client WHERE identifier = %s'
-        cur.execute(query, (client_id,))
+        with self._cursor() as cur:
+            query = 'SELECT * FROM oauth_client WHERE identifier = %s'
+            cur.execute(query, (client_id,))
 
-        return cur.fetchone()
+            return cur.fetchone()
@@ -0,0 +1,309 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Interface to SQLite for Zoe state, for single-node deployments that do not have a PostgreSQL server."""
+
+import contextlib
+import datetime
+import json
+import logging
+import sqlite3
+import threading
+import weakref
+
+from .service import Service
+from .execution import Execution
+from .port import Port
+
+log = logging.getLogger(__name__)
+
+_JSON_COLUMNS = ('description',)
+
+
+class SQLiteStateManager:
+    """
+    Keeps the Zoe state in a SQLite database file, with the same interface as SQLManager.
+
+    The API and the master processes open the same file, so they must run on the same host. The database is created at the
+    first connection. A single connection is shared by all threads of a process.
+    """
+    def __init__(self, conf):
+        self.path = conf.state_sqlite_path
+        self._identity_map = weakref.WeakValueDictionary()
+        self._identity_lock = threading.Lock()
+        self._conn_lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        if self.path != ':memory:':
+            self.conn.execute('PRAGMA journal_mode = WAL')  # readers in one process do not block the writer in the other
+        self._create_tables()
+
+    @contextlib.contextmanager
+    def _cursor(self):
+        """Context manager that yields a cursor and commits the transaction when the block exits without errors."""
+        with self._conn_lock:
+            cur = self.conn.cursor()
+            try:
+                yield cur
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def _create_tables(self):
+        with self._cursor() as cur:
+            cur.execute('''CREATE TABLE IF NOT EXISTS execution (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                description TEXT NOT NULL,
+                status TEXT NOT NULL,
+                execution_manager_id TEXT NULL,
+                time_submit TIMESTAMP NOT NULL,
+                time_start TIMESTAMP NULL,
+                time_end TIMESTAMP NULL,
+                error_message TEXT NULL
+                )''')
+            cur.execute('''CREATE TABLE IF NOT EXISTS service (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                status TEXT NOT NULL,
+                error_message TEXT NULL DEFAULT NULL,
+                description TEXT NOT NULL,
+                execution_id INT REFERENCES execution ON DELETE CASCADE,
+                service_group TEXT NOT NULL,
+                name TEXT NOT NULL,
+                backend_id TEXT NULL DEFAULT NULL,
+                backend_status TEXT NOT NULL DEFAULT 'undefined',
+                ip_address TEXT NULL DEFAULT NULL,
+                essential BOOLEAN NOT NULL DEFAULT 0
+                )''')
+            cur.execute('''CREATE TABLE IF NOT EXISTS port (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                service_id INT REFERENCES service ON DELETE CASCADE,
+                internal_name TEXT NOT NULL,
+                external_ip TEXT NULL,
+                external_port INT NULL,
+                description TEXT NOT NULL
+                )''')
+            cur.execute("CREATE INDEX IF NOT EXISTS execution_status_idx ON execution (status)")
+            cur.execute('CREATE INDEX IF NOT EXISTS execution_user_id_idx ON execution (user_id)')
+            cur.execute('CREATE INDEX IF NOT EXISTS service_execution_id_idx ON service (execution_id, essential)')
+            cur.execute('CREATE INDEX IF NOT EXISTS service_backend_id_idx ON service (backend_id)')
+            cur.execute('CREATE INDEX IF NOT EXISTS port_service_id_idx ON port (service_id)')
+
+    @staticmethod
+    def _row_dict(row):
+        """Convert a sqlite3 row into the dictionary that SQLManager would return."""
+        ret = dict(row)
+        for column in _JSON_COLUMNS:
+            if column in ret and ret[column] is not None:
+                ret[column] = json.loads(ret[column])
+        if 'essential' in ret:
+            ret['essential'] = bool(ret['essential'])
+        return ret
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, dict):
+            return json.dumps(value)
+        return value
+
+    def _from_row(self, cls, row):
+        """Return the object for a row, reusing the instance in the identity map if there is one."""
+        row = self._row_dict(row)
+        key = (cls, row['id'])
+        with self._identity_lock:
+            obj = self._identity_map.get(key)
+            if obj is None:
+                obj = cls(row, self)
+                self._identity_map[key] = obj
+            else:
+                obj._load_row(row)  # pylint: disable=protected-access
+        return obj
+
+    def _cached(self, cls, obj_id):
+        """Return the object with the given ID if it is in the identity map, None otherwise."""
+        with self._identity_lock:
+            return self._identity_map.get((cls, obj_id))
+
+    def _update(self, table, row_id, fields):
+        columns = sorted(fields.keys())
+        with self._cursor() as cur:
+            cur.execute('UPDATE {} SET '.format(table) + ', '.join('{} = ?'.format(column) for column in columns) + ' WHERE id = ?',
+                        [self._value(fields[column]) for column in columns] + [row_id])
+
+    def _select(self, table, cls, only_one, filters):
+        query = 'SELECT * FROM {}'.format(table)
+        if len(filters) > 0:
+            query += ' WHERE ' + ' AND '.join('{} = ?'.format(key) for key in filters.keys())
+        query += ' ORDER BY id'
+        with self._cursor() as cur:
+            cur.execute(query, [self._value(value) for value in filters.values()])
+            rows = cur.fetchall()
+        objects = [self._from_row(cls, row) for row in rows]
+        if only_one:
+            return objects[0] if len(objects) > 0 else None
+        return objects
+
+    def flush(self):
+        """Nothing to write, updates are applied immediately."""
+        pass
+
+    def _load_services(self, executions):
+        """Load the services and ports of a list of executions with two queries and attach them to their parents."""
+        if len(executions) == 0:
+            return
+        exec_ids = [e.id for e in executions]
+        placeholders = ', '.join('?' for _ in exec_ids)
+        with self._cursor() as cur:
+            cur.execute('SELECT * FROM service WHERE execution_id IN ({}) ORDER BY id'.format(placeholders), exec_ids)
+            service_rows = cur.fetchall()
+            cur.execute('SELECT port.* FROM port JOIN service ON port.service_id = service.id WHERE service.execution_id IN ({}) ORDER BY port.id'.format(placeholders), exec_ids)
+            port_rows = cur.fetchall()
+
+        ports_by_service = {}
+        for port in [self._from_row(Port, row) for row in port_rows]:
+            ports_by_service.setdefault(port.service_id, []).append(port)
+        services_by_execution = {}
+        for service in [self._from_row(Service, row) for row in service_rows]:
+            service._ports = ports_by_service.get(service.id, [])  # pylint: disable=protected-access
+            services_by_execution.setdefault(service.execution_id, []).append(service)
+        for execution in executions:
+            execution._services = services_by_execution.get(execution.id, [])  # pylint: disable=protected-access
+
+    @staticmethod
+    def _execution_filters(limit, filters):
+        """Build the WHERE, ORDER BY and LIMIT clauses for an execution query, see SQLManager._execution_filters()."""
+        filter_list = []
+        args_list = []
+        for key, value in filters.items():
+            if key.startswith('earlier_than_') or key.startswith('later_than_'):
+                operator = '<=' if key.startswith('earlier_than_') else '>='
+                filter_list.append('time_{} {} ?'.format(key.split('_')[-1], operator))
+                value = datetime.datetime.fromtimestamp(value)
+            elif key == 'after_id':
+                filter_list.append('id < ?')
+            else:
+                filter_list.append('{} = ?'.format(key))
+            args_list.append(value)
+
+        q = ''
+        if len(filter_list) > 0:
+            q += ' WHERE ' + ' AND '.join(filter_list)
+        if limit > 0 or 'after_id' in filters:
+            q += ' ORDER BY id DESC'
+        else:
+            q += ' ORDER BY id'
+        if limit > 0:
+            q += ' LIMIT {:d}'.format(limit)
+        return q, args_list
+
+    def execution_list(self, only_one=False, limit=-1, load_services=False, **kwargs):
+        """Return a list of executions, see SQLManager.execution_list()."""
+        where, args_list = self._execution_filters(limit, kwargs)
+        with self._cursor() as cur:
+            cur.execute('SELECT * FROM execution' + where, args_list)
+            rows = cur.fetchall()
+        executions = [self._from_row(Execution, row) for row in rows]
+        if load_services:
+            self._load_services(executions)
+        if only_one:
+            return executions[0] if len(executions) > 0 else None
+        return executions
+
+    def execution_summary_list(self, limit=-1, **kwargs):
+        """Return a list of executions without their description, as dictionaries, see SQLManager.execution_summary_list()."""
+        where, args_list = self._execution_filters(limit, kwargs)
+        with self._cursor() as cur:
+            cur.execute('SELECT id, user_id, name, status, time_submit, time_start, time_end, error_message FROM execution' + where, args_list)
+            return [dict(row) for row in cur.fetchall()]
+
+    def execution_update(self, exec_id, **kwargs):
+        """Update the state of an execution."""
+        self._update('execution', exec_id, kwargs)
+
+    def execution_new(self, name, user_id, description):
+        """Create a new execution in the state."""
+        with self._cursor() as cur:
+            cur.execute('INSERT INTO execution (name, user_id, description, status, time_submit) VALUES (?, ?, ?, ?, ?)',
+                        (name, user_id, json.dumps(description), Execution.SUBMIT_STATUS, datetime.datetime.now()))
+            return cur.lastrowid
+
+    def execution_delete(self, execution_id):
+        """Delete an execution and its services from the state."""
+        with self._cursor() as cur:
+            cur.execute('DELETE FROM execution WHERE id = ?', (execution_id,))
+
+    def service_list(self, only_one=False, **kwargs):
+        """Return a list of services, see SQLManager.service_list()."""
+        return self._select('service', Service, only_one, kwargs)
+
+    def service_update(self, service_id, **kwargs):
+        """Update the state of an existing service."""
+        self._update('service', service_id, kwargs)
+
+    def _insert_service(self, cur, execution_id, name, service_group, description, is_essential):
+        cur.execute('INSERT INTO service (status, error_message, execution_id, name, service_group, description, essential) VALUES (?, NULL, ?, ?, ?, ?, ?)',
+                    ('created', execution_id, name, service_group, json.dumps(description), is_essential))
+        return cur.lastrowid
+
+    @staticmethod
+    def _insert_port(cur, service_id, internal_name, description):
+        cur.execute('INSERT INTO port (service_id, internal_name, external_ip, external_port, description) VALUES (?, ?, NULL, NULL, ?)',
+                    (service_id, internal_name, json.dumps(description)))
+        return cur.lastrowid
+
+    def service_new(self, execution_id, name, service_group, description, is_essential):
+        """Adds a new service to the state."""
+        with self._cursor() as cur:
+            service_id = self._insert_service(cur, execution_id, name, service_group, description, is_essential)
+        execution = self._cached(Execution, execution_id)
+        if execution is not None:
+            execution._services = None  # pylint: disable=protected-access
+        return service_id
+
+    def services_new(self, execution_id, services):
+        """Adds many services and their ports to the state, in a single transaction, see SQLManager.services_new()."""
+        service_ids = []
+        with self._cursor() as cur:
+            for service in services:
+                service_id = self._insert_service(cur, execution_id, service['name'], service['service_group'], service['description'], service['essential'])
+                for internal_name, description in service['ports']:
+                    self._insert_port(cur, service_id, internal_name, description)
+                service_ids.append(service_id)
+        execution = self._cached(Execution, execution_id)
+        if execution is not None:
+            execution._services = None  # pylint: disable=protected-access
+        return service_ids
+
+    def port_list(self, only_one=False, **kwargs):
+        """Return a list of ports, see SQLManager.port_list()."""
+        return self._select('port', Port, only_one, kwargs)
+
+    def port_update(self, port_id, **kwargs):
+        """Update the state of an existing port."""
+        self._update('port', port_id, kwargs)
+
+    def port_new(self, service_id, internal_name, description):
+        """Adds a new port to the state."""
+        with self._cursor() as cur:
+            port_id = self._insert_port(cur, service_id, internal_name, description)
+        service = self._cached(Service, service_id)
+        if service is not None:
+            service._ports = None  # pylint: disable=protected-access
+        return port_id
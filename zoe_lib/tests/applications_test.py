@@ -39,3 +39,41 @@ class TestApplicationsMethods:
         bad_fp = open('/dev/random', 'r')
         with pytest.raises(applications.InvalidApplicationDescription):
             applications.app_validate(bad_fp)
+
+    def test_cached_result(self, monkeypatch):
+        """Validating again the same description reuses the first outcome."""
+        zapp = json.load(open('tests/zapp.json', 'r'))
+        applications.app_validate(zapp)
+        monkeypatch.setattr(applications, '_validate', lambda data: pytest.fail('description validated twice'))
+        applications.app_validate(json.load(open('tests/zapp.json', 'r')))
+
+    def test_fails_for_limits(self):
+        """Test the min and max limits are checked also after the monitor service."""
+        zapp = json.load(open('tests/zapp.json', 'r'))
+        zapp['services'].append(dict(zapp['services'][0], name='second', monitor=False))
+        zapp['services'][-1]['resources'] = {'memory': {'min': 2048, 'max': 1024}, 'cores': {'min': None, 'max': None}}
+        with pytest.raises(applications.InvalidApplicationDescription) as excinfo:
+            applications.app_validate(zapp)
+        assert 'min and max memory limits' in excinfo.value.message
+
+    def test_unlimited_max(self):
+        """A max limit set to null means no limit."""
+        zapp = json.load(open('contrib/zoeapps/eurecom_aml_lab.json', 'r'))
+        zapp['services'][0]['resources']['memory'] = {'min': 2048, 'max': None}
+        applications.app_validate(zapp)
+
+    def test_errors_not_cached_as_valid(self, monkeypatch):
+        """Submitting twice the same bad description fails both times, also when the checks fail unexpectedly."""
+        zapp = json.load(open('tests/zapp.json', 'r'))
+        zapp['services'][0]['resources']['memory'] = {'min': 2048, 'max': 1024}
+        for _ in range(2):
+            with pytest.raises(applications.InvalidApplicationDescription):
+                applications.app_validate(zapp)
+
+        def _broken_check(data):
+            raise TypeError('broken check')
+        zapp['name'] = 'unexpected-error'
+        monkeypatch.setattr(applications, '_check_services', _broken_check)
+        for _ in range(2):
+            with pytest.raises(TypeError):
+                applications.app_validate(zapp)
@@ -0,0 +1,163 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the state managers that do not need a database server."""
+
+import argparse
+import json
+import threading
+import time
+
+import psycopg2
+import pytest
+
+from zoe_lib.state import Execution, MemoryStateManager, Service, SQLiteStateManager, SQLManager
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def state(request):
+    """An empty state, for each state manager."""
+    if request.param == 'memory':
+        return MemoryStateManager()
+    return SQLiteStateManager(argparse.Namespace(state_sqlite_path=':memory:'))
+
+
+def _services(description):
+    services = []
+    for service_descr in description['services']:
+        ports = [(str(p['port_number']) + '/' + p['protocol'], p) for p in service_descr['ports']]
+        for counter in range(service_descr['total_count']):
+            services.append({
+                'name': '{}{}'.format(service_descr['name'], counter),
+                'service_group': service_descr['name'],
+                'description': service_descr,
+                'essential': counter < service_descr['essential_count'],
+                'ports': ports
+            })
+    return services
+
+
+@pytest.fixture
+def description():
+    """A ZApp description."""
+    return json.load(open('contrib/zoeapps/eurecom_aml_lab.json', 'r'))
+
+
+def test_executions(state, description):
+    """Executions can be created, filtered, updated and paginated."""
+    ids = [state.execution_new('exec{}'.format(i), 'user{}'.format(i % 2), description) for i in range(5)]
+    execution = state.execution_list(id=ids[0], only_one=True)
+    assert execution.name == 'exec0'
+    assert execution.description == description
+    assert execution.status == Execution.SUBMIT_STATUS
+    assert state.execution_list(id=ids[0], only_one=True) is execution
+
+    execution.set_scheduled()
+    assert [e.id for e in state.execution_list(status=Execution.SCHEDULED_STATUS)] == [ids[0]]
+    assert [e.id for e in state.execution_list(user_id='user1')] == [ids[1], ids[3]]
+    assert [e.id for e in state.execution_list(limit=2)] == [ids[4], ids[3]]
+    assert [e['id'] for e in state.execution_summary_list(limit=2, after_id=ids[3])] == [ids[2], ids[1]]
+    assert state.execution_list(id=-1, only_one=True) is None
+
+    now = time.time()
+    assert len(state.execution_list(earlier_than_submit=now + 10)) == 5
+    assert len(state.execution_list(later_than_submit=now + 10)) == 0
+    assert len(state.execution_list(later_than_start=0)) == 0
+
+
+def test_services_and_ports(state, description):
+    """Services and ports are created together, updated and deleted with their execution."""
+    exec_id = state.execution_new('exec', 'user', description)
+    service_ids = state.services_new(exec_id, _services(description))
+    assert len(service_ids) == 4
+
+    execution = state.execution_list(id=exec_id, only_one=True, load_services=True)
+    assert [s.id for s in execution.services] == service_ids
+    assert [s.name for s in execution.essential_services] == ['spark-master0', 'spark-worker0', 'spark-jupyter0']
+    assert len(state.service_list(execution_id=exec_id, essential=False)) == 1
+
+    service = state.service_list(id=service_ids[0], only_one=True)
+    assert service is execution.services[0]
+    service.set_active('backend-1', '10.0.0.1')
+    assert state.service_list(backend_id='backend-1', only_one=True) is service
+
+    port = service.ports[0]
+    assert port.internal_name == '8080/tcp'
+    port.activate('192.168.0.1', 30000)
+    assert state.port_list(service_id=service.id, only_one=True).external_port == 30000
+
+    state.execution_delete(exec_id)
+    assert state.execution_list(id=exec_id, only_one=True) is None
+    assert state.service_list(execution_id=exec_id) == []
+    assert state.port_list(service_id=service.id) == []
+
+
+def test_running_services(state, description):
+    """Services that were created but not started yet do not count as running."""
+    exec_id = state.execution_new('exec', 'user', description)
+    state.services_new(exec_id, _services(description))
+    execution = state.execution_list(id=exec_id, only_one=True, load_services=True)
+    assert not execution.essential_services_running
+    assert not execution.all_services_running
+    assert execution.running_services_count == 0
+
+    for index, service in enumerate(execution.essential_services):
+        service.set_active('backend-{}'.format(index), '10.0.0.{}'.format(index))
+    assert execution.essential_services_running
+    assert not execution.all_services_running
+    assert execution.running_services_count == 3
+
+    execution.essential_services[0].set_backend_status(Service.BACKEND_DIE_STATUS)
+    assert not execution.essential_services_running
+    assert execution.running_services_count == 2
+
+
+def test_reloaded_service_ports(state, description):
+    """The ports cached by a service are read again when its row is reloaded."""
+    exec_id = state.execution_new('exec', 'user', description)
+    service_id = state.services_new(exec_id, _services(description))[0]
+    service = state.service_list(id=service_id, only_one=True)
+    cached_ports = service.ports
+
+    state.port_new(service_id, '9999/tcp', {'port_number': 9999, 'protocol': 'tcp', 'url_template': None})
+    service._ports = cached_ports  # as if the port had been added by another process
+    assert state.service_list(id=service_id, only_one=True) is service
+    assert len(service.ports) == len(cached_ports) + 1
+    assert service.ports[-1].internal_name == '9999/tcp'
+
+
+class _ClosedConnection:
+    closed = True
+
+
+def test_failed_reconnect_releases_connection(monkeypatch):
+    """A reconnection that fails while the database is down does not leave the shared connection locked."""
+    monkeypatch.setattr(SQLManager, '_connect', lambda self: setattr(self, 'conn', _ClosedConnection()))
+    conf = argparse.Namespace(dbuser='zoe', dbpass='zoe', dbhost='localhost', dbport=5432, dbname='zoe', deployment_name='test',
+                              dbpool_enable=False, dbpool_min=1, dbpool_max=1, dbwrite_behind=False, dbwrite_behind_interval=1, dbwrite_behind_size=1)
+    state = SQLManager(conf)
+
+    def _connect(self):
+        raise psycopg2.OperationalError('database is down')
+    monkeypatch.setattr(SQLManager, '_connect', _connect)
+    with pytest.raises(psycopg2.OperationalError):
+        with state._cursor():
+            pass
+
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(state._conn_lock.acquire(timeout=1)))
+    thread.start()
+    thread.join()
+    assert acquired == [True]
@@ -15,6 +15,8 @@
 
 """The base class that all backends should implement."""
 
+from typing import List
+
 from zoe_lib.state import Service
 from zoe_master.stats import ClusterStats
 from zoe_master.backends.service_instance import ServiceInstance
@@ -22,6 +24,10 @@ from zoe_master.backends.service_instance import ServiceInstance
 
 class BaseBackend:
     """The base class that all backends should implement."""
+
+    group_operations = False
+    """If True, Zoe starts and terminates the services of the same group together with spawn_service_group() and terminate_service_group()."""
+
     def __init__(self, conf):
         pass
 
@@ -42,7 +48,7 @@ class BaseBackend:
 
         * raise ``ZoeStartExecutionRetryException`` in case a temporary error is generated
         * raise ``ZoeStartExecutionFatalException`` in case a fatal error is generated
-        * return a backend-specific ID that will be used later by Zoe to interact with the running container
+        * return a tuple with the backend-specific ID that will be used later by Zoe to interact with the running container and the container IP address. Backends that know the node the container was placed on can add its name as a third element, so that the platform state snapshot can be updated without querying the whole cluster again
         """
         raise NotImplementedError
 
@@ -50,6 +56,21 @@ class BaseBackend:
         """Terminate the container corresponding to a service."""
         raise NotImplementedError
 
+    def service_active(self, service: Service) -> None:
+        """Called once the result of spawn_service() or spawn_service_group() has been recorded in the state with Service.set_active()."""
+        pass
+
+    def spawn_service_group(self, service_instances: List[ServiceInstance]) -> List:
+        """Create the containers for services of the same group with as few backend calls as possible, used only if group_operations is True.
+
+        Exceptions are the same as for spawn_service() and apply to all the services. On success return a list with one spawn_service() result for each service instance.
+        """
+        raise NotImplementedError
+
+    def terminate_service_group(self, services: List[Service]) -> None:
+        """Terminate the containers of services of the same group with as few backend calls as possible, used only if group_operations is True."""
+        raise NotImplementedError
+
     def platform_state(self) -> ClusterStats:
         """Get the platform state. This method should fill-in a new ClusterStats object at each call, with fresh statistics on the available nodes and resource availability. This information will be used for taking scheduling decisions."""
         raise NotImplementedError
@@ -15,13 +15,18 @@
 
 """The high-level interface that Zoe uses to talk to the configured container backend."""
 
+import collections
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import itertools
 import logging
+import threading
 from typing import List
 
 from zoe_lib.config import get_conf
 from zoe_lib.state import Execution, Service
 
 from zoe_master.backends.base import BaseBackend
+from zoe_master.backends import platform_state
 from zoe_master.backends.service_instance import ServiceInstance
 from zoe_master.exceptions import ZoeStartExecutionFatalException, ZoeStartExecutionRetryException, ZoeException
 
@@ -37,8 +42,21 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+_backend = None
+_backend_lock = threading.Lock()
+_backend_pool = None
+
 
 def _get_backend() -> BaseBackend:
+    """Return the backend instance, creating it the first time. The instance and its connections are shared by all callers."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _create_backend()
+        return _backend
+
+
+def _create_backend() -> BaseBackend:
     """Return the right backend instance by reading the global configuration."""
     backend_name = get_conf().backend
     if backend_name == 'Kubernetes':
@@ -54,16 +72,57 @@ def _get_backend() -> BaseBackend:
         assert False
 
 
-def initialize_backend(state):
-    """Initializes the configured backend."""
+def initialize_backend(state, backend: BaseBackend=None):
+    """Initializes the configured backend. If a backend instance is given, it is used instead of the configured one."""
+    global _backend
+    if backend is not None:
+        with _backend_lock:
+            _backend = backend
+        platform_state.reset_platform_state_cache()
     backend = _get_backend()
     backend.init(state)
 
 
 def shutdown_backend():
     """Shuts down the configured backend."""
+    global _backend, _backend_pool
     backend = _get_backend()
     backend.shutdown()
+    platform_state.reset_platform_state_cache()
+    with _backend_lock:
+        _backend = None
+        if _backend_pool is not None:
+            _backend_pool.shutdown(wait=False)
+            _backend_pool = None
+
+
+def _get_backend_pool() -> ThreadPoolExecutor:
+    """Return the thread pool used to create and terminate services in parallel. Its size limits the backend calls in flight."""
+    global _backend_pool
+    with _backend_lock:
+        if _backend_pool is None:
+            _backend_pool = ThreadPoolExecutor(max_workers=get_conf().backend_threads)
+        return _backend_pool
+
+
+def _spawn_service(backend: BaseBackend, execution: Execution, service: Service, env_subst_dict):
+    """Create the container for a service, runs in the backend thread pool."""
+    instance = ServiceInstance(execution, service, env_subst_dict)
+    return [backend.spawn_service(instance)]
+
+
+def _spawn_service_group(backend: BaseBackend, execution: Execution, services: List[Service], env_subst_dicts):
+    """Create the containers for services of the same group with a single backend operation, runs in the backend thread pool."""
+    instances = [ServiceInstance(execution, service, env_subst_dict) for service, env_subst_dict in zip(services, env_subst_dicts)]
+    return backend.spawn_service_group(instances)
+
+
+def _group_by_service_group(services: List[Service]):
+    """Split a list of services by service group, keeping the order of the services in each group."""
+    groups = collections.OrderedDict()
+    for service in services:
+        groups.setdefault(service.service_group, []).append(service)
+    return list(groups.values())
 
 
 def service_list_to_containers(execution: Execution, service_list: List[Service]) -> str:
@@ -79,38 +138,72 @@ def service_list_to_containers(execution: Execution, service_list: List[Service]
         'deployment_name': get_conf().deployment_name,
     }
 
-    for service in ordered_service_list:
+    # Services can refer to any other service of the execution, not only to the ones being started now
+    for service in execution.services:
         env_subst_dict['dns_name#' + service.name] = service.dns_name
 
-    for service in ordered_service_list:
-        env_subst_dict['dns_name#self'] = service.dns_name
-        service.set_starting()
-        instance = ServiceInstance(execution, service, env_subst_dict)
-        try:
-            backend_id, ip_address = backend.spawn_service(instance)
-        except ZoeStartExecutionRetryException as ex:
-            log.warning('Temporary failure starting service {} of execution {}: {}'.format(service.id, execution.id, ex.message))
-            service.set_error(ex.message)
-            execution.set_error_message(ex.message)
-            terminate_execution(execution)
-            execution.set_scheduled()
-            return "requeue"
-        except ZoeStartExecutionFatalException as ex:
-            log.error('Fatal error trying to start service {} of execution {}: {}'.format(service.id, execution.id, ex.message))
-            execution.set_error_message(ex.message)
+    # Services with the same startup_order are created in parallel, a group must be up before the next one is started
+    for startup_order_, group in itertools.groupby(ordered_service_list, key=lambda x: x.startup_order):
+        futures = []
+        group = list(group)
+        env_subst_dicts = []
+        for service in group:
+            service.set_starting()
+            service_env_subst_dict = dict(env_subst_dict)
+            service_env_subst_dict['dns_name#self'] = service.dns_name
+            env_subst_dicts.append(service_env_subst_dict)
+        if backend.group_operations:
+            service_env = dict(zip([s.id for s in group], env_subst_dicts))
+            for services in _group_by_service_group(group):
+                future = _get_backend_pool().submit(_spawn_service_group, backend, execution, services, [service_env[s.id] for s in services])
+                futures.append((services, future))
+        else:
+            for service, service_env_subst_dict in zip(group, env_subst_dicts):
+                futures.append(([service], _get_backend_pool().submit(_spawn_service, backend, execution, service, service_env_subst_dict)))
+
+        retry_failure = None
+        fatal_failure = None
+        for services, future in futures:
+            service_ids = ', '.join(str(s.id) for s in services)
+            try:
+                results = future.result()
+            except ZoeStartExecutionRetryException as ex:
+                log.warning('Temporary failure starting service {} of execution {}: {}'.format(service_ids, execution.id, ex.message))
+                for service in services:
+                    service.set_error(ex.message)
+                if retry_failure is None:
+                    retry_failure = ex.message
+            except ZoeStartExecutionFatalException as ex:
+                log.error('Fatal error trying to start service {} of execution {}: {}'.format(service_ids, execution.id, ex.message))
+                if fatal_failure is None:
+                    fatal_failure = ex.message
+            except Exception as ex:
+                log.error('Fatal error trying to start service {} of execution {}'.format(service_ids, execution.id))
+                log.exception('BUG, this error should have been caught earlier')
+                if fatal_failure is None:
+                    fatal_failure = str(ex)
+            else:
+                for service, result in zip(services, results):
+                    backend_id, ip_address = result[0], result[1]
+                    node_name = result[2] if len(result) > 2 else None
+                    log.debug('Service {} started'.format(service.name))
+                    service.set_active(backend_id, ip_address)
+                    backend.service_active(service)
+                    memory = service.resource_reservation.memory.min or 0
+                    cores = service.resource_reservation.cores.min or 0
+                    _get_platform_state_cache().service_started(backend_id, node_name, memory, cores)
+
+        # All services of the group are either active or failed here, so the clean up will not leave any container behind
+        if fatal_failure is not None:
+            execution.set_error_message(fatal_failure)
             terminate_execution(execution)
             execution.set_error()
             return "fatal"
-        except Exception as ex:
-            log.error('Fatal error trying to start service {} of execution {}'.format(service.id, execution.id))
-            log.exception('BUG, this error should have been caught earlier')
-            execution.set_error_message(str(ex))
+        elif retry_failure is not None:
+            execution.set_error_message(retry_failure)
             terminate_execution(execution)
-            execution.set_error()
-            return "fatal"
-        else:
-            log.debug('Service {} started'.format(instance.name))
-            service.set_active(backend_id, ip_address)
+            execution.set_scheduled()
+            return "requeue"
 
     return "ok"
 
@@ -139,21 +232,61 @@ def start_elastic(execution) -> str:
     return service_list_to_containers(execution, elastic_to_start)
 
 
-def terminate_execution(execution: Execution) -> None:
-    """Terminate an execution."""
+def terminate_execution(execution: Execution, progress_callback=None) -> None:
+    """
+    Terminate an execution, stopping all its services in parallel.
+
+    :param execution: the execution to terminate
+    :param progress_callback: if not None, called with the number of services terminated so far and the total
+    :return: None
+    """
     execution.set_cleaning_up()
     backend = _get_backend()
-    for service in execution.services:
-        assert isinstance(service, Service)
-        if service.backend_id is not None:
-            service.set_terminating()
-            backend.terminate_service(service)
+    services = [s for s in execution.services if s.backend_id is not None]
+    futures = {}
+    for service in services:
+        service.set_terminating()
+    if backend.group_operations:
+        for group in _group_by_service_group(services):
+            futures[_get_backend_pool().submit(backend.terminate_service_group, group)] = group
+    else:
+        for service in services:
+            futures[_get_backend_pool().submit(backend.terminate_service, service)] = [service]
+    cache = _get_platform_state_cache()
+
+    error = None
+    terminated = 0
+    for future in as_completed(futures):
+        group = futures[future]
+        try:
+            future.result()
+        except Exception as ex:
+            log.exception('Error terminating service {} of execution {}'.format(', '.join(str(s.id) for s in group), execution.id))
+            if error is None:
+                error = ex
+            continue
+        for service in group:
+            cache.service_terminated(service.backend_id)
             service.set_inactive()
             log.debug('Service {} terminated'.format(service.name))
+        terminated += len(group)
+        if progress_callback is not None:
+            progress_callback(terminated, len(services))
+
+    if error is not None:
+        raise error  # the execution stays in the cleaning up status and its termination can be retried
     execution.set_terminated()
 
 
+def _get_platform_state_cache() -> platform_state.PlatformStateCache:
+    return platform_state.get_platform_state_cache(_get_backend().platform_state, get_conf().platform_state_max_age)
+
+
 def get_platform_state():
-    """Retrieves the state of the platform by querying the container backend. Platform state includes information on free/reserved resources for each node. This information is used for advanced scheduling."""
-    backend = _get_backend()
-    return backend.platform_state()
+    """
+    Retrieves the state of the platform. Platform state includes information on free/reserved resources for each node. This information is used for advanced scheduling.
+
+    The container backend is queried only when the cached snapshot is older than the platform-state-max-age option or when it
+    received changes that could not be applied incrementally.
+    """
+    return _get_platform_state_cache().get()
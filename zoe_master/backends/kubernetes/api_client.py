@@ -24,10 +24,12 @@ import humanfriendly
 import pykube
 
 from zoe_master.stats import ClusterStats, NodeStats
+from zoe_master.backends.kubernetes import informer
 from zoe_master.backends.service_instance import ServiceInstance
 from zoe_lib.version import ZOE_VERSION
 from zoe_lib.state import VolumeDescription, VolumeDescriptionHostPath
 from zoe_lib.config import get_conf
+from zoe_master.exceptions import ZoeException
 
 log = logging.getLogger(__name__)
 
@@ -37,6 +39,9 @@ ZOE_LABELS = {
     "auto-ingress/enabled" : "enabled"
 }
 
+DNS_SERVICE_ANNOTATION = 'zoe/dns-service'
+
+
 class KubernetesConf:
     """Kubeconfig class"""
     def __init__(self, jsonfile):
@@ -220,6 +225,24 @@ class KubernetesReplicationControllerConf:
         return self.conf
 
 
+class KubernetesDeploymentConf(KubernetesReplicationControllerConf):
+    """ Wrapper for Kubernetes Deployment Configuration """
+    def __init__(self):
+        super().__init__()
+        self.conf['kind'] = 'Deployment'
+        self.conf['apiVersion'] = pykube.Deployment.version
+        self.conf['spec']['selector'] = {'matchLabels': {}}
+
+    def set_spec_selector(self, lbs: dict):
+        """Setter to set specselector"""
+        for key in lbs:
+            self.conf['spec']['selector']['matchLabels'][key] = lbs[key]
+
+    def set_annotations(self, annotations: dict):
+        """Setter to set annotations"""
+        self.conf['metadata'].setdefault('annotations', {}).update(annotations)
+
+
 class KubernetesClient:
     """The Kubernetes client class that wraps the Kubernetes API."""
     def __init__(self, opts: Namespace) -> None:
@@ -228,20 +251,20 @@ class KubernetesClient:
         #except Exception as e:
         #    log.error(e)
 
-    def spawn_replication_controller(self, service_instance: ServiceInstance):
-        """Create and start a new replication controller."""
-        config = KubernetesReplicationControllerConf()
-        config.set_name(service_instance.name)
+    @staticmethod
+    def _fill_workload_conf(config, name, replicas, service_instance: ServiceInstance):
+        """Set the name, labels and container template of a replication controller or deployment configuration."""
+        config.set_name(name)
 
         config.set_labels(ZOE_LABELS)
-        config.set_labels({'service_name': service_instance.name})
-        config.set_replicas(service_instance.replicas_count)
+        config.set_labels({'service_name': name})
+        config.set_replicas(replicas)
 
         config.set_spec_selector(ZOE_LABELS)
-        config.set_spec_selector({'service_name': service_instance.name})
+        config.set_spec_selector({'service_name': name})
 
         config.set_temp_meta_labels(ZOE_LABELS)
-        config.set_temp_meta_labels({'service_name': service_instance.name})
+        config.set_temp_meta_labels({'service_name': name})
 
         config.set_spec_container_image(service_instance.image_name)
         config.set_spec_container_name(service_instance.name)
@@ -261,49 +284,61 @@ class KubernetesClient:
         if len(service_instance.volumes) > 0:
             config.set_spec_container_volumes(service_instance.volumes, service_instance.name)
 
+    def spawn_replication_controller(self, service_instance: ServiceInstance):
+        """Create and start a new replication controller."""
+        config = KubernetesReplicationControllerConf()
+        self._fill_workload_conf(config, service_instance.name, service_instance.replicas_count, service_instance)
+
         info = {}
 
         try:
-            pykube.ReplicationController(self.api, config.get_json()).create()
+            repcon = pykube.ReplicationController(self.api, config.get_json())
+            repcon.create()
             log.info('Created ReplicationController on Kubernetes cluster')
-            info = self.inspect_replication_controller(service_instance.name)
+            info = self.workload_info(repcon.obj)
         except Exception as ex:
             log.error(ex)
 
         return info
 
-    def inspect_replication_controller(self, name):
-        """Get information about a specific replication controller."""
-        try:
-            repcon_list = pykube.ReplicationController.objects(self.api).filter(namespace=get_conf().kube_namespace)
-            rep = repcon_list.get_by_name(name)
-            rc_info = rep.obj
+    @staticmethod
+    def workload_info(rc_info):
+        """Translate a replication controller or deployment object into a simple dictionary."""
+        info = {
+            "backend_id": rc_info['metadata']['uid'],
+            'ip_address': '0.0.0.0'
+        }
 
-            info = {
-                "backend_id": rc_info['metadata']['uid'],
-                'ip_address': '0.0.0.0'
-            }
+        no_replicas = rc_info['spec']['replicas']
 
-            no_replicas = rc_info['spec']['replicas']
+        if 'readyReplicas' in rc_info.get('status', {}):
+            ready_replicas = rc_info['status']['readyReplicas']
+        else:
+            ready_replicas = 0
 
-            if 'readyReplicas' in rc_info['status']:
-                ready_replicas = rc_info['status']['readyReplicas']
-            else:
-                ready_replicas = 0
+        info['replicas'] = no_replicas
+        info['readyReplicas'] = ready_replicas
 
-            info['replicas'] = no_replicas
-            info['readyReplicas'] = ready_replicas
+        if ready_replicas <= 0:
+            info['state'] = 'undefined'
+            info['running'] = False
+        if 0 < ready_replicas <= no_replicas:
+            info['state'] = 'running'
+            info['running'] = True
+        else:
+            info['state'] = 'undefined'
+            info['running'] = True
 
-            if ready_replicas <= 0:
-                info['state'] = 'undefined'
-                info['running'] = False
-            if 0 < ready_replicas <= no_replicas:
-                info['state'] = 'running'
-                info['running'] = True
-            else:
-                info['state'] = 'undefined'
-                info['running'] = True
+        return info
 
+    def inspect_replication_controller(self, name):
+        """Get information about a specific replication controller, from the informer cache if it is running."""
+        cache = informer.replication_controllers()
+        rc_info = cache.get(name) if cache is not None else None
+        try:
+            if rc_info is None:
+                rc_info = pykube.ReplicationController.objects(self.api).filter(namespace=get_conf().kube_namespace).get_by_name(name).obj
+            info = self.workload_info(rc_info)
         except pykube.exceptions.ObjectDoesNotExist:
             return None
         except Exception as ex:
@@ -314,17 +349,113 @@ class KubernetesClient:
 
     def replication_controller_list(self):
         """Get list of replication controller."""
-        repcon_list = pykube.ReplicationController.objects(self.api).filter(namespace=get_conf().kube_namespace, selector=ZOE_LABELS).iterator()
+        cache = informer.replication_controllers()
         rclist = []
         try:
-            for rep in repcon_list:
-                rclist.append(self.inspect_replication_controller(rep.name))
+            if cache is not None:
+                repcon_list = cache.list()
+            else:
+                repcon_list = [rep.obj for rep in pykube.ReplicationController.objects(self.api).filter(namespace=get_conf().kube_namespace, selector=ZOE_LABELS).iterator()]
+            for rc_info in repcon_list:
+                rclist.append(self.workload_info(rc_info))
         except Exception as ex:
             log.error(ex)
         return rclist
 
-    def spawn_service(self, service_instance: ServiceInstance):
-        """Create and start a new Service object."""
+    def spawn_deployment(self, name, replicas, service_instance: ServiceInstance):
+        """
+        Create a deployment running replicas copies of the container described by service_instance.
+
+        A Service object gives the name of service_instance to the pods of the deployment, so that other services can
+        reach them by DNS name.
+        """
+        config = KubernetesDeploymentConf()
+        self._fill_workload_conf(config, name, replicas, service_instance)
+        config.set_annotations({DNS_SERVICE_ANNOTATION: service_instance.name})
+        try:
+            self.spawn_service(service_instance, selector_name=name)
+            deployment = pykube.Deployment(self.api, config.get_json())
+            deployment.create()
+        except Exception as ex:
+            raise ZoeException('Cannot create deployment {}: {}'.format(name, ex))
+        log.info('Created Deployment {} with {} replicas on Kubernetes cluster'.format(name, replicas))
+        return self.workload_info(deployment.obj)
+
+    def scale_deployment(self, name, replicas):
+        """Change the number of replicas of a deployment with a single PATCH request."""
+        deployment = pykube.Deployment(self.api, {'metadata': {'name': name, 'namespace': get_conf().kube_namespace}})
+        response = self.api.patch(**deployment.api_kwargs(
+            headers={"Content-Type": "application/merge-patch+json"},
+            data=json.dumps({'spec': {'replicas': replicas}})
+        ))
+        try:
+            self.api.raise_for_status(response)
+        except Exception as ex:
+            raise ZoeException('Cannot scale deployment {}: {}'.format(name, ex))
+        log.debug('Deployment {} scaled to {} replicas'.format(name, replicas))
+        return self.workload_info(response.json())
+
+    def _deployment(self, name):
+        """Return a deployment object from the informer cache if it is running, otherwise from the API server, None if it does not exist."""
+        cache = informer.deployments()
+        deploy_info = cache.get(name) if cache is not None else None
+        if deploy_info is None:
+            try:
+                deploy_info = pykube.Deployment.objects(self.api).filter(namespace=get_conf().kube_namespace).get_by_name(name).obj
+            except pykube.exceptions.ObjectDoesNotExist:
+                return None
+        return deploy_info
+
+    def inspect_deployment(self, name):
+        """Get information about a specific deployment."""
+        deploy_info = self._deployment(name)
+        if deploy_info is None:
+            return None
+        return self.workload_info(deploy_info)
+
+    def deployment_list(self):
+        """Get list of deployments."""
+        cache = informer.deployments()
+        deploylist = []
+        try:
+            if cache is not None:
+                deployments = cache.list()
+            else:
+                deployments = [dep.obj for dep in pykube.Deployment.objects(self.api).filter(namespace=get_conf().kube_namespace, selector=ZOE_LABELS).iterator()]
+            for deploy_info in deployments:
+                deploylist.append(self.workload_info(deploy_info))
+        except Exception as ex:
+            log.error(ex)
+        return deploylist
+
+    def terminate_deployment(self, name):
+        """Delete a deployment with its replica sets and pods, and the Service object created with it."""
+        del_obj = {
+            'metadata': {
+                'name': name,
+                'namespace': get_conf().kube_namespace
+            }
+        }
+        try:
+            deploy_info = self._deployment(name)
+            if deploy_info is None:
+                return
+            service_name = deploy_info['metadata'].get('annotations', {}).get(DNS_SERVICE_ANNOTATION)
+            if service_name is not None:
+                del_obj['metadata']['name'] = service_name
+                pykube.Service(self.api, del_obj).delete()
+
+            del_obj['metadata']['name'] = name
+            deployment = pykube.Deployment(self.api, del_obj)
+            response = self.api.delete(**deployment.api_kwargs(data=json.dumps({'propagationPolicy': 'Background'})))
+            if response.status_code != 404:
+                self.api.raise_for_status(response)
+        except Exception as ex:
+            raise ZoeException('Cannot delete deployment {}: {}'.format(name, ex))
+        log.info('Deployment {} deleted on Kubernetes cluster'.format(name))
+
+    def spawn_service(self, service_instance: ServiceInstance, selector_name=None):
+        """Create and start a new Service object, selecting the pods of selector_name if given, otherwise the ones of service_instance."""
         config = KubernetesServiceConf()
 
         config.set_name(service_instance.name)
@@ -335,7 +466,7 @@ class KubernetesClient:
             config.set_ports(service_instance.ports)
 
         config.set_selectors(ZOE_LABELS)
-        config.set_selectors({'service_name': service_instance.name})
+        config.set_selectors({'service_name': selector_name if selector_name is not None else service_instance.name})
 
         try:
             pykube.Service(self.api, config.get_json()).create()
@@ -391,17 +522,31 @@ class KubernetesClient:
             pykube.ReplicationController(self.api, del_obj).delete()
 
             del_obj['kind'] = 'Pod'
-            pod_selector = ZOE_LABELS
+            pod_selector = dict(ZOE_LABELS)
             pod_selector['service_name'] = name
-            pods = pykube.Pod.objects(self.api).filter(namespace=get_conf().kube_namespace, selector=pod_selector).iterator()
-            for pod in pods:
-                del_obj['metadata']['name'] = str(pod)
+            for pod_name in self._pod_names(pod_selector):
+                del_obj['metadata']['name'] = pod_name
                 pykube.Pod(self.api, del_obj).delete()
 
             log.info('Service deleted on Kubernetes cluster')
         except Exception as ex:
             log.error(ex)
 
+    def _pod_names(self, selector):
+        """Names of the pods in the Zoe namespace with the given labels."""
+        cache = informer.pods()
+        if cache is not None:
+            return [pod['metadata']['name'] for pod in cache.list(selector) if pod['metadata'].get('namespace') == get_conf().kube_namespace]
+        pods = pykube.Pod.objects(self.api).filter(namespace=get_conf().kube_namespace, selector=selector).iterator()
+        return [str(pod) for pod in pods]
+
+    def _pod_list(self):
+        """All the pods of the cluster, from the informer cache if it is running."""
+        cache = informer.pods()
+        if cache is not None:
+            return cache.list()
+        return [pod.obj for pod in pykube.Pod.objects(self.api).filter(namespace=pykube.all).iterator()]
+
     def info(self) -> ClusterStats:  # pylint: disable=too-many-locals
         """Retrieve Kubernetes cluster statistics."""
         pl_status = ClusterStats()
@@ -418,12 +563,13 @@ class KubernetesClient:
             node_dict[node.name] = nss
 
         # Get information from all running pods, then accumulate to nodes
-        pod_list = pykube.Pod.objects(self.api).filter(namespace=pykube.all).iterator()
-        for pod in pod_list:
-            host_ip = pod.obj['status']['hostIP']
+        for pod in self._pod_list():
+            host_ip = pod['status'].get('hostIP')
+            if host_ip not in node_dict:
+                continue  # not scheduled yet
             nss = node_dict[host_ip]
             nss.container_count += 1
-            spec_cont = pod.obj['spec']['containers'][0]
+            spec_cont = pod['spec']['containers'][0]
             if 'resources' in spec_cont:
                 if 'requests' in spec_cont['resources']:
                     if 'memory' in spec_cont['resources']['requests']:
@@ -15,10 +15,16 @@
 
 """Zoe backend implementation for Kubernetes with docker."""
 
+import contextlib
 import logging
+import threading
+
+import pykube
 
 from zoe_lib.state import Service
-from zoe_master.backends.kubernetes.api_client import KubernetesClient
+from zoe_master.backends.kubernetes import informer
+from zoe_master.backends.kubernetes.api_client import KubernetesClient, ZOE_LABELS
+from zoe_lib.config import get_conf
 from zoe_master.exceptions import ZoeStartExecutionRetryException, ZoeStartExecutionFatalException, ZoeException, ZoeNotEnoughResourcesException
 from zoe_master.backends.service_instance import ServiceInstance
 import zoe_master.backends.base
@@ -37,11 +43,17 @@ class KubernetesBackend(zoe_master.backends.base.BaseBackend):
     def __init__(self, opts):
         super().__init__(opts)
         self.kube = KubernetesClient(opts)
+        self.group_operations = opts.kube_workload == 'Deployment'
+        self._deployment_locks = {}  # deployment name -> [lock, number of threads holding or waiting for it]
+        self._deployment_locks_lock = threading.Lock()
+        self._deployment_replicas = {}  # the informer cache may lag behind the changes made here, so replica counts are tracked locally
 
     @classmethod
     def init(cls, state):
         """Initializes Kubernetes backend starting the event monitoring thread."""
         global _monitor, _checker
+        workload_class = pykube.Deployment if get_conf().kube_workload == 'Deployment' else pykube.ReplicationController
+        informer.start_informers(KubernetesClient(get_conf()).api, get_conf().kube_namespace, ZOE_LABELS, workload_class)
         _monitor = KubernetesMonitor(state)
         _checker = KubernetesStateSynchronizer(state)
 
@@ -50,9 +62,12 @@ class KubernetesBackend(zoe_master.backends.base.BaseBackend):
         """Performs a clean shutdown of the resources used by Swarm backend."""
         _monitor.quit()
         _checker.quit()
+        informer.stop_informers()
 
     def spawn_service(self, service_instance: ServiceInstance):
         """Spawn a service, translating a Zoe Service into a Docker container."""
+        if self.group_operations:
+            return self.spawn_service_group([service_instance])[0]
         try:
             self.kube.spawn_service(service_instance)
             rc_info = self.kube.spawn_replication_controller(service_instance)
@@ -65,7 +80,77 @@ class KubernetesBackend(zoe_master.backends.base.BaseBackend):
 
     def terminate_service(self, service: Service) -> None:
         """Terminate and delete a container."""
-        self.kube.terminate(service.dns_name)
+        if self.group_operations:
+            self.terminate_service_group([service])
+        else:
+            self.kube.terminate(service.dns_name)
+
+    @staticmethod
+    def _deployment_name(service_group, execution_id):
+        return '{}-{}-{}'.format(service_group, execution_id, get_conf().deployment_name)
+
+    @contextlib.contextmanager
+    def _deployment_lock(self, name):
+        """
+        Context manager that serializes the changes to the replicas of a deployment, so that concurrent updates are not lost.
+
+        The lock of a deployment is forgotten when no thread holds it or waits for it. Removing it earlier would let a
+        thread create a new lock for the same name and change the deployment together with the waiting ones.
+        """
+        with self._deployment_locks_lock:
+            entry = self._deployment_locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._deployment_locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._deployment_locks[name]
+
+    def _current_replicas(self, name):
+        """Return the number of replicas of a deployment, or None if it does not exist. Call with the deployment lock held."""
+        if name not in self._deployment_replicas:
+            deploy_info = self.kube.inspect_deployment(name)
+            if deploy_info is None:
+                return None
+            self._deployment_replicas[name] = deploy_info['replicas']
+        return self._deployment_replicas[name]
+
+    def spawn_service_group(self, service_instances):
+        """Add one replica for each service to the deployment of their group, creating it if needed."""
+        first = service_instances[0]
+        name = self._deployment_name(first.service_group, first.execution_id)
+        try:
+            with self._deployment_lock(name):
+                replicas = self._current_replicas(name)
+                if replicas is None:
+                    deploy_info = self.kube.spawn_deployment(name, len(service_instances), first)
+                else:
+                    deploy_info = self.kube.scale_deployment(name, replicas + len(service_instances))
+                self._deployment_replicas[name] = deploy_info['replicas']
+        except ZoeNotEnoughResourcesException:
+            raise ZoeStartExecutionRetryException('Not enough free resources to satisfy reservation request for service group {}'.format(name))
+        except ZoeException as e:
+            raise ZoeStartExecutionFatalException(str(e))
+
+        return [(deploy_info['backend_id'], deploy_info['ip_address']) for _ in service_instances]
+
+    def terminate_service_group(self, services):
+        """Remove one replica for each service from the deployment of their group, deleting it when no replica is left."""
+        name = self._deployment_name(services[0].service_group, services[0].execution_id)
+        with self._deployment_lock(name):
+            replicas = self._current_replicas(name)
+            if replicas is None:
+                return
+            replicas -= len(services)
+            if replicas > 0:
+                self.kube.scale_deployment(name, replicas)
+                self._deployment_replicas[name] = replicas
+                return
+            self.kube.terminate_deployment(name)
+            del self._deployment_replicas[name]
 
     def platform_state(self) -> ClusterStats:
         """Get the platform state."""
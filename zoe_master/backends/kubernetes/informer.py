@@ -0,0 +1,223 @@
+# Copyright (c) 2017, Quang-Nhat Hoang-Xuan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local caches of Kubernetes objects, kept up to date by watching the API server."""
+
+import logging
+import threading
+import time
+
+import pykube
+
+log = logging.getLogger(__name__)
+
+SYNC_TIMEOUT = 30
+
+
+class Informer(threading.Thread):
+    """
+    Keeps a local copy of all the objects of one kind, like the informers of the Kubernetes Go client.
+
+    The objects are listed once, then a watch started from the resourceVersion of the list applies every change to the
+    local copy. When the watch stream ends or breaks it is resumed from the last resourceVersion seen, so no event is lost
+    and nothing is listed again. Only when the API server answers that the resourceVersion is too old the objects are
+    listed again from scratch.
+
+    Objects are stored as the dictionaries returned by the API server and must not be modified by the callers. Handlers
+    registered with add_handler() are called from the informer thread with the event type (ADDED, MODIFIED or DELETED) and
+    the object.
+    """
+    def __init__(self, api: pykube.HTTPClient, object_class, namespace, selector=None) -> None:
+        super().__init__(name='informer-' + object_class.kind.lower(), daemon=True)
+        self.api = api
+        self.object_class = object_class
+        self.namespace = namespace
+        self.selector = selector
+        self.resource_version = None
+        self.stop = False
+        self._objects = {}  # (namespace, name) -> object
+        self._handlers = []
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+
+    def _query(self):
+        query = self.object_class.objects(self.api).filter(namespace=self.namespace)
+        if self.selector is not None:
+            query = query.filter(selector=self.selector)
+        return query
+
+    @staticmethod
+    def _key(obj):
+        return obj['metadata'].get('namespace'), obj['metadata']['name']
+
+    def add_handler(self, handler) -> None:
+        """Register a function called for each change, with the event type and the object as arguments."""
+        with self._lock:
+            self._handlers.append(handler)
+
+    def remove_handler(self, handler) -> None:
+        """Unregister a change handler."""
+        with self._lock:
+            if handler in self._handlers:
+                self._handlers.remove(handler)
+
+    def _dispatch(self, event_type, obj):
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            try:
+                handler(event_type, obj)
+            except Exception:
+                log.exception('Error in {} event handler'.format(self.object_class.kind))
+
+    def is_synced(self) -> bool:
+        """Tell if the objects have been listed at least once."""
+        return self._synced.is_set()
+
+    def wait_synced(self, timeout=SYNC_TIMEOUT) -> bool:
+        """Wait for the first list to complete, return False if the cache is not ready yet."""
+        return self._synced.wait(timeout)
+
+    def get(self, name, namespace=None):
+        """Return an object by name, or None if it does not exist."""
+        with self._lock:
+            return self._objects.get((namespace if namespace is not None else self.namespace, name))
+
+    def list(self, selector=None):
+        """Return all the objects, or only the ones with all the labels in the selector dictionary."""
+        with self._lock:
+            objects = list(self._objects.values())
+        if selector is None:
+            return objects
+        return [obj for obj in objects if _labels_match(obj, selector)]
+
+    def _relist(self):
+        query = self._query()
+        objects = dict((self._key(o.obj), o.obj) for o in query)
+        with self._lock:
+            old_objects = self._objects
+            self._objects = objects
+            self.resource_version = query.response['metadata']['resourceVersion']
+        self._synced.set()
+        log.debug('Listed {} {} objects'.format(len(objects), self.object_class.kind))
+        for key, obj in objects.items():
+            old = old_objects.get(key)
+            if old is None:
+                self._dispatch('ADDED', obj)
+            elif old['metadata']['resourceVersion'] != obj['metadata']['resourceVersion']:
+                self._dispatch('MODIFIED', obj)
+        for key, obj in old_objects.items():
+            if key not in objects:
+                self._dispatch('DELETED', obj)
+
+    def _watch(self):
+        for event in self._query().watch(since=self.resource_version):
+            if self.stop:
+                return
+            obj = event.object.obj
+            if event.type == 'ERROR':
+                if obj.get('code') == 410:
+                    log.debug('{} resourceVersion {} expired, listing again'.format(self.object_class.kind, self.resource_version))
+                    self.resource_version = None
+                    return
+                raise pykube.KubernetesError(obj.get('message', 'watch error'))
+            with self._lock:
+                if event.type == 'DELETED':
+                    self._objects.pop(self._key(obj), None)
+                else:
+                    self._objects[self._key(obj)] = obj
+                self.resource_version = obj['metadata']['resourceVersion']
+            self._dispatch(event.type, obj)
+
+    def run(self):
+        """List the objects, then apply the changes streamed by the API server."""
+        log.info("Informer thread for {} objects started".format(self.object_class.kind))
+        while not self.stop:
+            try:
+                if self.resource_version is None:
+                    self._relist()
+                self._watch()
+            except Exception:
+                log.exception('Error watching {} objects, resuming from resourceVersion {}'.format(self.object_class.kind, self.resource_version))
+                if not self.stop:
+                    time.sleep(1)
+
+    def quit(self):
+        """Stops the thread."""
+        self.stop = True
+
+
+def _labels_match(obj, selector) -> bool:
+    labels = obj['metadata'].get('labels') or {}
+    return all(labels.get(key) == value for key, value in selector.items())
+
+
+# These module-level variables hold the informers shared by the Kubernetes client, monitor and checker
+_workloads = None  # type: Informer
+_pods = None  # type: Informer
+
+
+def start_informers(api: pykube.HTTPClient, namespace, selector, workload_class=pykube.ReplicationController) -> None:
+    """Start the informers for the Zoe replication controllers or deployments in the namespace and for all the pods of the cluster."""
+    global _workloads, _pods
+    _workloads = Informer(api, workload_class, namespace, selector)
+    _pods = Informer(api, pykube.Pod, pykube.all)  # all the pods are needed to compute the reservations on the nodes
+    _workloads.start()
+    _pods.start()
+
+
+def stop_informers() -> None:
+    """Stop the informers, the clients go back to querying the API server."""
+    global _workloads, _pods
+    for informer in (_workloads, _pods):
+        if informer is not None:
+            informer.quit()
+    _workloads = None
+    _pods = None
+
+
+def _synced_workloads(object_class) -> Informer:
+    informer = _workloads
+    if informer is not None and informer.object_class is object_class and informer.is_synced():
+        return informer
+    return None
+
+
+def replication_controllers() -> Informer:
+    """Return the replication controller informer, or None if it is not running or has not listed the objects yet."""
+    return _synced_workloads(pykube.ReplicationController)
+
+
+def deployments() -> Informer:
+    """Return the deployment informer, or None if it is not running or has not listed the objects yet."""
+    return _synced_workloads(pykube.Deployment)
+
+
+def pods() -> Informer:
+    """Return the pod informer, or None if it is not running or has not listed the objects yet."""
+    informer = _pods
+    return informer if informer is not None and informer.is_synced() else None
+
+
+def workload_events(handler) -> None:
+    """Register a handler for the replication controller or deployment events, see Informer.add_handler()."""
+    _workloads.add_handler(handler)
+
+
+def remove_workload_handler(handler) -> None:
+    """Unregister a handler added with workload_events()."""
+    informer = _workloads
+    if informer is not None:
+        informer.remove_handler(handler)
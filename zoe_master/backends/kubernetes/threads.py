@@ -18,74 +18,56 @@
 import logging
 import threading
 import time
-import pykube
 
 from zoe_lib.config import get_conf
 from zoe_lib.state import SQLManager, Service
+from zoe_master.backends import platform_state
+from zoe_master.backends.kubernetes import informer
 from zoe_master.backends.kubernetes.api_client import KubernetesClient
 
 log = logging.getLogger(__name__)
 
 
-class KubernetesMonitor(threading.Thread):
-    """The monitor."""
+class KubernetesMonitor:
+    """Applies the replication controller or deployment events received by the informer to the services in the state."""
 
     def __init__(self, state: SQLManager) -> None:
-        super().__init__()
-        self.setName('monitor')
-        self.stop = False
         self.state = state
-        self.setDaemon(True)
-        self.service_id = {}
-        self.kube = KubernetesClient(get_conf())
-        self.start()
-
-    def run(self):
-        """An infinite loop that listens for events from Kubernetes."""
-        log.info("Monitor thread started")
-        while True:  # pylint: disable=too-many-nested-blocks
-            log.debug("Kubernetes service event stream")
-            try:
-                watch = pykube.ReplicationController.objects(self.kube.api, namespace=get_conf().kube_namespace).watch()
-                for event in watch:
-                    log.debug('%s: %s', event.object.name, event.type)
-                    if event.type != 'DELETED' and event.type != 'ADDED':
-                        rc_info = self.kube.inspect_replication_controller(event.object.name)
-                        if rc_info:
-                            rc_uid = rc_info['backend_id']
-                            service = self.state.service_list(only_one=True, backend_id=rc_uid)
-                            if event.object.name not in self.service_id:
-                                self.service_id[event.object.name] = service.id
-                            if service is not None:
-                                if rc_info['readyReplicas'] == 0:
-                                    log.debug('Number replicas: 0')
-                                    service.set_backend_status(service.BACKEND_UNDEFINED_STATUS)
-                                elif rc_info['readyReplicas'] < rc_info['replicas']:
-                                    logstr = 'Number replicas: ' + str(rc_info['readyReplicas'])
-                                    log.debug(logstr)
-                                    service.set_backend_status(service.BACKEND_CREATE_STATUS)
-                                elif rc_info['readyReplicas'] == rc_info['replicas']:
-                                    if service.backend_status != service.BACKEND_START_STATUS:
-                                        log.debug('Reached desired number of replicas')
-                                        service.set_backend_status(service.BACKEND_START_STATUS)
-                    else:
-                        if event.type != 'ADDED':
-                            if event.object.name in self.service_id:
-                                sid = self.service_id[event.object.name]
-                                self.service_id.pop(event.object.name)
-                                service = self.state.service_list(only_one=True, id=sid)
-                                if service is not None:
-                                    log.info('Destroyed all replicas')
-                                    service.set_backend_status(service.BACKEND_DESTROY_STATUS)
-                    time.sleep(1)
-            except Exception as ex:
-                log.error(ex)
-            log.debug("Kubernetes service event stream ended, start new stream")
-            time.sleep(2)
+        informer.workload_events(self._event_cb)
+
+    def _event_cb(self, event_type, workload_obj):
+        """Called by the informer thread for each replication controller or deployment change."""
+        log.debug('%s: %s', workload_obj['metadata']['name'], event_type)
+        workload_info = KubernetesClient.workload_info(workload_obj)
+        # All the services of a group share the same deployment, while a replication controller belongs to a single service
+        services = sorted(self.state.service_list(backend_id=workload_info['backend_id']), key=lambda s: s.id)
+        if event_type == 'DELETED':
+            platform_state.platform_changed()
+            for service in services:
+                if service.backend_status != service.BACKEND_DESTROY_STATUS:
+                    log.info('Destroyed all replicas')
+                    service.set_backend_status(service.BACKEND_DESTROY_STATUS)
+            return
+        ready = workload_info['readyReplicas']
+        for position, service in enumerate(services):
+            if len(services) > 1:
+                if position < ready:
+                    status = service.BACKEND_START_STATUS
+                else:
+                    status = service.BACKEND_CREATE_STATUS
+            elif ready == 0:
+                status = service.BACKEND_UNDEFINED_STATUS
+            elif ready < workload_info['replicas']:
+                status = service.BACKEND_CREATE_STATUS
+            else:
+                status = service.BACKEND_START_STATUS
+            if service.backend_status != status:
+                log.debug('Service {} has {} of {} replicas ready'.format(service.name, ready, workload_info['replicas']))
+                service.set_backend_status(status)
 
     def quit(self):
-        """Stops the thread."""
-        self.stop = True
+        """Stops receiving events."""
+        informer.remove_workload_handler(self._event_cb)
 
 
 CHECK_INTERVAL = 300
@@ -103,30 +85,31 @@ class KubernetesStateSynchronizer(threading.Thread):
         self.kube = KubernetesClient(get_conf())
         self.start()
 
-    def _find_dead_service(self, repcon_list, service: Service):
-        """Loop through the pods and try to update the service status."""
-        found = False
-        for rep in repcon_list:
-            log.debug("%s - %s", rep['backend_id'], service.backend_id)
-            if rep['backend_id'] == service.backend_id:
-                found = True
-                if rep['running'] is False:
-                    log.info('resetting status of service {}, died with no event'.format(service.name))
-                    service.set_backend_status(service.BACKEND_DIE_STATUS)
-        if not found:
+    @staticmethod
+    def _find_dead_service(repcon_dict, service: Service):
+        """Look up the replication controller of a service and try to update the service status."""
+        rep = repcon_dict.get(service.backend_id)
+        if rep is None:
             service.set_backend_status(service.BACKEND_DESTROY_STATUS)
+        elif rep['running'] is False:
+            log.info('resetting status of service {}, died with no event'.format(service.name))
+            service.set_backend_status(service.BACKEND_DIE_STATUS)
 
     def run(self):
         """The thread loop."""
         log.info("Checker thread started")
         while not self.stop:
             service_list = self.state.service_list()
-            repcon_list = self.kube.replication_controller_list()
+            if get_conf().kube_workload == 'Deployment':
+                workload_list = self.kube.deployment_list()
+            else:
+                workload_list = self.kube.replication_controller_list()
+            repcon_dict = dict((rep['backend_id'], rep) for rep in workload_list)
             for service in service_list:
                 assert isinstance(service, Service)
                 if service.backend_status == service.BACKEND_DESTROY_STATUS or service.backend_status == service.BACKEND_DIE_STATUS:
                     continue
-                self._find_dead_service(repcon_list, service)
+                self._find_dead_service(repcon_dict, service)
 
             time.sleep(CHECK_INTERVAL)
 
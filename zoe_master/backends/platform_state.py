@@ -0,0 +1,170 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Keeps a snapshot of the platform state, so that scheduling passes do not have to list the whole cluster every time."""
+
+import copy
+import logging
+import threading
+import time
+
+from zoe_master.stats import ClusterStats
+
+log = logging.getLogger(__name__)
+
+
+class PlatformStateCache:
+    """
+    A ClusterStats snapshot kept up to date from the changes the master knows about.
+
+    Services started and terminated by the master are applied to the snapshot as they happen, if the backend reported the
+    node the service was placed on. Changes that cannot be attributed to a node, like a service placed by the backend
+    scheduler or a container destroyed behind the back of the master, mark the snapshot as stale. A stale snapshot, or one
+    older than max_age seconds, is read again from the backend at the next request. With a max_age of zero the backend is
+    queried every time.
+    """
+    def __init__(self, refresh_function, max_age: float) -> None:
+        """
+        :param refresh_function: called without arguments to read the platform state from the backend
+        :param max_age: maximum age of the snapshot, in seconds
+        """
+        self.refresh_function = refresh_function
+        self.max_age = max_age
+        self._snapshot = None  # type: ClusterStats
+        self._snapshot_time = 0
+        self._stale = True
+        self._refreshing = False
+        self._reservations = {}  # backend ID -> list of (node name, memory, cores), services of a Kubernetes deployment share its ID
+        self._released = set()  # backend IDs terminated by the master since the last refresh
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _is_ready(self) -> bool:
+        return self._snapshot is not None and not self._stale and time.time() - self._snapshot_time < self.max_age
+
+    def get(self) -> ClusterStats:
+        """Return a copy of the platform state, reading it from the backend only if the snapshot is stale or too old."""
+        with self._lock:
+            if self._is_ready():
+                return copy.deepcopy(self._snapshot)
+        with self._refresh_lock:  # only one thread at a time queries the backend, the others wait and reuse its result
+            with self._lock:
+                if self._is_ready():
+                    return copy.deepcopy(self._snapshot)
+                self._stale = False
+                self._refreshing = True
+            log.debug('Reading the platform state from the backend')
+            refresh_time = time.time()
+            try:
+                snapshot = self.refresh_function()
+            except Exception:
+                with self._lock:
+                    self._stale = True
+                    self._refreshing = False
+                raise
+            with self._lock:
+                # Changes applied while the backend was queried may be missing from the new snapshot, in that case _stale is set again
+                self._refreshing = False
+                self._released.clear()
+                self._snapshot = snapshot
+                self._snapshot_time = refresh_time
+                return copy.deepcopy(self._snapshot)
+
+    def invalidate(self) -> None:
+        """Mark the snapshot as stale, the next get() will read the platform state from the backend."""
+        with self._lock:
+            self._stale = True
+
+    def _find_node(self, node_name):
+        if self._snapshot is None or node_name is None:
+            return None
+        for node in self._snapshot.nodes:
+            if node.name == node_name:
+                return node
+        return None
+
+    def _apply(self, node_name, memory, cores, sign) -> None:
+        node = self._find_node(node_name)
+        if node is None or self._refreshing:
+            self._stale = True
+            return
+        node.container_count += sign
+        node.memory_reserved += sign * memory
+        node.memory_free -= sign * memory
+        node.cores_reserved += sign * cores
+        node.cores_free -= sign * cores
+        self._snapshot.container_count += sign
+
+    def service_started(self, backend_id, node_name, memory, cores) -> None:
+        """Account for a service started by the master on a node, node_name is None if the backend did not report it."""
+        with self._lock:
+            self._reservations.setdefault(backend_id, []).append((node_name, memory, cores))
+            self._apply(node_name, memory, cores, 1)
+
+    def service_terminated(self, backend_id) -> None:
+        """Release the resources of a service that does not exist anymore. Services sharing a backend ID release one reservation each."""
+        with self._lock:
+            reservations = self._reservations.get(backend_id)
+            if reservations is None:
+                self._stale = True  # started before a master restart or already destroyed, the next refresh will account for it
+                return
+            node_name, memory, cores = reservations.pop()
+            if len(reservations) == 0:
+                del self._reservations[backend_id]
+                self._released.add(backend_id)
+            self._apply(node_name, memory, cores, -1)
+
+    def service_destroyed(self, backend_id) -> None:
+        """Called by the backend monitors when a container disappears, for any reason."""
+        with self._lock:
+            if backend_id in self._released:
+                self._released.discard(backend_id)  # terminated by the master, already accounted for
+            else:
+                self._reservations.pop(backend_id, None)
+                self._stale = True
+
+
+_cache = None  # type: PlatformStateCache
+_cache_lock = threading.Lock()
+
+
+def get_platform_state_cache(refresh_function, max_age: float) -> PlatformStateCache:
+    """Return the platform state cache shared by the master, creating it the first time."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PlatformStateCache(refresh_function, max_age)
+        return _cache
+
+
+def reset_platform_state_cache() -> None:
+    """Drop the platform state cache, a new one is created by the next get_platform_state_cache() call."""
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def service_destroyed(backend_id) -> None:
+    """Called by the backend monitors when a container disappears."""
+    cache = _cache
+    if cache is not None:
+        cache.service_destroyed(backend_id)
+
+
+def platform_changed() -> None:
+    """Called by the backend monitors when the platform changed in a way that cannot be tied to a single container."""
+    cache = _cache
+    if cache is not None:
+        cache.invalidate()
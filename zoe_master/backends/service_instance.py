@@ -29,6 +29,8 @@ class ServiceInstance:
     def __init__(self, execution: Execution, service: Service, env_subst_dict):
         self.name = service.unique_name
         self.hostname = service.dns_name
+        self.service_group = service.service_group
+        self.execution_id = execution.id
 
         if service.resource_reservation.memory.min is None:
             self.memory_limit = None
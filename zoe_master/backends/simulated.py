@@ -0,0 +1,130 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A backend that does not run any container, used by the scheduler simulator."""
+
+import itertools
+import logging
+import threading
+
+from zoe_lib.state import Service
+from zoe_master.backends.base import BaseBackend
+from zoe_master.backends.service_instance import ServiceInstance
+from zoe_master.exceptions import ZoeStartExecutionRetryException
+from zoe_master.stats import ClusterStats, NodeStats
+
+log = logging.getLogger(__name__)
+
+
+class _SimulatedNode:
+    """A node of the simulated cluster and the services it hosts."""
+    def __init__(self, name, memory, cores):
+        self.name = name
+        self.memory_total = memory
+        self.cores_total = cores
+        self.containers = {}  # backend ID -> (memory, cores)
+
+    @property
+    def memory_reserved(self):
+        """Memory reserved by the containers on this node."""
+        return sum(memory for memory, cores_ in self.containers.values())
+
+    @property
+    def cores_reserved(self):
+        """Cores reserved by the containers on this node."""
+        return sum(cores for memory_, cores in self.containers.values())
+
+    def fits(self, memory, cores):
+        """Tell if a container with these reservations can be started on this node."""
+        return self.memory_reserved + memory <= self.memory_total and self.cores_reserved + cores <= self.cores_total
+
+
+class SimulatedBackend(BaseBackend):
+    """
+    A backend that keeps track of the resources reserved on a fixed set of nodes, without running anything.
+
+    Each service is placed on the node with fewer containers among the ones that have enough free memory and cores, like
+    Swarm does. When no node fits, the service cannot be started and the scheduler is asked to retry later.
+    """
+    def __init__(self, conf, nodes):
+        """
+        :param conf: the Zoe configuration
+        :param nodes: a list of (name, memory in bytes, cores) tuples
+        """
+        super().__init__(conf)
+        self.nodes = [_SimulatedNode(name, memory, cores) for name, memory, cores in nodes]
+        self._placements = {}  # backend ID -> node
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def init(self, state):
+        """Nothing to initialize."""
+        pass
+
+    def shutdown(self):
+        """Nothing to shut down."""
+        pass
+
+    @staticmethod
+    def _reservations(service_instance: ServiceInstance):
+        memory = 0 if service_instance.memory_limit is None else service_instance.memory_limit.min
+        cores = 0 if service_instance.core_limit is None else service_instance.core_limit.min
+        return memory, cores
+
+    def spawn_service(self, service_instance: ServiceInstance):
+        """Reserve the resources for a service on the least loaded node that can host it."""
+        memory, cores = self._reservations(service_instance)
+        with self._lock:
+            candidates = [node for node in self.nodes if node.fits(memory, cores)]
+            if len(candidates) == 0:
+                raise ZoeStartExecutionRetryException('Not enough free resources to start service {}'.format(service_instance.name))
+            node = min(candidates, key=lambda n: len(n.containers))
+            backend_id = 'simulated-{}'.format(next(self._ids))
+            node.containers[backend_id] = (memory, cores)
+            self._placements[backend_id] = node
+        log.debug('Service {} placed on node {}'.format(service_instance.name, node.name))
+        return backend_id, None, node.name
+
+    def terminate_service(self, service: Service) -> None:
+        """Release the resources reserved by a service."""
+        with self._lock:
+            node = self._placements.pop(service.backend_id, None)
+            if node is not None:
+                del node.containers[service.backend_id]
+
+    def platform_state(self) -> ClusterStats:
+        """Get the platform state."""
+        platform_stats = ClusterStats()
+        with self._lock:
+            for node in self.nodes:
+                node_stats = NodeStats(node.name)
+                node_stats.container_count = len(node.containers)
+                node_stats.memory_total = node.memory_total
+                node_stats.memory_reserved = node.memory_reserved
+                node_stats.memory_free = node.memory_total - node_stats.memory_reserved
+                node_stats.cores_total = node.cores_total
+                node_stats.cores_reserved = node.cores_reserved
+                node_stats.cores_free = node.cores_total - node_stats.cores_reserved
+                node_stats.status = 'online'
+                platform_stats.nodes.append(node_stats)
+                platform_stats.container_count += node_stats.container_count
+                platform_stats.memory_total += node.memory_total
+                platform_stats.cores_total += node.cores_total
+        return platform_stats
+
+    def reserved(self):
+        """Return the memory and cores reserved on the whole cluster."""
+        with self._lock:
+            return sum(node.memory_reserved for node in self.nodes), sum(node.cores_reserved for node in self.nodes)
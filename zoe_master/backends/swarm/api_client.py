@@ -15,8 +15,10 @@
 
 """Interface to the low-level Docker API."""
 
-import time
+import functools
 import logging
+import threading
+import time
 from typing import Iterable, Callable, Dict, Any
 
 import humanfriendly
@@ -47,9 +49,7 @@ from zoe_master.exceptions import ZoeException, ZoeNotEnoughResourcesException
 
 log = logging.getLogger(__name__)
 
-try:
-    docker.DockerClient()
-except AttributeError:
+if not hasattr(docker, 'DockerClient'):
     log.error('Docker package does not have the DockerClient attribute')
     raise ImportError('Wrong Docker library version')
 
@@ -82,30 +82,118 @@ def consul_swarm(consul_ip: str) -> str:
     return master.decode('utf-8')
 
 
-class SwarmClient:
-    """The Swarm client class that wraps the Docker API."""
-    def __init__(self) -> None:
+# The address of the Swarm manager is looked up once and shared by all SwarmClient instances. The lock is reentrant because
+# kazoo calls the leader watch for the first time from swarm_manager_address(), with the lock held.
+_manager_lock = threading.RLock()
+_manager_address = None
+_zk_client = None
+
+
+def _zookeeper_watch_leader(zk_server_list: str, path='/docker') -> None:
+    """Keep _manager_address up to date with the Swarm leader registered in Zookeeper."""
+    global _zk_client
+    _zk_client = KazooClient(hosts=zk_server_list)
+    _zk_client.start()
+
+    def _leader_changed(data, stat_):
+        """Called by kazoo with the current leader and then each time it changes."""
+        global _manager_address
+        if data is not None:
+            address = data.decode('utf-8')
+            with _manager_lock:
+                _manager_address = address
+            log.info('Swarm leader is {}'.format(address))
+        return _zk_client is not None
+
+    _zk_client.DataWatch(path + '/docker/swarm/leader', _leader_changed)
+
+
+def swarm_manager_address(refresh=False) -> str:
+    """
+    Return the connection string of the Swarm manager, looking it up with Zookeeper or Consul only the first time.
+
+    :param refresh: look up the address again, for example after a connection error
+    :return: Swarm master connection string
+    """
+    global _manager_address, _zk_client
+    with _manager_lock:
+        if _manager_address is not None and not refresh:
+            return _manager_address
         url = get_conf().backend_swarm_url
-        tls = False
         if 'zk://' in url:
             if KazooClient is None:
                 raise ZoeException('ZooKeeper URL for Swarm, but the kazoo package is not installed')
-            url = url[len('zk://'):]
-            manager = zookeeper_swarm(url, get_conf().backend_swarm_zk_path)
+            if _zk_client is None:
+                _zookeeper_watch_leader(url[len('zk://'):], get_conf().backend_swarm_zk_path)
+            else:
+                master, stat_ = _zk_client.get(get_conf().backend_swarm_zk_path + '/docker/swarm/leader')
+                _manager_address = master.decode('utf-8')
         elif 'consul://' in url:
             if Consul is None:
                 raise ZoeException('Consul URL for Swarm, but the consul package is not installed')
-            url = url[len('consul://'):]
-            manager = consul_swarm(url)
-        elif 'http://' in url:
-            manager = url
-        elif 'https://' in url:
-            tls = docker.tls.TLSConfig(client_cert=(get_conf().backend_swarm_tls_cert, get_conf().backend_swarm_tls_key), verify=get_conf().backend_swarm_tls_ca)
-            manager = url
+            _manager_address = consul_swarm(url[len('consul://'):])
+        elif 'http://' in url or 'https://' in url:
+            _manager_address = url
         else:
             raise ZoeException('Unsupported URL scheme for Swarm')
-        self.cli = docker.DockerClient(base_url=manager, version="auto", tls=tls)
+        return _manager_address
+
+
+def swarm_manager_watch_stop() -> None:
+    """Stop watching Zookeeper for Swarm leader changes."""
+    global _zk_client
+    with _manager_lock:
+        if _zk_client is not None:
+            zk_client = _zk_client
+            _zk_client = None
+            zk_client.stop()
+
 
+def _reconnect_on_failure(func):
+    """Decorator for SwarmClient methods: on a connection error look up the Swarm manager again and retry once."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        """Wrapper."""
+        try:
+            return func(self, *args, **kwargs)
+        except requests.exceptions.ConnectionError:
+            log.warning('Connection to Swarm failed, reconnecting')
+        try:
+            self.reconnect()
+            return func(self, *args, **kwargs)
+        except requests.exceptions.ConnectionError as e:
+            raise ZoeException(str(e))
+    return wrapper
+
+
+class SwarmClient:
+    """The Swarm client class that wraps the Docker API. Instances are long-lived and keep their HTTP connections open."""
+    def __init__(self) -> None:
+        self.cli = None
+        self._cli_lock = threading.Lock()
+        self._connect()
+
+    def _connect(self, refresh=False) -> None:
+        """Create the Docker client."""
+        url = get_conf().backend_swarm_url
+        tls = False
+        if 'https://' in url:
+            tls = docker.tls.TLSConfig(client_cert=(get_conf().backend_swarm_tls_cert, get_conf().backend_swarm_tls_key), verify=get_conf().backend_swarm_tls_ca)
+        manager = swarm_manager_address(refresh)
+        cli = docker.DockerClient(base_url=manager, version="auto", tls=tls)
+        with self._cli_lock:
+            self.cli = cli
+
+    def reconnect(self) -> None:
+        """
+        Look up the Swarm manager again and open a new connection.
+
+        The old Docker client is not closed: other threads sharing this SwarmClient may still be in the middle of a call
+        with it. Its connections are released when the last of these calls returns and the client is garbage collected.
+        """
+        self._connect(refresh=True)
+
+    @_reconnect_on_failure
     def info(self) -> ClusterStats:
         """Retrieve Swarm statistics. The Docker API returns a mess difficult to parse."""
         info = self.cli.info()
@@ -207,6 +295,8 @@ class SwarmClient:
         except Exception as e:
             if cont is not None:
                 cont.remove(force=True)
+            if isinstance(e, requests.exceptions.ConnectionError):
+                self.reconnect()
             raise ZoeException(str(e))
 
         cont = self.cli.containers.get(cont.id)
@@ -221,7 +311,7 @@ class SwarmClient:
             'labels': container.attrs['Config']['Labels']
         }  # type: Dict[str, Any]
         try:
-            info['host'] = container.attrs['Node']['Name'],
+            info['host'] = container.attrs['Node']['Name']
         except KeyError:
             info['host'] = 'N/A'
 
@@ -262,14 +352,16 @@ class SwarmClient:
 
         return info
 
+    @_reconnect_on_failure
     def inspect_container(self, docker_id: str) -> Dict[str, Any]:
         """Retrieve information about a running container."""
         try:
-            cont = self.cli.container.get(docker_id)
+            cont = self.cli.containers.get(docker_id)
         except Exception as e:
             raise ZoeException(str(e))
         return self._container_summary(cont)
 
+    @_reconnect_on_failure
     def terminate_container(self, docker_id: str, delete=False) -> None:
         """
         Terminate a container.
@@ -289,15 +381,20 @@ class SwarmClient:
         if delete:
             cont.remove(force=True)
 
-    def event_listener(self, callback: Callable[[str], bool]) -> None:
-        """An infinite loop that listens for events from Swarm."""
-        event_gen = self.cli.events(decode=True)
+    def event_listener(self, callback: Callable[[Dict[str, Any]], bool], filters=None) -> None:
+        """
+        An infinite loop that listens for events from Swarm.
+
+        :param callback: called for each event, the loop stops when it returns False
+        :param filters: only receive the events matching these filters, see the Docker events API
+        """
+        event_gen = self.cli.events(decode=True, filters=filters)
         while True:
             try:
                 event = next(event_gen)
             except requests.exceptions.RequestException:
                 log.warning('Docker closed event connection, retrying...')
-                event_gen = self.cli.events(decode=True)
+                event_gen = self.cli.events(decode=True, filters=filters)
                 continue
 
             try:
@@ -309,6 +406,7 @@ class SwarmClient:
             if not res:
                 break
 
+    @_reconnect_on_failure
     def list(self, only_label=None) -> Iterable[dict]:
         """
         List running or defined containers.
@@ -316,25 +414,16 @@ class SwarmClient:
         :param only_label: filter containers with only a certain label
         :return: a list of containers
         """
+        filters = {}
+        if only_label is not None:
+            filters['label'] = ['{}={}'.format(key, value) for key, value in only_label.items()]
         try:
-            ret = self.cli.containers.list(all=True)
+            ret = self.cli.containers.list(all=True, filters=filters)
         except docker.errors.APIError as ex:
             raise ZoeException(str(ex))
-        conts = []
-        for cont_info in ret:
-            match = True
-            for key, value in only_label.items():
-                if key not in cont_info.attrs['Config']['Labels']:
-                    match = False
-                    break
-                if cont_info.attrs['Config']['Labels'][key] != value:
-                    match = False
-                    break
-            if match:
-                conts.append(self._container_summary(cont_info))
-
-        return conts
+        return [self._container_summary(cont_info) for cont_info in ret]
 
+    @_reconnect_on_failure
     def logs(self, docker_id: str, stream: bool, follow=None):
         """
         Retrieves the logs of the selected container.
@@ -19,16 +19,17 @@ import logging
 
 from zoe_lib.state import Service
 from zoe_lib.config import get_conf
-from zoe_master.backends.swarm.api_client import SwarmClient
+from zoe_master.backends.swarm.api_client import SwarmClient, swarm_manager_watch_stop
 from zoe_master.exceptions import ZoeStartExecutionRetryException, ZoeStartExecutionFatalException, ZoeException, ZoeNotEnoughResourcesException
 import zoe_master.backends.base
 from zoe_master.backends.service_instance import ServiceInstance
-from zoe_master.backends.swarm.threads import SwarmStateSynchronizer
+from zoe_master.backends.swarm.threads import SwarmStateSynchronizer, SwarmMonitor
 from zoe_master.stats import NodeStats, ClusterStats  # pylint: disable=unused-import
 
 log = logging.getLogger(__name__)
 
 # These two module-level variables hold the references to the monitor and checker threads
+_monitor = None
 _checker = None
 
 
@@ -41,13 +42,16 @@ class SwarmBackend(zoe_master.backends.base.BaseBackend):
     @classmethod
     def init(cls, state):
         """Initializes Swarm backend starting the event monitoring thread."""
-        global _checker
+        global _monitor, _checker
+        _monitor = SwarmMonitor(state)
         _checker = SwarmStateSynchronizer(state)
 
     @classmethod
     def shutdown(cls):
         """Performs a clean shutdown of the resources used by Swarm backend."""
+        _monitor.quit()
         _checker.quit()
+        swarm_manager_watch_stop()
 
     def spawn_service(self, service_instance: ServiceInstance):
         """Spawn a service, translating a Zoe Service into a Docker container."""
@@ -58,7 +62,13 @@ class SwarmBackend(zoe_master.backends.base.BaseBackend):
         except ZoeException as e:
             raise ZoeStartExecutionFatalException(str(e))
 
-        return cont_info["id"], cont_info['ip_address'][get_conf().overlay_network_name]
+        node_name = cont_info['host'] if cont_info['host'] != 'N/A' else None
+        return cont_info["id"], cont_info['ip_address'][get_conf().overlay_network_name], node_name
+
+    def service_active(self, service: Service) -> None:
+        """Apply the container events received before the backend ID of the service was recorded."""
+        if _monitor is not None:
+            _monitor.service_registered(service)
 
     def terminate_service(self, service: Service) -> None:
         """Terminate and delete a container."""
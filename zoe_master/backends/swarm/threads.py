@@ -15,74 +15,189 @@
 
 """Monitor for the Swarm event stream."""
 
+import collections
 import logging
 import threading
 import time
 
 from zoe_lib.config import get_conf
 from zoe_lib.state import SQLManager, Service
+from zoe_master.backends import platform_state
 from zoe_master.backends.swarm.api_client import SwarmClient
 from zoe_master.exceptions import ZoeException
 
 log = logging.getLogger(__name__)
 
-CHECK_INTERVAL = 10
+CHECK_INTERVAL = 300
+EARLY_EVENTS_MAX_AGE = 60  # seconds the events of containers not yet recorded in the state are kept
 
 
-class SwarmStateSynchronizer(threading.Thread):
-    """The Swarm Checker."""
+def _update_service_status(service: Service, container):
+    """Update the service status and ports from a container description, writing only the fields that changed."""
+    if service.backend_status != container['state']:
+        old_status = service.backend_status
+        service.set_backend_status(container['state'])
+        log.debug('Updated service status, {} from {} to {}'.format(service.name, old_status, container['state']))
+    for port in service.ports:
+        if port.internal_name in container['ports'] and container['ports'][port.internal_name] is not None:
+            ext_ip, ext_port = container['ports'][port.internal_name]
+            if port.external_ip != ext_ip or port.external_port != ext_port:
+                port.activate(ext_ip, ext_port)
+        elif port.external_ip is not None or port.external_port is not None:
+            port.reset()
+
+
+class SwarmMonitor(threading.Thread):
+    """
+    Applies the container events emitted by Swarm to the services in the state.
+
+    Docker sends the create and start events of a container while spawn_service() is still waiting for it, before the backend ID
+    is recorded in the state. These events are kept for a while and applied by service_registered().
+    """
 
     def __init__(self, state: SQLManager) -> None:
         super().__init__()
-        self.setName('checker')
+        self.setName('monitor')
         self.stop = False
         self.state = state
+        self.swarm = None
+        self._early_events = collections.OrderedDict()  # backend ID -> (time of the first event, list of actions)
+        self._events_lock = threading.Lock()
         self.setDaemon(True)
 
         self.start()
 
-    def _update_service_status(self, service: Service, container):
-        """Update the service status."""
-        if service.backend_status != container['state']:
-            old_status = service.backend_status
-            service.set_backend_status(container['state'])
-            log.debug('Updated service status, {} from {} to {}'.format(service.name, old_status, container['state']))
-        for port in service.ports:
-            if port.internal_name in container['ports'] and container['ports'][port.internal_name] is not None:
-                port.activate(container['ports'][port.internal_name][0], container['ports'][port.internal_name][1])
+    def run(self):
+        """The thread loop."""
+        log.info("Monitor thread started")
+        filters = {
+            'type': 'container',
+            'label': 'zoe_deployment_name={}'.format(get_conf().deployment_name)
+        }
+        while not self.stop:
+            try:
+                if self.swarm is None:
+                    self.swarm = SwarmClient()
+                else:
+                    self.swarm.reconnect()
+                self.swarm.event_listener(self._event_cb, filters)
+            except Exception:
+                log.exception('Error reading the Swarm event stream, reconnecting')
+                if not self.stop:
+                    time.sleep(1)
+
+    def _event_cb(self, event) -> bool:
+        """Called for each event, returns False to stop listening."""
+        if self.stop:
+            return False
+        action = event.get('Action', event.get('status', ''))
+        backend_id = event.get('Actor', {}).get('ID', event.get('id'))
+        if backend_id is None:
+            return True
+
+        # The lookup and the queueing happen under the lock, so that service_registered() cannot miss an event
+        with self._events_lock:
+            service = self.state.service_list(backend_id=backend_id, only_one=True)
+            if service is None:
+                self._keep_early_event(backend_id, action)
             else:
-                port.reset()
+                self._apply_event(service, backend_id, action)
+        return True
+
+    def _keep_early_event(self, backend_id, action):
+        """Queue an event for a container that is not in the state yet, dropping the ones nobody claimed in time."""
+        now = time.time()
+        while len(self._early_events) > 0 and next(iter(self._early_events.values()))[0] < now - EARLY_EVENTS_MAX_AGE:
+            self._early_events.popitem(last=False)
+        self._early_events.setdefault(backend_id, (now, []))[1].append(action)
+
+    def service_registered(self, service: Service):
+        """Apply the events received for the container of a service before its backend ID was recorded in the state."""
+        with self._events_lock:
+            entry = self._early_events.pop(service.backend_id, None)
+            if entry is None:
+                return
+            for action in entry[1]:
+                self._apply_event(service, service.backend_id, action)
+
+    def _apply_event(self, service: Service, backend_id, action):
+        """Update a service according to an event of its container."""
+        if action == 'create':
+            if service.backend_status != Service.BACKEND_CREATE_STATUS:
+                service.set_backend_status(Service.BACKEND_CREATE_STATUS)
+        elif action == 'start' or action == 'unpause':
+            try:
+                container = self.swarm.inspect_container(backend_id)
+            except ZoeException:
+                return  # Already gone, a die or destroy event will follow
+            _update_service_status(service, container)
+        elif action == 'die' or action == 'pause':
+            if not service.is_dead():
+                service.set_backend_status(Service.BACKEND_DIE_STATUS)
+        elif action == 'oom':
+            service.set_backend_status(Service.BACKEND_OOM_STATUS)
+        elif action == 'destroy':
+            platform_state.service_destroyed(backend_id)
+            if service.backend_status != Service.BACKEND_DESTROY_STATUS:
+                service.set_backend_status(Service.BACKEND_DESTROY_STATUS)
+            for port in service.ports:
+                if port.external_ip is not None or port.external_port is not None:
+                    port.reset()
+
+    def quit(self):
+        """Stops the thread."""
+        self.stop = True
+
+
+class SwarmStateSynchronizer(threading.Thread):
+    """
+    The Swarm Checker.
+
+    Container state changes are applied as they happen by the SwarmMonitor. This thread periodically compares the whole state
+    with the containers in Swarm, to recover from events lost while the event stream was disconnected.
+    """
+
+    def __init__(self, state: SQLManager) -> None:
+        super().__init__()
+        self.setName('checker')
+        self.stop = False
+        self.state = state
+        self.stop_event = threading.Event()
+        self.setDaemon(True)
+
+        self.start()
 
     def run(self):
         """The thread loop."""
         log.info("Checker thread started")
+        swarm = None
         while not self.stop:
-            swarm = SwarmClient()
-            service_list = self.state.service_list()
             try:
+                if swarm is None:
+                    swarm = SwarmClient()
                 container_list = swarm.list(only_label={'zoe_deployment_name': get_conf().deployment_name})
-            except ZoeException:
+            except Exception:
+                log.exception('Cannot list the Swarm containers')
+                self.stop_event.wait(CHECK_INTERVAL)
                 continue
             containers = {}
             for cont in container_list:
                 containers[cont['id']] = cont
 
-            services = {}
-            for serv in service_list:
-                services[serv.backend_id] = serv
-
-            for service in service_list:
+            for service in self.state.service_list():
                 assert isinstance(service, Service)
                 if service.backend_id in containers:
-                    self._update_service_status(service, containers[service.backend_id])
+                    _update_service_status(service, containers[service.backend_id])
                 else:
                     if service.backend_status == service.BACKEND_DESTROY_STATUS:
                         continue
                     else:
+                        platform_state.service_destroyed(service.backend_id)
                         service.set_backend_status(service.BACKEND_DESTROY_STATUS)
 
-            time.sleep(CHECK_INTERVAL)
+            self.stop_event.wait(CHECK_INTERVAL)
 
     def quit(self):
         """Stops the thread."""
         self.stop = True
+        self.stop_event.set()
@@ -23,13 +23,14 @@ import os
 import zoe_lib.config as config
 from zoe_lib.metrics.influxdb import InfluxDBMetricSender
 from zoe_lib.metrics.logging import LogMetricSender
-from zoe_lib.state import SQLManager
+from zoe_lib.state import SQLiteStateManager
 
 import zoe_master.scheduler
 import zoe_master.backends.interface
 from zoe_master.preprocessing import restart_resubmit_scheduler
 from zoe_master.master_api import APIManager
 from zoe_master.exceptions import ZoeException
+from zoe_master.state_cache import CachedSQLManager
 
 log = logging.getLogger("main")
 LOG_FORMAT = '%(asctime)-15s %(levelname)s %(threadName)s->%(name)s: %(message)s'
@@ -67,7 +68,10 @@ def main():
         metrics = LogMetricSender(config.get_conf().deployment_name)
 
     log.info("Initializing DB manager")
-    state = SQLManager(args)
+    if args.state_backend == 'sqlite':
+        state = SQLiteStateManager(args)
+    else:
+        state = CachedSQLManager(args)
 
     try:
         zoe_master.backends.interface.initialize_backend(state)
@@ -76,7 +80,7 @@ def main():
         return 1
 
     log.info("Initializing scheduler")
-    scheduler = getattr(zoe_master.scheduler, config.get_conf().scheduler_class)(state, config.get_conf().scheduler_policy)
+    scheduler = getattr(zoe_master.scheduler, config.get_conf().scheduler_class)(state, config.get_conf().scheduler_policy, metrics=metrics)
 
     restart_resubmit_scheduler(state, scheduler)
 
@@ -94,3 +98,4 @@ def main():
         api_server.quit()
         zoe_master.backends.interface.shutdown_backend()
         metrics.quit()
+        state.flush()
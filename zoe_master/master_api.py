@@ -15,7 +15,10 @@
 
 """Master side of the ZeroMQ based API."""
 
+from concurrent.futures import ThreadPoolExecutor
+import json
 import logging
+import threading
 import time
 
 import zmq
@@ -32,74 +35,116 @@ log = logging.getLogger(__name__)
 
 
 class APIManager:
-    """The API Manager."""
+    """
+    The API Manager.
+
+    Requests are received on a ROUTER socket, so that many clients can have requests in flight at the same time. Each
+    request can carry a request_id, that is copied in the reply to let DEALER clients match replies with requests. Plain
+    REQ clients are served as well.
+
+    Commands are acknowledged as soon as they are validated, the slow part (expanding the services of a new execution,
+    handing executions to the scheduler) runs in a pool of threads while the loop reads the next request. The work for
+    the same execution is done in the order the commands were received.
+    """
     def __init__(self, metrics: BaseMetricSender, scheduler: ZoeBaseScheduler, state: SQLManager) -> None:
         self.context = zmq.Context()
-        self.zmq_s = self.context.socket(zmq.REP)
+        self.zmq_s = self.context.socket(zmq.ROUTER)
         self.listen_uri = config.get_conf().api_listen_uri
         self.zmq_s.bind(self.listen_uri)
         self.debug_has_replied = False
         self.metrics = metrics
         self.scheduler = scheduler
         self.state = state
+        self.workers = ThreadPoolExecutor(max_workers=config.get_conf().master_api_threads)
+        self._execution_tasks = {}  # execution ID -> future of the last task submitted for it
+        self._execution_tasks_lock = threading.Lock()
 
-    def _reply_error(self, message: str) -> None:
-        self.zmq_s.send_json({'result': 'error', 'message': message})
+    def _send(self, envelope, message, reply):
+        if 'request_id' in message:
+            reply['request_id'] = message['request_id']
+        self.zmq_s.send_multipart(envelope + [json.dumps(reply).encode('utf-8')])
         self.debug_has_replied = True
 
-    def _reply_ok(self, data=None):
+    def _reply_error(self, envelope, message, error: str) -> None:
+        self._send(envelope, message, {'result': 'error', 'message': error})
+
+    def _reply_ok(self, envelope, message, data=None):
         reply = {
             'result': 'ok'
         }
         if data is not None:
             reply['data'] = data
-        self.zmq_s.send_json(reply)
-        self.debug_has_replied = True
+        self._send(envelope, message, reply)
+
+    def _run_in_order(self, exec_id, func, *args):
+        """Run func in the worker pool, after the tasks already submitted for the same execution."""
+        def _task(previous):
+            if previous is not None:
+                previous.exception()  # wait, errors are already logged by the previous task
+            try:
+                func(*args)
+            except Exception:
+                log.exception('Error running API command for execution {}'.format(exec_id))
+
+        def _forget(future):
+            with self._execution_tasks_lock:
+                if self._execution_tasks.get(exec_id) is future:
+                    del self._execution_tasks[exec_id]
+
+        with self._execution_tasks_lock:
+            future = self.workers.submit(_task, self._execution_tasks.get(exec_id))
+            self._execution_tasks[exec_id] = future
+        future.add_done_callback(_forget)
 
     def loop(self):
         """The API loop."""
         while True:
-            message = self.zmq_s.recv_json()
+            frames = self.zmq_s.recv_multipart()
+            envelope, message = frames[:-1], json.loads(frames[-1].decode('utf-8'))
             self.debug_has_replied = False
             start_time = time.time()
             if message['command'] == 'execution_start':
                 exec_id = message['exec_id']
                 execution = self.state.execution_list(id=exec_id, only_one=True)
                 if execution is None:
-                    self._reply_error('Execution ID {} not found'.format(message['exec_id']))
+                    self._reply_error(envelope, message, 'Execution ID {} not found'.format(message['exec_id']))
+                elif execution.status != execution.SUBMIT_STATUS:
+                    # A request that waited in the queue of an API process while the master was down can arrive after the execution has been submitted again
+                    self._reply_error(envelope, message, 'Execution ID {} has already been submitted'.format(message['exec_id']))
                 else:
                     execution.set_scheduled()
-                    self._reply_ok()
-                    zoe_master.preprocessing.execution_submit(self.state, self.scheduler, execution)
+                    self._reply_ok(envelope, message)
+                    self._run_in_order(exec_id, zoe_master.preprocessing.execution_submit, self.state, self.scheduler, execution)
             elif message['command'] == 'execution_terminate':
                 exec_id = message['exec_id']
                 execution = self.state.execution_list(id=exec_id, only_one=True)
                 if execution is None:
-                    self._reply_error('Execution ID {} not found'.format(message['exec_id']))
+                    self._reply_error(envelope, message, 'Execution ID {} not found'.format(message['exec_id']))
                 else:
                     execution.set_cleaning_up()
-                    self._reply_ok()
-                    zoe_master.preprocessing.execution_terminate(self.scheduler, execution)
+                    self._reply_ok(envelope, message)
+                    self._run_in_order(exec_id, zoe_master.preprocessing.execution_terminate, self.scheduler, execution)
             elif message['command'] == 'execution_delete':
                 exec_id = message['exec_id']
                 execution = self.state.execution_list(id=exec_id, only_one=True)
                 if execution is not None:
                     zoe_master.preprocessing.execution_delete(execution)
-                self._reply_ok()
+                self._reply_ok(envelope, message)
             elif message['command'] == 'scheduler_stats':
                 data = self.scheduler.stats()
-                self._reply_ok(data=data)
+                self._reply_ok(envelope, message, data=data)
             else:
                 log.error('Unknown command: {}'.format(message['command']))
-                self._reply_error('unknown command')
+                self._reply_error(envelope, message, 'unknown command')
 
             if not self.debug_has_replied:
-                self._reply_error('bug')
+                self._reply_error(envelope, message, 'bug')
                 raise ZoeException('BUG: command {} does not fill a reply')
 
             self.metrics.metric_api_call(start_time, message['command'])
 
     def quit(self) -> None:
         """Cleanly close the ZMQ resources."""
+        self.workers.shutdown(wait=True)
         self.zmq_s.close()
         self.context.term()
@@ -25,33 +25,26 @@ log = logging.getLogger(__name__)
 
 def _digest_application_description(state: SQLManager, execution: Execution):
     """Read an application description and expand it into services that can be deployed."""
+    services = []
     for service_descr in execution.description['services']:
         essential_count = service_descr['essential_count']
         total_count = service_descr['total_count']
-        elastic_count = total_count - essential_count
-        counter = 0
-        for service_n_ in range(essential_count):
-            name = "{}{}".format(service_descr['name'], counter)
-            sid = state.service_new(execution.id, name, service_descr['name'], service_descr, True)
 
-            # Ports
-            for port_descr in service_descr['ports']:
-                port_internal = str(port_descr['port_number']) + '/' + port_descr['protocol']
-                state.port_new(sid, port_internal, port_descr)
+        ports = []
+        for port_descr in service_descr['ports']:
+            port_internal = str(port_descr['port_number']) + '/' + port_descr['protocol']
+            ports.append((port_internal, port_descr))
 
-            counter += 1
+        for counter in range(total_count):
+            services.append({
+                'name': "{}{}".format(service_descr['name'], counter),
+                'service_group': service_descr['name'],
+                'description': service_descr,
+                'essential': counter < essential_count,
+                'ports': ports
+            })
 
-        for service_n_ in range(elastic_count):
-            name = "{}{}".format(service_descr['name'], counter)
-            sid = state.service_new(execution.id, name, service_descr['name'], service_descr, False)
-
-            # Ports
-            for port_descr in service_descr['ports']:
-                port_internal = str(port_descr['port_number']) + '/' + port_descr['protocol']
-                state.port_new(sid, port_internal, port_descr)
-
-            counter += 1
-        assert counter == total_count
+    state.services_new(execution.id, services)
 
 
 def execution_submit(state: SQLManager, scheduler: ZoeBaseScheduler, execution: Execution):
@@ -67,15 +60,15 @@ def execution_terminate(scheduler: ZoeBaseScheduler, execution: Execution):
 
 def restart_resubmit_scheduler(state: SQLManager, scheduler: ZoeBaseScheduler):
     """Restart work after a restart of the process."""
-    sched_execs = state.execution_list(status=Execution.SCHEDULED_STATUS)
+    sched_execs = state.execution_list(status=Execution.SCHEDULED_STATUS, load_services=True)
     for e in sched_execs:
         scheduler.incoming(e)
 
-    clean_up_execs = state.execution_list(status=Execution.CLEANING_UP_STATUS)
+    clean_up_execs = state.execution_list(status=Execution.CLEANING_UP_STATUS, load_services=True)
     for e in clean_up_execs:
         scheduler.terminate(e)
 
-    starting_execs = state.execution_list(status=Execution.STARTING_STATUS)
+    starting_execs = state.execution_list(status=Execution.STARTING_STATUS, load_services=True)
     for e in starting_execs:
         scheduler.terminate(e)
         scheduler.incoming(e)
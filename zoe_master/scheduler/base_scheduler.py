@@ -15,14 +15,104 @@
 
 """The base class for Zoe schedulers"""
 
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+
+from zoe_lib.config import get_conf
+from zoe_lib.metrics.base import BaseMetricSender, time_diff_ms
 import zoe_lib.state
+from zoe_master.backends.interface import terminate_execution
+
+log = logging.getLogger(__name__)
 
 
 class ZoeBaseScheduler:
-    """The base class for Zoe schedulers"""
+    """
+    The base class for Zoe schedulers
+
+    In synchronous mode, used by the simulator, schedulers do not start any thread: trigger() runs a scheduling round and
+    terminate() terminates the execution before returning.
+
+    If a metric sender is given, schedulers report through it how long their decisions take and how long executions wait.
+    """
 
-    def __init__(self, state: zoe_lib.state.SQLManager):
+    def __init__(self, state: zoe_lib.state.SQLManager, synchronous=False, metrics: BaseMetricSender=None):
         self.state = state
+        self.synchronous = synchronous
+        self.metrics = metrics
+        self._queued_at = {}  # execution ID -> time it entered the queue
+        self._termination_pool = ThreadPoolExecutor(max_workers=get_conf().max_concurrent_terminations)
+        self._terminations = {}  # execution ID -> [services terminated, total services]
+        self._terminations_lock = threading.Lock()
+
+    def _terminate_async(self, execution: zoe_lib.state.Execution) -> None:
+        """Queue the termination of an execution. The services of the execution are stopped in parallel, see terminate_execution()."""
+        def _progress(terminated, total):
+            with self._terminations_lock:
+                self._terminations[execution.id] = [terminated, total]
+
+        def _termination():
+            try:
+                with execution.termination_lock:
+                    terminate_execution(execution, _progress)
+                log.debug('Execution {} terminated successfully'.format(execution.id))
+            except Exception:
+                log.exception('Error terminating execution {}'.format(execution.id))
+            finally:
+                with self._terminations_lock:
+                    self._terminations.pop(execution.id, None)
+                self.trigger()
+
+        with self._terminations_lock:
+            self._terminations[execution.id] = [0, None]
+        if self.synchronous:
+            _termination()
+        else:
+            self._termination_pool.submit(_termination)
+
+    def _shutdown_terminations(self):
+        """Stop accepting terminations, the ones already running are completed in the background."""
+        self._termination_pool.shutdown(wait=False)
+
+    def _termination_stats(self):
+        """Statistics about the executions being terminated."""
+        with self._terminations_lock:
+            return {
+                'termination_threads_count': len(self._terminations),
+                'terminations': dict((exec_id, {'terminated': progress[0], 'total': progress[1]}) for exec_id, progress in self._terminations.items())
+            }
+
+    def _metric(self, measure, value, fields=None, **tags):
+        """Send a scheduler metric point, if metrics are enabled. Values that grow without bound, like IDs, go in fields."""
+        if self.metrics is not None:
+            self.metrics.metric_scheduler(measure, value, tags, fields)
+
+    def _metric_time(self, measure, time_start, fields=None, **tags):
+        """Send the time elapsed since time_start, in milliseconds."""
+        if self.metrics is not None:
+            self.metrics.metric_scheduler(measure, time_diff_ms(time_start, time.time()), tags, fields)
+
+    def _mark_queued(self, execution: zoe_lib.state.Execution):
+        """Remember when an execution entered the queue, to measure its queue wait."""
+        self._queued_at.setdefault(execution.id, [time.time(), None])
+
+    def _mark_start_attempt(self, execution: zoe_lib.state.Execution):
+        """The scheduler is about to start the services of an execution, if they start the queue wait ends here."""
+        if execution.id in self._queued_at:
+            self._queued_at[execution.id][1] = time.time()
+
+    def _mark_running(self, execution: zoe_lib.state.Execution):
+        """The essential services of an execution are running: report its queue wait and the time since it was submitted."""
+        queued_at, last_attempt = self._queued_at.pop(execution.id, [None, None])
+        if queued_at is not None and last_attempt is not None:
+            self._metric('queue_wait', time_diff_ms(queued_at, last_attempt), fields={'execution_id': execution.id})
+        self._metric_time('submit_to_running', execution.time_submit.timestamp(), fields={'execution_id': execution.id})
+
+    def _forget(self, execution: zoe_lib.state.Execution):
+        """The execution left the scheduler."""
+        self._queued_at.pop(execution.id, None)
 
     def trigger(self):
         """Trigger a scheduler run."""
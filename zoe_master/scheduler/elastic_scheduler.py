@@ -23,9 +23,12 @@ import logging
 import threading
 import time
 
+from zoe_lib.config import get_conf
 from zoe_lib.state import Execution, SQLManager
 
-from zoe_master.backends.interface import terminate_execution, get_platform_state, start_elastic, start_essential
+from zoe_master.backends.interface import get_platform_state, start_elastic, start_essential
+from zoe_master.scheduler.base_scheduler import ZoeBaseScheduler
+from zoe_master.scheduler.placement import get_placement_strategy
 from zoe_master.scheduler.simulated_platform import SimulatedPlatform
 from zoe_master.exceptions import UnsupportedSchedulerPolicyError
 
@@ -34,24 +37,29 @@ log = logging.getLogger(__name__)
 ExecutionProgress = namedtuple('ExecutionProgress', ['last_time_scheduled', 'progress_sequence'])
 
 
-class ZoeElasticScheduler:
+class ZoeElasticScheduler(ZoeBaseScheduler):
     """The Scheduler class for size-based scheduling. Policy can be "FIFO" or "SIZE"."""
-    def __init__(self, state: SQLManager, policy):
+    def __init__(self, state: SQLManager, policy, synchronous=False, metrics=None):
+        super().__init__(state, synchronous, metrics)
         if policy != 'FIFO' and policy != 'SIZE':
             raise UnsupportedSchedulerPolicyError
         self.trigger_semaphore = threading.Semaphore(0)
         self.policy = policy
+        self.placement = get_placement_strategy(get_conf().scheduler_placement)
         self.queue = []
         self.additional_exec_state = {}
-        self.async_threads = []
         self.loop_quit = False
-        self.loop_th = threading.Thread(target=self.loop_start_th, name='scheduler')
-        self.loop_th.start()
-        self.state = state
+        self.loop_th = None
+        if not synchronous:
+            self.loop_th = threading.Thread(target=self.loop_start_th, name='scheduler')
+            self.loop_th.start()
 
     def trigger(self):
         """Trigger a scheduler run."""
-        self.trigger_semaphore.release()
+        if self.synchronous:
+            self._scheduling_round()
+        else:
+            self.trigger_semaphore.release()
 
     def incoming(self, execution: Execution):
         """
@@ -60,6 +68,7 @@ class ZoeElasticScheduler:
         :return:
         """
         self.queue.append(execution)
+        self._mark_queued(execution)
         exec_data = ExecutionProgress(0, [])
         self.additional_exec_state[execution.id] = exec_data
         self.trigger()
@@ -70,13 +79,6 @@ class ZoeElasticScheduler:
         :param execution: the terminated execution
         :return: None
         """
-        def async_termination(e):
-            """Actual termination runs in a thread."""
-            with e.termination_lock:
-                terminate_execution(e)
-                self.trigger()
-            log.debug('Execution {} terminated successfully'.format(e.id))
-
         try:
             self.queue.remove(execution)
         except ValueError:
@@ -86,22 +88,9 @@ class ZoeElasticScheduler:
             del self.additional_exec_state[execution.id]
         except KeyError:
             pass
+        self._forget(execution)
 
-        th = threading.Thread(target=async_termination, name='termination_{}'.format(execution.id), args=(execution,))
-        th.start()
-        self.async_threads.append(th)
-
-    def _cleanup_async_threads(self):
-        counter = len(self.async_threads)
-        while counter > 0:
-            if len(self.async_threads) == 0:
-                break
-            th = self.async_threads.pop(0)
-            th.join(0.1)
-            if th.isAlive():  # join failed
-                log.debug('Thread {} join failed'.format(th.name))
-                self.async_threads.append(th)
-            counter -= 1
+        self._terminate_async(execution)
 
     def _refresh_execution_sizes(self):
         for execution in self.queue:  # type: Execution
@@ -133,8 +122,7 @@ class ZoeElasticScheduler:
         auto_trigger = auto_trigger_base
         while True:
             ret = self.trigger_semaphore.acquire(timeout=1)
-            if not ret:  # Semaphore timeout, do some thread cleanup
-                self._cleanup_async_threads()
+            if not ret:  # Semaphore timeout
                 auto_trigger -= 1
                 if auto_trigger == 0:
                     auto_trigger = auto_trigger_base
@@ -143,103 +131,137 @@ class ZoeElasticScheduler:
             if self.loop_quit:
                 break
 
-            if len(self.queue) == 0:
-                log.debug("Scheduler loop has been triggered, but the queue is empty")
-                continue
-            log.debug("Scheduler loop has been triggered")
+            self._scheduling_round()
 
-            while True:  # Inner loop will run until no new executions can be started or the queue is empty
-                self._refresh_execution_sizes()
+    def _scheduling_round(self):
+        """Start as many executions from the queue as the platform can host."""
+        if len(self.queue) == 0:
+            log.debug("Scheduler loop has been triggered, but the queue is empty")
+            return
+        log.debug("Scheduler loop has been triggered")
 
-                if self.policy == "SIZE":
-                    self.queue.sort(key=lambda execution: execution.size)
+        while True:  # Inner loop will run until no new executions can be started or the queue is empty
+            time_start = time.time()
+            self._refresh_execution_sizes()
 
+            if self.policy == "SIZE":
+                self.queue.sort(key=lambda execution: execution.size)
+
+            if log.isEnabledFor(logging.DEBUG):
                 log.debug('--> Queue dump after sorting')
                 for j in self.queue:
                     log.debug(str(j))
                 log.debug('--> End dump')
 
-                jobs_to_attempt_scheduling = self._pop_all_with_same_size()
+            jobs_to_attempt_scheduling = self._pop_all_with_same_size()
+            jobs_attempted_count = len(jobs_to_attempt_scheduling)
+            if log.isEnabledFor(logging.DEBUG):
                 log.debug('Scheduler inner loop, jobs to attempt scheduling:')
                 for job in jobs_to_attempt_scheduling:
                     log.debug("-> {}".format(job))
 
-                platform_state = get_platform_state()
-                cluster_status_snapshot = SimulatedPlatform(platform_state)
+            time_platform_state = time.time()
+            platform_state = get_platform_state()
+            self._metric_time('platform_state_time', time_platform_state)
+
+            time_simulation = time.time()
+            cluster_status_snapshot = SimulatedPlatform(platform_state, self.placement)
+            if log.isEnabledFor(logging.DEBUG):
                 log.debug(str(cluster_status_snapshot))
 
-                jobs_to_launch = []
-                free_resources = cluster_status_snapshot.aggregated_free_memory()
+            jobs_to_launch = []
+            free_resources = cluster_status_snapshot.aggregated_free_memory()
 
-                # Try to find a placement solution using a snapshot of the platform status
-                for job in jobs_to_attempt_scheduling:  # type: Execution
-                    jobs_to_launch_copy = jobs_to_launch.copy()
+            # Try to find a placement solution using a snapshot of the platform status
+            for job in jobs_to_attempt_scheduling:  # type: Execution
+                jobs_to_launch_copy = jobs_to_launch.copy()
 
-                    # remove all elastic services from the previous simulation loop
-                    for job_aux in jobs_to_launch:  # type: Execution
-                        cluster_status_snapshot.deallocate_elastic(job_aux)
+                # remove all elastic services from the previous simulation loop
+                for job_aux in jobs_to_launch:  # type: Execution
+                    cluster_status_snapshot.deallocate_elastic(job_aux)
 
-                    job_can_start = False
-                    if not job.is_running:
-                        job_can_start = cluster_status_snapshot.allocate_essential(job)
+                job_can_start = False
+                if not job.is_running:
+                    job_can_start = cluster_status_snapshot.allocate_essential(job)
 
-                    if job_can_start or job.is_running:
-                        jobs_to_launch.append(job)
+                if job_can_start or job.is_running:
+                    jobs_to_launch.append(job)
 
-                    # Try to put back the elastic services
-                    for job_aux in jobs_to_launch:
-                        cluster_status_snapshot.allocate_elastic(job_aux)
+                # Try to put back the elastic services
+                for job_aux in jobs_to_launch:
+                    cluster_status_snapshot.allocate_elastic(job_aux)
 
-                    current_free_resources = cluster_status_snapshot.aggregated_free_memory()
-                    if current_free_resources >= free_resources:
-                        jobs_to_launch = jobs_to_launch_copy
-                        break
-                    free_resources = current_free_resources
+                current_free_resources = cluster_status_snapshot.aggregated_free_memory()
+                if current_free_resources >= free_resources:
+                    jobs_to_launch = jobs_to_launch_copy
+                    break
+                free_resources = current_free_resources
 
+            self._metric_time('simulation_time', time_simulation)
+            if log.isEnabledFor(logging.DEBUG):
                 log.debug('Allocation after simulation: {}'.format(cluster_status_snapshot.get_service_allocation()))
+                log.debug('Packing efficiency: {}'.format(cluster_status_snapshot.packing_efficiency()))
+
+            # We port the results of the simulation into the real cluster
+            services_started = False
+            for job in jobs_to_launch:  # type: Execution
+                running_before = job.running_services_count
+                if not job.essential_services_running:
+                    self._mark_start_attempt(job)
+                    ret = start_essential(job)
+                    if ret == "fatal":
+                        self._forget(job)
+                        continue  # trow away the execution
+                    elif ret == "requeue":
+                        self.queue.insert(0, job)
+                        continue
+                    elif ret == "ok":
+                        job.set_running()
+                        self._mark_running(job)
+                    assert ret == "ok"
+
+                start_elastic(job)
+                if job.running_services_count > running_before:
+                    services_started = True
+
+                if job.all_services_running:
+                    log.debug('execution {}: all services started'.format(job.id))
+                    job.termination_lock.release()
+                    jobs_to_attempt_scheduling.remove(job)
 
-                # We port the results of the simulation into the real cluster
-                for job in jobs_to_launch:  # type: Execution
-                    if not job.essential_services_running:
-                        ret = start_essential(job)
-                        if ret == "fatal":
-                            continue  # trow away the execution
-                        elif ret == "requeue":
-                            self.queue.insert(0, job)
-                            continue
-                        elif ret == "ok":
-                            job.set_running()
-                        assert ret == "ok"
-
-                    start_elastic(job)
-
-                    if job.all_services_running:
-                        log.debug('execution {}: all services started'.format(job.id))
-                        job.termination_lock.release()
-                        jobs_to_attempt_scheduling.remove(job)
+            for job in jobs_to_attempt_scheduling:
+                job.termination_lock.release()
+                # self.queue.insert(0, job)
 
-                for job in jobs_to_attempt_scheduling:
-                    job.termination_lock.release()
-                    # self.queue.insert(0, job)
+            self.queue = jobs_to_attempt_scheduling + self.queue
 
-                self.queue = jobs_to_attempt_scheduling + self.queue
+            self._metric('jobs_attempted', jobs_attempted_count)
+            self._metric('jobs_launched', len(jobs_to_launch))
+            self._metric_time('loop_time', time_start)
 
-                if len(self.queue) == 0:
-                    log.debug('empty queue, exiting inner loop')
-                    break
-                if len(jobs_to_launch) == 0:
-                    log.debug('No executions could be started, exiting inner loop')
-                    break
+            if len(self.queue) == 0:
+                log.debug('empty queue, exiting inner loop')
+                break
+            if len(jobs_to_launch) == 0:
+                log.debug('No executions could be started, exiting inner loop')
+                break
+            if not services_started:
+                # The simulation can find room for services that the real cluster cannot host, do not retry until something changes
+                log.debug('No new services could be started, exiting inner loop')
+                break
 
     def quit(self):
         """Stop the scheduler thread."""
         self.loop_quit = True
-        self.trigger()
-        self.loop_th.join()
+        if self.loop_th is not None:
+            self.trigger()
+            self.loop_th.join()
+        self._shutdown_terminations()
 
     def stats(self):
         """Scheduler statistics."""
-        return {
-            'queue_length': len(self.queue),
-            'termination_threads_count': len(self.async_threads)
+        stats = {
+            'queue_length': len(self.queue)
         }
+        stats.update(self._termination_stats())
+        return stats
@@ -0,0 +1,109 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Strategies used by the simulated platform to choose the node where a service is placed."""
+
+from zoe_master.exceptions import UnsupportedSchedulerPolicyError
+
+
+class BasePlacement:
+    """The base class for placement strategies."""
+    name = None
+
+    def select_node(self, platform, service):
+        """
+        Choose a node for a service.
+
+        :param platform: the SimulatedPlatform
+        :param service: the service to place
+        :return: a SimulatedNode where the service fits, or None
+        """
+        raise NotImplementedError
+
+
+class LeastLoadedPlacement(BasePlacement):
+    """Place on the node running the least containers. Nodes are kept sorted by the platform, so this is the cheapest strategy."""
+    name = 'least-loaded'
+
+    def select_node(self, platform, service):
+        """Choose the node with the smallest container count where the service fits."""
+        for node in platform.nodes_by_load():
+            if node.service_fits(service):
+                return node
+        return None
+
+
+class BestFitPlacement(BasePlacement):
+    """Place on the node that has the least free resources left after the placement, to keep large holes for large services."""
+    name = 'best-fit'
+
+    def select_node(self, platform, service):
+        """Choose the fitting node with the smallest sum of normalized free memory and cores after placement."""
+        best = None
+        best_score = None
+        for node in platform.nodes.values():
+            if not node.service_fits(service):
+                continue
+            score = node.free_share('memory', -service_memory(service)) + node.free_share('cores', -service_cores(service))
+            if best is None or (score, node.index) < (best_score, best.index):
+                best = node
+                best_score = score
+        return best
+
+
+class DominantResourceFitPlacement(BasePlacement):
+    """Place on the node where the service takes the largest share of the free capacity of its dominant resource."""
+    name = 'dominant-resource-fit'
+
+    def select_node(self, platform, service):
+        """Choose the fitting node where max(memory needed / memory free, cores needed / cores free) is highest."""
+        best = None
+        best_score = None
+        for node in platform.nodes.values():
+            if not node.service_fits(service):
+                continue
+            score = max(_ratio(service_memory(service), node.free_memory), _ratio(service_cores(service), node.free_cores))
+            if best is None or (-score, node.index) < (-best_score, best.index):
+                best = node
+                best_score = score
+        return best
+
+
+PLACEMENT_STRATEGIES = dict((cls.name, cls) for cls in [LeastLoadedPlacement, BestFitPlacement, DominantResourceFitPlacement])
+
+
+def get_placement_strategy(name) -> BasePlacement:
+    """Return an instance of the placement strategy with the given name."""
+    try:
+        return PLACEMENT_STRATEGIES[name]()
+    except KeyError:
+        raise UnsupportedSchedulerPolicyError('Unknown placement strategy {}'.format(name))
+
+
+def service_memory(service):
+    """Memory reserved by a service."""
+    return service.resource_reservation.memory.min
+
+
+def service_cores(service):
+    """Cores reserved by a service, services that do not ask for cores have a zero reservation."""
+    cores = service.resource_reservation.cores.min
+    return 0 if cores is None else cores
+
+
+def _ratio(needed, free):
+    if needed == 0:
+        return 0
+    return needed / free if free > 0 else float('inf')
@@ -17,9 +17,10 @@
 
 import logging
 import threading
+import time
 
 from zoe_lib.state import Execution
-from zoe_master.backends.interface import start_all, terminate_execution
+from zoe_master.backends.interface import start_all
 from zoe_master.scheduler.base_scheduler import ZoeBaseScheduler
 from zoe_master.exceptions import UnsupportedSchedulerPolicyError
 
@@ -28,20 +29,24 @@ log = logging.getLogger(__name__)
 
 class ZoeSimpleScheduler(ZoeBaseScheduler):
     """The Scheduler class."""
-    def __init__(self, state, policy):
-        super().__init__(state)
+    def __init__(self, state, policy, synchronous=False, metrics=None):
+        super().__init__(state, synchronous, metrics)
         if policy != 'FIFO':
             raise UnsupportedSchedulerPolicyError
         self.fifo_queue = []
         self.trigger_semaphore = threading.Semaphore(0)
-        self.async_threads = []
         self.loop_quit = False
-        self.loop_th = threading.Thread(target=self.loop_start_th, name='scheduler')
-        self.loop_th.start()
+        self.loop_th = None
+        if not synchronous:
+            self.loop_th = threading.Thread(target=self.loop_start_th, name='scheduler')
+            self.loop_th.start()
 
     def trigger(self):
         """Trigger a scheduler run."""
-        self.trigger_semaphore.release()
+        if self.synchronous:
+            self._scheduling_round()
+        else:
+            self.trigger_semaphore.release()
 
     def incoming(self, execution: Execution):
         """
@@ -50,6 +55,7 @@ class ZoeSimpleScheduler(ZoeBaseScheduler):
         :return:
         """
         self.fifo_queue.append(execution)
+        self._mark_queued(execution)
         self.trigger()
 
     def terminate(self, execution: Execution) -> None:
@@ -58,18 +64,12 @@ class ZoeSimpleScheduler(ZoeBaseScheduler):
         :param execution: the terminated execution
         :return: None
         """
-        def async_termination():
-            """Actual termination run in a thread."""
-            terminate_execution(execution)
-            self.trigger()
-
         try:
             self.fifo_queue.remove(execution)
         except ValueError:
             pass
-        th = threading.Thread(target=async_termination, name='termination_{}'.format(execution.id))
-        th.start()
-        self.async_threads.append(th)
+        self._forget(execution)
+        self._terminate_async(execution)
 
     def loop_start_th(self):
         """The Scheduler thread loop."""
@@ -77,17 +77,7 @@ class ZoeSimpleScheduler(ZoeBaseScheduler):
         auto_trigger = auto_trigger_base
         while True:
             ret = self.trigger_semaphore.acquire(timeout=1)
-            if not ret:  # Semaphore timeout, do some thread cleanup
-                counter = len(self.async_threads)
-                while counter > 0:
-                    if len(self.async_threads) == 0:
-                        break
-                    th = self.async_threads.pop(0)
-                    th.join(0.1)
-                    if th.isAlive():  # join failed
-                        log.debug('Thread {} join failed'.format(th.name))
-                        self.async_threads.append(th)
-                    counter -= 1
+            if not ret:  # Semaphore timeout
                 auto_trigger -= 1
                 if auto_trigger == 0:
                     auto_trigger = auto_trigger_base
@@ -96,32 +86,43 @@ class ZoeSimpleScheduler(ZoeBaseScheduler):
             if self.loop_quit:
                 break
 
-            log.debug("Scheduler start loop has been triggered")
-            if len(self.fifo_queue) == 0:
-                continue
-
-            e = self.fifo_queue[0]
-            assert isinstance(e, Execution)
-            e.set_starting()
-            self.fifo_queue.pop(0)  # remove the execution form the queue
-
-            ret = start_all(e)
-            if ret == 'requeue':
-                self.fifo_queue.append(e)
-            elif ret == 'fatal':
-                continue  # throw away the execution
-            else:
-                e.set_running()
+            self._scheduling_round()
+
+    def _scheduling_round(self):
+        """Try to start the execution at the head of the queue."""
+        log.debug("Scheduler start loop has been triggered")
+        if len(self.fifo_queue) == 0:
+            return
+
+        time_start = time.time()
+        e = self.fifo_queue[0]
+        assert isinstance(e, Execution)
+        e.set_starting()
+        self.fifo_queue.pop(0)  # remove the execution form the queue
+
+        self._mark_start_attempt(e)
+        ret = start_all(e)
+        if ret == 'requeue':
+            self.fifo_queue.append(e)
+        elif ret == 'fatal':
+            self._forget(e)
+        else:
+            e.set_running()
+            self._mark_running(e)
+        self._metric_time('loop_time', time_start)
 
     def quit(self):
         """Stop the scheduler thread."""
         self.loop_quit = True
-        self.trigger()
-        self.loop_th.join()
+        if self.loop_th is not None:
+            self.trigger()
+            self.loop_th.join()
+        self._shutdown_terminations()
 
     def stats(self):
         """Scheduler statistics."""
-        return {
-            'queue_length': len(self.fifo_queue),
-            'termination_threads_count': len(self.async_threads)
+        stats = {
+            'queue_length': len(self.fifo_queue)
         }
+        stats.update(self._termination_stats())
+        return stats
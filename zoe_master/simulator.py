@@ -0,0 +1,386 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Offline scheduler simulator.
+
+Replays a workload trace against the real Zoe schedulers, using an in-memory state and a simulated backend, and reports
+makespan, turnaround, queue wait and cluster utilization for each scheduler policy. Time is virtual: the simulation of a
+trace lasting days takes seconds.
+
+A trace is a JSON file like this::
+
+    {
+        "nodes": [{"name": "node0", "memory": 68719476736, "cores": 16}],
+        "executions": [
+            {"zapp": "contrib/zoeapps/eurecom_aml_lab.json", "arrival": 0, "duration": 3600, "user": "alice"},
+            {"description": {...}, "arrival": 120, "duration": 600}
+        ]
+    }
+
+Arrivals and durations are in seconds, ZApp paths are relative to the trace file. The "nodes" list is optional. Without a
+trace a random workload is generated.
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import math
+import os
+import random
+
+import zoe_lib.config as config
+from zoe_lib.applications import app_validate
+from zoe_lib.state import Execution, MemoryStateManager
+from zoe_lib.version import ZOE_APPLICATION_FORMAT_VERSION
+
+import zoe_master.scheduler
+import zoe_master.backends.interface
+from zoe_master.backends.simulated import SimulatedBackend
+from zoe_master.exceptions import UnsupportedSchedulerPolicyError
+from zoe_master.preprocessing import _digest_application_description
+
+log = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+TICK_INTERVAL = 60  # seconds, the schedulers run at least once per minute
+
+_ARRIVAL = 0
+_FINISH = 1
+_TICK = 2
+
+
+class TraceEntry:
+    """An execution of the workload: what is submitted, when and for how long it runs once started."""
+    def __init__(self, name, user_id, description, arrival, duration):
+        self.name = name
+        self.user_id = user_id
+        self.description = description
+        self.arrival = arrival
+        self.duration = duration
+
+
+def load_trace(path):
+    """Load a workload trace from a JSON file, return a list of nodes (or None) and a list of TraceEntry objects."""
+    with open(path, 'r') as trace_file:
+        trace = json.load(trace_file)
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    nodes = None
+    if 'nodes' in trace:
+        nodes = [(node['name'], node['memory'], node['cores']) for node in trace['nodes']]
+
+    entries = []
+    for index, entry in enumerate(trace['executions']):
+        if 'description' in entry:
+            description = entry['description']
+        else:
+            with open(os.path.join(base_dir, entry['zapp']), 'r') as zapp_file:
+                description = json.load(zapp_file)
+        app_validate(description)
+        name = entry.get('name', '{}-{}'.format(description['name'], index))
+        entries.append(TraceEntry(name, entry.get('user', 'simulator'), description, entry['arrival'], entry['duration']))
+    return nodes, entries
+
+
+def _synthetic_service(name, memory, cores, essential_count, total_count, monitor, startup_order):
+    return {
+        'name': name,
+        'image': 'simulator/{}'.format(name),
+        'monitor': monitor,
+        'essential_count': essential_count,
+        'total_count': total_count,
+        'startup_order': startup_order,
+        'replicas': 1,
+        'command': None,
+        'environment': [],
+        'volumes': [],
+        'ports': [],
+        'resources': {
+            'memory': {'min': memory, 'max': memory},
+            'cores': {'min': cores, 'max': cores}
+        }
+    }
+
+
+def synthetic_trace(count, mean_interarrival, mean_duration, seed=None):
+    """
+    Generate a random workload of Spark-like ZApps: a master and a group of workers, of which only some are essential.
+
+    Arrivals follow a Poisson process and durations are exponentially distributed. The ZApp size is the duration, as users
+    would estimate it.
+    """
+    rand = random.Random(seed)
+    entries = []
+    arrival = 0
+    for index in range(count):
+        duration = max(1, int(rand.expovariate(1 / mean_duration)))
+        worker_count = rand.randint(1, 8)
+        services = [
+            _synthetic_service('master', rand.choice([1, 2]) * GB, 1, 1, 1, True, 0),
+            _synthetic_service('worker', rand.choice([2, 4, 8, 16]) * GB, rand.choice([1, 2, 4]), rand.randint(1, worker_count), worker_count, False, 1)
+        ]
+        description = {
+            'name': 'synthetic',
+            'version': ZOE_APPLICATION_FORMAT_VERSION,
+            'will_end': True,
+            'size': duration,
+            'services': services
+        }
+        entries.append(TraceEntry('synthetic-{}'.format(index), 'user{}'.format(rand.randint(0, 9)), description, arrival, duration))
+        arrival += int(rand.expovariate(1 / mean_interarrival))
+    return entries
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+class _Record:
+    """What happened to a trace entry during the simulation."""
+    def __init__(self, entry: TraceEntry, execution: Execution):
+        self.entry = entry
+        self.execution = execution
+        self.start = None
+        self.end = None
+
+
+class Simulation:
+    """A discrete-event simulation of one scheduler and policy over a trace."""
+    def __init__(self, entries, nodes, scheduler_class, policy):
+        self.entries = sorted(entries, key=lambda e: e.arrival)
+        self.nodes = nodes
+        self.scheduler_class = scheduler_class
+        self.policy = policy
+
+        self.now = 0
+        self._events = []
+        self._sequence = 0
+        self._tick_pending = False
+        self._records = []
+        self._waiting = []  # records of executions submitted but not started yet
+
+        self._last_accounting = None
+        self._memory_area = 0
+        self._cores_area = 0
+
+        self.state = None
+        self.backend = None
+        self.scheduler = None
+
+    def _push(self, when, kind, payload=None):
+        heapq.heappush(self._events, (when, self._sequence, kind, payload))
+        self._sequence += 1
+
+    def _account(self, when):
+        """Integrate the reserved resources over time, up to the given instant."""
+        if self._last_accounting is not None:
+            memory, cores = self.backend.reserved()
+            self._memory_area += memory * (when - self._last_accounting)
+            self._cores_area += cores * (when - self._last_accounting)
+        self._last_accounting = when
+
+    def _submit(self, entry: TraceEntry):
+        exec_id = self.state.execution_new(entry.name, entry.user_id, entry.description)
+        execution = self.state.execution_list(id=exec_id, only_one=True)
+        execution.set_scheduled()
+        record = _Record(entry, execution)
+        self._records.append(record)
+        self._waiting.append(record)
+        _digest_application_description(self.state, execution)
+        self.scheduler.incoming(execution)
+
+    def _finish(self, record: _Record):
+        record.end = self.now
+        self.scheduler.terminate(record.execution)
+
+    def _check_started(self):
+        """Find the executions started by the scheduler since the last event and plan their end."""
+        for record in list(self._waiting):
+            if record.execution.status == Execution.RUNNING_STATUS:
+                record.start = self.now
+                self._push(self.now + record.entry.duration, _FINISH, record)
+                self._waiting.remove(record)
+            elif record.execution.status == Execution.ERROR_STATUS:
+                self._waiting.remove(record)
+
+    def _running_count(self):
+        return len([r for r in self._records if r.start is not None and r.end is None])
+
+    def run(self):
+        """Run the simulation until all executions have terminated or cannot be started any more, return the metrics."""
+        self.state = MemoryStateManager()
+        self.backend = SimulatedBackend(config.get_conf(), self.nodes)
+        zoe_master.backends.interface.initialize_backend(self.state, self.backend)
+        self.scheduler = self.scheduler_class(self.state, self.policy, synchronous=True)
+
+        for entry in self.entries:
+            self._push(entry.arrival, _ARRIVAL, entry)
+
+        try:
+            while len(self._events) > 0:
+                when, seq_, kind, payload = heapq.heappop(self._events)
+                self._account(when)
+                self.now = when
+                if kind == _ARRIVAL:
+                    self._submit(payload)
+                elif kind == _FINISH:
+                    self._finish(payload)
+                else:
+                    self._tick_pending = False
+                    self.scheduler.trigger()
+                self._check_started()
+
+                # Like the real schedulers, retry periodically while executions are waiting. Stop when they can never start.
+                stuck = len(self._events) == 0 and self._running_count() == 0
+                if len(self._waiting) > 0 and not self._tick_pending and not stuck:
+                    self._push(self.now + TICK_INTERVAL, _TICK)
+                    self._tick_pending = True
+        finally:
+            self.scheduler.quit()
+            zoe_master.backends.interface.shutdown_backend()
+
+        return self.metrics()
+
+    def metrics(self):
+        """Compute the metrics of a completed simulation."""
+        completed = [r for r in self._records if r.end is not None]
+        turnaround = [r.end - r.entry.arrival for r in completed]
+        wait = [r.start - r.entry.arrival for r in completed]
+        ret = {
+            'scheduler': self.scheduler_class.__name__,
+            'policy': self.policy,
+            'executions': len(self._records),
+            'completed': len(completed),
+            'failed': len([r for r in self._records if r.execution.status == Execution.ERROR_STATUS]),
+            'never_started': len(self._waiting),
+            'makespan': None,
+            'turnaround_mean': None,
+            'turnaround_p50': percentile(turnaround, 50),
+            'turnaround_p90': percentile(turnaround, 90),
+            'turnaround_p99': percentile(turnaround, 99),
+            'wait_mean': None,
+            'wait_p90': percentile(wait, 90),
+            'memory_utilization': None,
+            'cores_utilization': None
+        }
+        if len(completed) > 0:
+            first_arrival = min(r.entry.arrival for r in self._records)
+            makespan = max(r.end for r in completed) - first_arrival
+            ret['makespan'] = makespan
+            ret['turnaround_mean'] = sum(turnaround) / len(turnaround)
+            ret['wait_mean'] = sum(wait) / len(wait)
+            memory_total = sum(node.memory_total for node in self.backend.nodes)
+            cores_total = sum(node.cores_total for node in self.backend.nodes)
+            if makespan > 0:
+                ret['memory_utilization'] = self._memory_area / (memory_total * makespan) if memory_total > 0 else None
+                ret['cores_utilization'] = self._cores_area / (cores_total * makespan) if cores_total > 0 else None
+        return ret
+
+
+def simulate(entries, nodes, scheduler_class_name, policies, placement='least-loaded'):
+    """Simulate a trace with each policy, return a list of metric dictionaries."""
+    config.load_configuration(argparse.Namespace(
+        debug=False,
+        deployment_name='simulator',
+        proxy_path='127.0.0.1',
+        workspace_base_path='/mnt/zoe-workspaces',
+        workspace_deployment_path='simulator',
+        backend_threads=1,  # services are placed one at a time, so that results are reproducible
+        max_concurrent_terminations=1,
+        platform_state_max_age=10,
+        scheduler_placement=placement
+    ))
+    scheduler_class = getattr(zoe_master.scheduler, scheduler_class_name)
+    results = []
+    for policy in policies:
+        try:
+            results.append(Simulation(entries, nodes, scheduler_class, policy).run())
+        except UnsupportedSchedulerPolicyError:
+            log.warning('Scheduler {} does not support the {} policy, skipping'.format(scheduler_class_name, policy))
+    return results
+
+
+def _format(value, scale=1, fmt='{:.1f}'):
+    if value is None:
+        return '-'
+    return fmt.format(value / scale)
+
+
+def print_results(results):
+    """Print a table with the metrics of each simulation."""
+    rows = [
+        ('completed/total', lambda r: '{}/{}'.format(r['completed'], r['executions'])),
+        ('failed', lambda r: str(r['failed'])),
+        ('never started', lambda r: str(r['never_started'])),
+        ('makespan (h)', lambda r: _format(r['makespan'], 3600, '{:.2f}')),
+        ('turnaround mean (min)', lambda r: _format(r['turnaround_mean'], 60)),
+        ('turnaround p50 (min)', lambda r: _format(r['turnaround_p50'], 60)),
+        ('turnaround p90 (min)', lambda r: _format(r['turnaround_p90'], 60)),
+        ('turnaround p99 (min)', lambda r: _format(r['turnaround_p99'], 60)),
+        ('queue wait mean (min)', lambda r: _format(r['wait_mean'], 60)),
+        ('queue wait p90 (min)', lambda r: _format(r['wait_p90'], 60)),
+        ('memory utilization (%)', lambda r: _format(r['memory_utilization'], 0.01)),
+        ('cores utilization (%)', lambda r: _format(r['cores_utilization'], 0.01))
+    ]
+    print('{:<24}'.format('') + ''.join('{:>14}'.format(r['policy']) for r in results))
+    for title, fmt in rows:
+        print('{:<24}'.format(title) + ''.join('{:>14}'.format(fmt(r)) for r in results))
+
+
+def main():
+    """
+    The entrypoint for the zoe-simulator script.
+    :return: int
+    """
+    argparser = argparse.ArgumentParser(description="Zoe - offline scheduler simulator")
+    argparser.add_argument('--debug', action='store_true', help='Enable debug output')
+    argparser.add_argument('--trace', help='JSON workload trace, a random workload is generated if not given')
+    argparser.add_argument('--executions', type=int, help='Number of executions in the random workload', default=100)
+    argparser.add_argument('--mean-interarrival', type=float, help='Mean time between arrivals in the random workload, in seconds', default=120)
+    argparser.add_argument('--mean-duration', type=float, help='Mean execution duration in the random workload, in seconds', default=1800)
+    argparser.add_argument('--seed', type=int, help='Seed for the random workload', default=0)
+    argparser.add_argument('--nodes', type=int, help='Number of nodes, if not given by the trace', default=4)
+    argparser.add_argument('--node-memory', type=int, help='Memory of each node, in GiB', default=64)
+    argparser.add_argument('--node-cores', type=int, help='Cores of each node', default=16)
+    argparser.add_argument('--scheduler-class', choices=['ZoeSimpleScheduler', 'ZoeElasticScheduler'], default='ZoeElasticScheduler')
+    argparser.add_argument('--scheduler-placement', choices=['least-loaded', 'best-fit', 'dominant-resource-fit'], default='least-loaded')
+    argparser.add_argument('--policies', help='Comma-separated list of scheduler policies to compare', default='FIFO,SIZE')
+    argparser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = argparser.parse_args()
+
+    # The schedulers log at error level events that are routine in a simulation
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.CRITICAL)
+
+    nodes = None
+    if args.trace is not None:
+        nodes, entries = load_trace(args.trace)
+    else:
+        entries = synthetic_trace(args.executions, args.mean_interarrival, args.mean_duration, args.seed)
+    if nodes is None:
+        nodes = [('node{}'.format(i), args.node_memory * GB, args.node_cores) for i in range(args.nodes)]
+
+    results = simulate(entries, nodes, args.scheduler_class, args.policies.split(','), args.scheduler_placement)
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print_results(results)
+    return 0
@@ -0,0 +1,268 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Write-through cache of the active part of the Zoe state, used by the master."""
+
+import logging
+import threading
+
+from zoe_lib.state import SQLManager, Execution, Service, Port
+
+log = logging.getLogger(__name__)
+
+ACTIVE_EXECUTION_STATUSES = [Execution.SCHEDULED_STATUS, Execution.STARTING_STATUS, Execution.RUNNING_STATUS, Execution.CLEANING_UP_STATUS]
+
+
+class _Index:
+    """A set of objects of the same type, indexed by ID and by some of their fields."""
+    def __init__(self, fields):
+        self.by_id = {}
+        self.fields = fields
+        self.indexes = dict((field, {}) for field in fields)
+        self._indexed_values = {}
+
+    def add(self, obj):
+        """Add an object, or update its index entries if it is already present."""
+        self.by_id[obj.id] = obj
+        self.update(obj.id, dict((field, getattr(obj, field)) for field in self.fields))
+
+    def update(self, obj_id, values):
+        """Move an object in the indexes, given the new values of (some of) its fields."""
+        if obj_id not in self.by_id:
+            return
+        indexed = self._indexed_values.setdefault(obj_id, {})
+        for field, value in values.items():
+            if field not in self.indexes:
+                continue
+            if field in indexed:
+                old_set = self.indexes[field].get(indexed[field])
+                if old_set is not None:
+                    old_set.discard(obj_id)
+                    if len(old_set) == 0:
+                        del self.indexes[field][indexed[field]]
+            self.indexes[field].setdefault(value, set()).add(obj_id)
+            indexed[field] = value
+
+    def remove(self, obj_id):
+        """Remove an object and its index entries."""
+        self.by_id.pop(obj_id, None)
+        for field, value in self._indexed_values.pop(obj_id, {}).items():
+            id_set = self.indexes[field].get(value)
+            if id_set is not None:
+                id_set.discard(obj_id)
+                if len(id_set) == 0:
+                    del self.indexes[field][value]
+
+    def lookup(self, field, value):
+        """Return the objects having field equal to value."""
+        if field == 'id':
+            obj = self.by_id.get(value)
+            return [] if obj is None else [obj]
+        return [self.by_id[obj_id] for obj_id in self.indexes[field].get(value, set())]
+
+
+class CachedSQLManager(SQLManager):
+    """
+    A SQLManager that keeps the active executions, their services and ports in memory.
+
+    All updates are written to the database and to the cache at the same time. Queries that can be answered with the cached
+    objects never reach the database, the others are passed to SQLManager and their results are added to the cache if they
+    refer to active executions. The master is the only process that changes the state of active executions, so the cache
+    cannot become stale.
+
+    Executions leave the cache when they stop being active. Their services stay until the backend reports them as dead, so
+    that the state synchronizers can still update them.
+
+    Note that a service_list() call without filters returns only the cached services: services of old executions, whose
+    containers are already gone, are not returned.
+    """
+    def __init__(self, conf):
+        super().__init__(conf)
+        self._cache_lock = threading.RLock()
+        self._executions = _Index(['status'])
+        self._services = _Index(['execution_id', 'backend_id', 'status'])
+        self._ports = _Index(['service_id'])
+        self._warm_up()
+
+    def _warm_up(self):
+        """Load all active executions at startup."""
+        count = 0
+        for status in ACTIVE_EXECUTION_STATUSES:
+            for execution in super().execution_list(status=status, load_services=True):
+                self._cache_add_execution(execution)
+                count += 1
+        log.info('State cache loaded with {} active executions and {} services'.format(count, len(self._services.by_id)))
+
+    def _cache_add_execution(self, execution: Execution):
+        """Add an execution and all its services and ports to the cache. Services are loaded from the DB if needed."""
+        services = execution.services
+        ports = [(service, service.ports) for service in services]
+        with self._cache_lock:
+            self._executions.add(execution)
+            for service, service_ports in ports:
+                self._services.add(service)
+                for port in service_ports:
+                    self._ports.add(port)
+
+    def _cache_evict_service(self, service_id):
+        for port in self._ports.lookup('service_id', service_id):
+            self._ports.remove(port.id)
+        self._services.remove(service_id)
+
+    def _cache_evict_execution(self, execution_id):
+        """An execution is no longer active: forget about it and about its services that are already dead."""
+        self._executions.remove(execution_id)
+        for service in self._services.lookup('execution_id', execution_id):
+            if service.is_dead():
+                self._cache_evict_service(service.id)
+
+    @staticmethod
+    def _filter(objects, filters):
+        return [obj for obj in objects if all(getattr(obj, key) == value for key, value in filters.items())]
+
+    def _cache_query(self, index: _Index, authoritative, filters):
+        """
+        Try to answer a query from the cache.
+
+        :param index: the index to query
+        :param authoritative: a function that, given a field name and a value, tells if the cache contains all objects matching it
+        :param filters: the query filters
+        :return: a list of objects or None if the query has to go to the database
+        """
+        with self._cache_lock:
+            for field in ['id'] + index.fields:
+                if field in filters and authoritative(field, filters[field]):
+                    return self._filter(index.lookup(field, filters[field]), filters)
+        return None
+
+    def execution_list(self, only_one=False, limit=-1, load_services=False, **kwargs):
+        """Return a list of executions, see SQLManager.execution_list()."""
+        ret = None
+        if limit <= 0 and len(kwargs) > 0 and set(kwargs.keys()) <= {'id', 'status'}:
+            ret = self._cache_query(self._executions, lambda field, value: value in ACTIVE_EXECUTION_STATUSES if field == 'status' else value in self._executions.by_id, kwargs)
+        if ret is not None:
+            if only_one:
+                return ret[0] if len(ret) > 0 else None
+            return ret
+
+        ret = super().execution_list(only_one, limit, load_services, **kwargs)
+        for execution in [ret] if only_one else ret:
+            if execution is not None and execution.is_active and execution.id not in self._executions.by_id:
+                self._cache_add_execution(execution)
+        return ret
+
+    def execution_update(self, exec_id, **kwargs):
+        """Update the state of an execution."""
+        super().execution_update(exec_id, **kwargs)
+        if 'status' not in kwargs:
+            return
+        with self._cache_lock:
+            cached = exec_id in self._executions.by_id
+            if cached:
+                self._executions.update(exec_id, kwargs)
+                if kwargs['status'] not in ACTIVE_EXECUTION_STATUSES:
+                    self._cache_evict_execution(exec_id)
+                return
+        if kwargs['status'] in ACTIVE_EXECUTION_STATUSES:
+            execution = self._cached(Execution, exec_id)
+            if execution is not None:
+                self._cache_add_execution(execution)
+
+    def service_list(self, only_one=False, **kwargs):
+        """Return a list of services, see SQLManager.service_list()."""
+        if len(kwargs) == 0:
+            with self._cache_lock:
+                ret = list(self._services.by_id.values())
+        else:
+            def _authoritative(field, value):
+                if field == 'execution_id':
+                    return value in self._executions.by_id
+                return field in ('id', 'backend_id') and value is not None and len(self._services.lookup(field, value)) > 0
+            ret = self._cache_query(self._services, _authoritative, kwargs)
+        if ret is None:
+            return super().service_list(only_one, **kwargs)
+        if only_one:
+            return ret[0] if len(ret) > 0 else None
+        return ret
+
+    def service_update(self, service_id, **kwargs):
+        """Update the state of an existing service."""
+        super().service_update(service_id, **kwargs)
+        with self._cache_lock:
+            service = self._services.by_id.get(service_id)
+            if service is None:
+                return
+            self._services.update(service_id, kwargs)
+            if service.execution_id not in self._executions.by_id and kwargs.get('backend_status') in (Service.BACKEND_DESTROY_STATUS, Service.BACKEND_DIE_STATUS, Service.BACKEND_OOM_STATUS):
+                self._cache_evict_service(service_id)
+
+    def service_new(self, execution_id, name, service_group, description, is_essential):
+        """Adds a new service to the state."""
+        service_id = super().service_new(execution_id, name, service_group, description, is_essential)
+        with self._cache_lock:
+            if execution_id in self._executions.by_id:
+                row = {
+                    'id': service_id,
+                    'status': 'created',
+                    'error_message': None,
+                    'execution_id': execution_id,
+                    'name': name,
+                    'service_group': service_group,
+                    'description': description,
+                    'essential': is_essential,
+                    'backend_id': None,
+                    'backend_status': Service.BACKEND_UNDEFINED_STATUS,
+                    'ip_address': None
+                }
+                self._services.add(self._from_row(Service, row))
+        return service_id
+
+    def _services_new(self, execution_id, services):
+        """Adds many services and their ports to the state, see SQLManager.services_new()."""
+        new_services = super()._services_new(execution_id, services)
+        with self._cache_lock:
+            if execution_id in self._executions.by_id:
+                for service in new_services:
+                    self._services.add(service)
+                    for port in service.ports:
+                        self._ports.add(port)
+        return new_services
+
+    def port_list(self, only_one=False, **kwargs):
+        """Return a list of ports, see SQLManager.port_list()."""
+        ret = None
+        if len(kwargs) > 0:
+            ret = self._cache_query(self._ports, lambda field, value: value in (self._ports.by_id if field == 'id' else self._services.by_id), kwargs)
+        if ret is None:
+            return super().port_list(only_one, **kwargs)
+        if only_one:
+            return ret[0] if len(ret) > 0 else None
+        return ret
+
+    def port_new(self, service_id, internal_name, description):
+        """Adds a new port to the state."""
+        port_id = super().port_new(service_id, internal_name, description)
+        with self._cache_lock:
+            if service_id in self._services.by_id:
+                row = {
+                    'id': port_id,
+                    'service_id': service_id,
+                    'internal_name': internal_name,
+                    'external_ip': None,
+                    'external_port': None,
+                    'description': description
+                }
+                self._ports.add(self._from_row(Port, row))
+        return port_id
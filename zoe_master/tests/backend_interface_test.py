@@ -0,0 +1,107 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_master/backends/interface.py"""
+
+import argparse
+
+from zoe_lib import config
+from zoe_lib.state import Execution, MemoryStateManager
+from zoe_master.backends import interface
+from zoe_master.backends.simulated import SimulatedBackend
+from zoe_master.preprocessing import _digest_application_description
+from zoe_master.simulator import GB, synthetic_trace
+
+
+class _GroupBackend(SimulatedBackend):
+    """A simulated backend that starts and terminates whole service groups."""
+    group_operations = True
+
+    def __init__(self, conf, nodes):
+        super().__init__(conf, nodes)
+        self.calls = []
+
+    def spawn_service_group(self, service_instances):
+        """Record the call and place the services one by one."""
+        self.calls.append(('spawn', len(service_instances)))
+        return [self.spawn_service(instance) for instance in service_instances]
+
+    def terminate_service_group(self, services):
+        """Record the call and release the services one by one."""
+        self.calls.append(('terminate', len(services)))
+        for service in services:
+            self.terminate_service(service)
+
+
+def test_group_operations():
+    """Backends with group operations receive one call per service group."""
+    config.load_configuration(argparse.Namespace(deployment_name='test', proxy_path='127.0.0.1', workspace_base_path='/tmp',
+                                                 workspace_deployment_path='test', backend_threads=4, platform_state_max_age=10))
+    entry = synthetic_trace(1, 1, 1, seed=3)[0]
+    state = MemoryStateManager()
+    execution = state.execution_list(id=state.execution_new(entry.name, entry.user_id, entry.description), only_one=True)
+    _digest_application_description(state, execution)
+    backend = _GroupBackend(config.get_conf(), [('node0', 256 * GB, 64)])
+    interface.initialize_backend(state, backend)
+    try:
+        assert interface.start_all(execution) == 'ok'
+        workers = len([s for s in execution.services if s.service_group == 'worker'])
+        assert backend.calls == [('spawn', 1), ('spawn', workers)]
+
+        interface.terminate_execution(execution)
+        assert execution.status == Execution.TERMINATED_STATUS
+        assert sorted(backend.calls[2:]) == sorted([('terminate', 1), ('terminate', workers)])
+        assert backend.reserved() == (0, 0)
+    finally:
+        interface.shutdown_backend()
+
+
+class _EnvBackend(SimulatedBackend):
+    """A simulated backend that records the environment of the services it starts."""
+    def __init__(self, conf, nodes):
+        super().__init__(conf, nodes)
+        self.environments = {}
+
+    def spawn_service(self, service_instance):
+        """Record the environment and place the service."""
+        self.environments[service_instance.hostname] = dict(service_instance.environment)
+        return super().spawn_service(service_instance)
+
+
+def test_elastic_services_refer_to_essential_ones():
+    """Elastic services started after their execution is running can use the DNS names of the essential services."""
+    config.load_configuration(argparse.Namespace(deployment_name='test', proxy_path='127.0.0.1', workspace_base_path='/tmp',
+                                                 workspace_deployment_path='test', backend_threads=4, platform_state_max_age=10))
+    entry = synthetic_trace(1, 1, 1, seed=3)[0]
+    for service_description in entry.description['services']:
+        if service_description['name'] == 'worker':
+            service_description.update(essential_count=1, total_count=3, environment=[['SPARK_MASTER', '{dns_name#master0}']])
+    state = MemoryStateManager()
+    execution = state.execution_list(id=state.execution_new(entry.name, entry.user_id, entry.description), only_one=True)
+    _digest_application_description(state, execution)
+    backend = _EnvBackend(config.get_conf(), [('node0', 256 * GB, 64)])
+    interface.initialize_backend(state, backend)
+    try:
+        assert interface.start_essential(execution) == 'ok'
+        for service in execution.elastic_services:
+            service.set_runnable()
+        assert interface.start_elastic(execution) == 'ok'
+
+        master = [s for s in execution.services if s.name == 'master0'][0]
+        for service in execution.services:
+            if service.service_group == 'worker':
+                assert backend.environments[service.dns_name]['SPARK_MASTER'] == master.dns_name
+    finally:
+        interface.shutdown_backend()
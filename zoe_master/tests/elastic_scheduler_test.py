@@ -0,0 +1,80 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_master/scheduler/elastic_scheduler.py"""
+
+import argparse
+
+from zoe_lib import config
+from zoe_lib.state import MemoryStateManager
+from zoe_master.backends import interface
+from zoe_master.backends.simulated import SimulatedBackend
+from zoe_master.preprocessing import _digest_application_description
+from zoe_master.scheduler import ZoeElasticScheduler
+from zoe_master.simulator import GB, synthetic_trace
+
+MAX_SPAWN_ATTEMPTS = 100
+
+
+class _SpinningScheduler(BaseException):
+    """Raised by the backend to get out of a scheduling round that does not end, not caught by the backend interface."""
+
+
+class _OvercommittedBackend(SimulatedBackend):
+    """A simulated backend that reports more free memory than its nodes have, like a stale platform snapshot."""
+    def __init__(self, conf, nodes):
+        super().__init__(conf, nodes)
+        self.spawn_attempts = 0
+
+    def spawn_service(self, service_instance):
+        """Count the attempts and place the service."""
+        self.spawn_attempts += 1
+        if self.spawn_attempts > MAX_SPAWN_ATTEMPTS:
+            raise _SpinningScheduler()
+        return super().spawn_service(service_instance)
+
+    def platform_state(self):
+        """Report 256 GB more on each node."""
+        platform_stats = super().platform_state()
+        for node in platform_stats.nodes:
+            node.memory_total += 256 * GB
+            node.memory_free += 256 * GB
+        return platform_stats
+
+
+def test_round_ends_when_nothing_can_start():
+    """A scheduling round stops when the snapshot places services that the platform cannot host."""
+    config.load_configuration(argparse.Namespace(deployment_name='test', proxy_path='127.0.0.1', workspace_base_path='/tmp',
+                                                 workspace_deployment_path='test', backend_threads=1, platform_state_max_age=10,
+                                                 scheduler_placement='least-loaded', max_concurrent_terminations=1))
+    entry = synthetic_trace(1, 1, 1, seed=3)[0]
+    for service_description in entry.description['services']:
+        service_description['resources']['memory'] = {'min': 4 * GB, 'max': 4 * GB}
+        service_description['resources']['cores'] = {'min': 1, 'max': 1}
+        if service_description['name'] == 'worker':
+            service_description.update(essential_count=1, total_count=6)
+    state = MemoryStateManager()
+    execution = state.execution_list(id=state.execution_new(entry.name, entry.user_id, entry.description), only_one=True)
+    execution.set_scheduled()
+    _digest_application_description(state, execution)
+    backend = _OvercommittedBackend(config.get_conf(), [('node0', 16 * GB, 16)])
+    interface.initialize_backend(state, backend)
+    scheduler = ZoeElasticScheduler(state, 'FIFO', synchronous=True)
+    try:
+        scheduler.incoming(execution)
+        assert backend.spawn_attempts < MAX_SPAWN_ATTEMPTS
+    finally:
+        scheduler.quit()
+        interface.shutdown_backend()
@@ -0,0 +1,135 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_master/backends/kubernetes/backend.py"""
+
+import argparse
+import threading
+import time
+
+import pytest
+
+from zoe_lib import config
+from zoe_lib.state import Execution, MemoryStateManager
+from zoe_master.backends import interface
+from zoe_master.backends.kubernetes import backend as kubernetes_backend
+from zoe_master.preprocessing import _digest_application_description
+from zoe_master.simulator import synthetic_trace
+from zoe_master.stats import ClusterStats, NodeStats
+
+
+class _FakeKubernetesClient:
+    """Keeps the replica count of the deployments in memory."""
+    def __init__(self, opts_):
+        self.replicas = {}
+
+    def _info(self, name):
+        return {'backend_id': 'uid-' + name, 'ip_address': None, 'replicas': self.replicas[name]}
+
+    def inspect_deployment(self, name):
+        """Return the deployment, or None."""
+        return self._info(name) if name in self.replicas else None
+
+    def spawn_deployment(self, name, replicas, service_instance_):
+        """Create a deployment."""
+        self.replicas[name] = replicas
+        return self._info(name)
+
+    def scale_deployment(self, name, replicas):
+        """Change the replicas of a deployment."""
+        self.replicas[name] = replicas
+        return self._info(name)
+
+    def terminate_deployment(self, name):
+        """Delete a deployment."""
+        del self.replicas[name]
+
+    def info(self):
+        """A single empty node."""
+        stats = ClusterStats()
+        node = NodeStats('node0')
+        node.memory_total = node.memory_reserved = 0
+        node.cores_total = node.cores_reserved = 0
+        stats.nodes.append(node)
+        return stats
+
+
+class _KubernetesBackend(kubernetes_backend.KubernetesBackend):
+    """The Kubernetes backend without the informer and monitor threads."""
+    def init(self, state):
+        """Nothing to start."""
+        pass
+
+    def shutdown(self):
+        """Nothing to stop."""
+        pass
+
+
+@pytest.fixture
+def execution(monkeypatch):
+    """An execution with its services, the Kubernetes backend in Deployment mode is initialized."""
+    monkeypatch.setattr(kubernetes_backend, 'KubernetesClient', _FakeKubernetesClient)
+    config.load_configuration(argparse.Namespace(deployment_name='test', proxy_path='127.0.0.1', workspace_base_path='/tmp',
+                                                 workspace_deployment_path='test', backend_threads=4, platform_state_max_age=10,
+                                                 kube_workload='Deployment', kube_namespace='default'))
+    entry = synthetic_trace(1, 1, 1, seed=3)[0]
+    for service_description in entry.description['services']:
+        if service_description['name'] == 'worker':
+            service_description.update(essential_count=3, total_count=3)
+    state = MemoryStateManager()
+    execution = state.execution_list(id=state.execution_new(entry.name, entry.user_id, entry.description), only_one=True)
+    _digest_application_description(state, execution)
+    interface.initialize_backend(state, _KubernetesBackend(config.get_conf()))
+    yield execution
+    interface.shutdown_backend()
+
+
+def test_deployment_reservations(execution):
+    """Each replica of a deployment reserves and releases its own resources in the platform state cache."""
+    cache = interface._get_platform_state_cache()
+    assert interface.start_all(execution) == 'ok'
+    workers = [s for s in execution.services if s.service_group == 'worker']
+    assert len(set(s.backend_id for s in workers)) == 1
+    reservation = (None, workers[0].resource_reservation.memory.min, workers[0].resource_reservation.cores.min)
+    assert cache._reservations[workers[0].backend_id] == [reservation] * 3
+
+    interface.terminate_execution(execution)
+    assert execution.status == Execution.TERMINATED_STATUS
+    assert cache._reservations == {}
+    assert cache._released == set(s.backend_id for s in execution.services)
+
+
+def test_deployment_locks_released(execution):
+    """The lock of a deployment is kept while a thread waits for it and forgotten afterwards."""
+    backend = interface._get_backend()
+    with backend._deployment_lock('worker'):
+        waiter_done = threading.Event()
+
+        def _wait():
+            with backend._deployment_lock('worker'):
+                pass
+            waiter_done.set()
+        waiter = threading.Thread(target=_wait)
+        waiter.start()
+        while backend._deployment_locks['worker'][1] < 2:
+            time.sleep(0.01)
+        assert not waiter_done.is_set()
+    waiter.join()
+    assert waiter_done.is_set()
+    assert backend._deployment_locks == {}
+
+    assert interface.start_all(execution) == 'ok'
+    interface.terminate_execution(execution)
+    assert backend._deployment_locks == {}
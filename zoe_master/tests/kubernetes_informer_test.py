@@ -0,0 +1,100 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_master/backends/kubernetes/informer.py"""
+
+from collections import namedtuple
+
+import pytest
+
+pytest.importorskip('pykube')
+
+from zoe_master.backends.kubernetes.informer import Informer  # noqa: E402
+
+WatchEvent = namedtuple('WatchEvent', 'type object')
+FakeObject = namedtuple('FakeObject', 'obj')
+
+
+def _rc(name, version, labels=None):
+    return {'metadata': {'name': name, 'namespace': 'zoe', 'resourceVersion': version, 'labels': labels or {}}}
+
+
+class _FakeQuery:
+    """Replays a list response and one watch stream for each call to watch()."""
+    def __init__(self, api):
+        self.api = api
+
+    def filter(self, **kwargs_):
+        """Filters are applied by the API server, nothing to do."""
+        return self
+
+    def __iter__(self):
+        self.api.lists += 1
+        return iter([FakeObject(obj) for obj in self.api.objects])
+
+    @property
+    def response(self):
+        """The list metadata."""
+        return {'metadata': {'resourceVersion': self.api.list_version}}
+
+    def watch(self, since):
+        """Return the next recorded stream."""
+        self.api.watched_from.append(since)
+        return self.api.streams.pop(0)
+
+
+class _FakeAPI:
+    """Holds the objects and the watch streams seen by the informer."""
+    def __init__(self, objects, list_version, streams):
+        self.objects = objects
+        self.list_version = list_version
+        self.streams = streams
+        self.lists = 0
+        self.watched_from = []
+
+
+class _FakeKind:
+    """Stands for a pykube object class."""
+    kind = 'ReplicationController'
+
+    @staticmethod
+    def objects(api):
+        """Start a query."""
+        return _FakeQuery(api)
+
+
+def test_list_and_watch():
+    """Watch events are applied to the cache, streams resume from the last version and expired versions cause a new list."""
+    api = _FakeAPI([_rc('a', '1', {'app': 'zoe'})], '5', [])
+    informer = Informer(api, _FakeKind, 'zoe')
+    events = []
+    informer.add_handler(lambda event_type, obj: events.append((event_type, obj['metadata']['name'])))
+    api.streams = [
+        [WatchEvent('ADDED', FakeObject(_rc('b', '6'))), WatchEvent('MODIFIED', FakeObject(_rc('a', '7', {'app': 'zoe'})))],
+        [WatchEvent('DELETED', FakeObject(_rc('b', '8'))), WatchEvent('ERROR', FakeObject({'code': 410}))],
+    ]
+
+    informer._relist()  # pylint: disable=protected-access
+    informer._watch()  # pylint: disable=protected-access
+    assert informer.get('b') is not None
+    assert informer.get('a')['metadata']['resourceVersion'] == '7'
+    informer._watch()  # pylint: disable=protected-access
+    assert informer.get('b') is None
+    assert informer.resource_version is None
+
+    assert api.watched_from == ['5', '7']
+    assert api.lists == 1
+    assert events == [('ADDED', 'a'), ('ADDED', 'b'), ('MODIFIED', 'a'), ('DELETED', 'b')]
+    assert [obj['metadata']['name'] for obj in informer.list({'app': 'zoe'})] == ['a']
@@ -0,0 +1,87 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_master/backends/platform_state.py"""
+
+from zoe_master.backends.platform_state import PlatformStateCache
+from zoe_master.stats import ClusterStats, NodeStats
+
+
+class _Backend:
+    """Counts the platform state requests."""
+    def __init__(self):
+        self.calls = 0
+
+    def platform_state(self):
+        """Return a cluster with a single empty node."""
+        self.calls += 1
+        stats = ClusterStats()
+        node = NodeStats('node0')
+        node.memory_total = node.memory_free = 100
+        node.cores_total = node.cores_free = 10
+        stats.nodes.append(node)
+        return stats
+
+
+def test_incremental_updates():
+    """Services placed on a known node are applied to the snapshot without querying the backend."""
+    backend = _Backend()
+    cache = PlatformStateCache(backend.platform_state, 60)
+    cache.get()
+    cache.service_started('c1', 'node0', 30, 2)
+    node = cache.get().nodes[0]
+    assert (node.memory_free, node.cores_free, node.container_count) == (70, 8, 1)
+    cache.service_terminated('c1')
+    cache.service_destroyed('c1')
+    node = cache.get().nodes[0]
+    assert (node.memory_free, node.cores_free, node.container_count) == (100, 10, 0)
+    assert backend.calls == 1
+
+
+def test_refresh():
+    """Unattributed changes and a zero max age make the next request query the backend."""
+    backend = _Backend()
+    cache = PlatformStateCache(backend.platform_state, 60)
+    cache.get()
+    cache.service_started('c1', None, 30, 2)
+    cache.get()
+    assert backend.calls == 2
+    cache.service_destroyed('c2')
+    cache.get()
+    assert backend.calls == 3
+
+    cache = PlatformStateCache(backend.platform_state, 0)
+    cache.get()
+    cache.get()
+    assert backend.calls == 5
+
+
+def test_shared_backend_id():
+    """Services sharing a backend ID, like the replicas of a Kubernetes deployment, are accounted for one by one."""
+    backend = _Backend()
+    cache = PlatformStateCache(backend.platform_state, 60)
+    cache.get()
+    for _ in range(3):
+        cache.service_started('deployment-uid', 'node0', 10, 1)
+    node = cache.get().nodes[0]
+    assert (node.memory_free, node.cores_free, node.container_count) == (70, 7, 3)
+    cache.service_terminated('deployment-uid')
+    node = cache.get().nodes[0]
+    assert (node.memory_free, node.cores_free, node.container_count) == (80, 8, 2)
+    cache.service_terminated('deployment-uid')
+    cache.service_terminated('deployment-uid')
+    node = cache.get().nodes[0]
+    assert (node.memory_free, node.cores_free, node.container_count) == (100, 10, 0)
+    assert backend.calls == 1
@@ -0,0 +1,130 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_master/scheduler/simulated_platform.py"""
+
+from zoe_master.scheduler.placement import BestFitPlacement, DominantResourceFitPlacement
+from zoe_master.scheduler.simulated_platform import SimulatedPlatform
+from zoe_master.stats import ClusterStats, NodeStats
+
+
+class FakeService:
+    """The parts of a Service used by the simulated platform."""
+    ACTIVE_STATUS = 'active'
+
+    class _Reservation:  # pylint: disable=too-few-public-methods
+        def __init__(self, memory, cores):
+            self.memory = type('Memory', (), {'min': memory})
+            self.cores = type('Cores', (), {'min': cores})
+
+    def __init__(self, service_id, memory, essential=True, cores=None):
+        self.id = service_id
+        self.essential = essential
+        self.status = 'created'
+        self.resource_reservation = self._Reservation(memory, cores)
+
+    def set_runnable(self):
+        """Mark as runnable."""
+        self.status = 'runnable'
+
+    def set_inactive(self):
+        """Mark as inactive."""
+        self.status = 'inactive'
+
+
+class FakeExecution:  # pylint: disable=too-few-public-methods
+    """The parts of an Execution used by the simulated platform."""
+    def __init__(self, services):
+        self.essential_services = [s for s in services if s.essential]
+        self.elastic_services = [s for s in services if not s.essential]
+
+
+def _platform(*nodes, placement=None):
+    """Build a platform from (free memory, container count[, free cores]) tuples."""
+    stats = ClusterStats()
+    for index, node_data in enumerate(nodes):
+        node = NodeStats('node{}'.format(index))
+        node.memory_free = node_data[0]
+        node.container_count = node_data[1]
+        node.cores_free = node_data[2] if len(node_data) > 2 else 0
+        stats.nodes.append(node)
+    return SimulatedPlatform(stats, placement)
+
+
+class TestSimulatedPlatform:
+    """Simulated placement tests."""
+
+    def test_least_loaded_node_first(self):
+        """Services go to the node with less containers, the first one in case of ties."""
+        platform = _platform((100, 2), (100, 1), (100, 1))
+        execution = FakeExecution([FakeService(1, 10), FakeService(2, 10), FakeService(3, 10)])
+        assert platform.allocate_essential(execution)
+        assert platform.get_service_allocation() == {1: 'node1', 2: 'node2', 3: 'node0'}
+
+    def test_skip_nodes_without_memory(self):
+        """A service is not placed on a node where it does not fit, even if it is the least loaded."""
+        platform = _platform((10, 0), (100, 5))
+        assert platform.allocate_essential(FakeExecution([FakeService(1, 10)]))
+        assert platform.get_service_allocation() == {1: 'node1'}
+        assert platform.aggregated_free_memory() == 100
+
+    def test_essential_all_or_nothing(self):
+        """If one essential service does not fit, none is allocated."""
+        platform = _platform((100, 0))
+        execution = FakeExecution([FakeService(1, 60), FakeService(2, 60)])
+        assert not platform.allocate_essential(execution)
+        assert platform.get_service_allocation() == {}
+        assert platform.aggregated_free_memory() == 100
+
+    def test_elastic_allocate_deallocate(self):
+        """Elastic services are allocated when they fit and give back their memory when removed."""
+        platform = _platform((100, 0), (50, 0))
+        services = [FakeService(1, 40, False), FakeService(2, 40, False), FakeService(3, 40, False), FakeService(4, 40, False)]
+        services[3].status = FakeService.ACTIVE_STATUS
+        execution = FakeExecution(services)
+        assert platform.allocate_elastic(execution)
+        assert platform.get_service_allocation() == {1: 'node0', 2: 'node1', 3: 'node0'}
+        assert [s.status for s in services] == ['runnable', 'runnable', 'runnable', 'active']
+        assert platform.aggregated_free_memory() == 30
+        assert platform.nodes['node0'].container_count == 2
+
+        platform.deallocate_elastic(execution)
+        assert platform.get_service_allocation() == {}
+        assert [s.status for s in services] == ['inactive', 'inactive', 'inactive', 'active']
+        assert platform.aggregated_free_memory() == 150
+        assert platform.nodes['node0'].node_free_memory() == 100
+
+    def test_cores(self):
+        """Services that reserve cores go only where there are enough free cores."""
+        platform = _platform((100, 0, 2), (100, 5, 8))
+        execution = FakeExecution([FakeService(1, 10, cores=4), FakeService(2, 10, cores=2), FakeService(3, 10, cores=4)])
+        assert platform.allocate_essential(execution)
+        assert platform.get_service_allocation() == {1: 'node1', 2: 'node0', 3: 'node1'}
+        assert platform.aggregated_free_cores() == 0
+        assert not platform.allocate_essential(FakeExecution([FakeService(4, 10, cores=1)]))
+        assert platform.packing_efficiency()['cores'] == 1
+
+    def test_best_fit(self):
+        """Best fit fills the node that is left with the least free resources."""
+        platform = _platform((100, 0, 8), (30, 5, 8), placement=BestFitPlacement())
+        assert platform.allocate_essential(FakeExecution([FakeService(1, 20, cores=2), FakeService(2, 20, cores=2)]))
+        assert platform.get_service_allocation() == {1: 'node1', 2: 'node0'}
+
+    def test_dominant_resource_fit(self):
+        """Dominant resource fit prefers the node where the service uses the largest share of its scarcest resource."""
+        platform = _platform((100, 0, 4), (100, 0, 16), placement=DominantResourceFitPlacement())
+        assert platform.allocate_essential(FakeExecution([FakeService(1, 10, cores=4)]))
+        assert platform.get_service_allocation() == {1: 'node0'}
+        assert platform.packing_efficiency()['strategy'] == 'dominant-resource-fit'
@@ -0,0 +1,51 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_master/simulator.py"""
+
+from zoe_master.simulator import GB, percentile, simulate, synthetic_trace
+
+NODES = [('node{}'.format(i), 64 * GB, 16) for i in range(4)]
+
+
+def test_percentile():
+    """Nearest-rank percentiles."""
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile([3, 1, 2, 4], 90) == 4
+    assert percentile([5], 99) == 5
+
+
+def test_elastic_scheduler_policies():
+    """All executions of a workload complete with both policies and the results are reproducible."""
+    entries = synthetic_trace(40, 120, 1800, seed=1)
+    results = simulate(entries, NODES, 'ZoeElasticScheduler', ['FIFO', 'SIZE'])
+    assert [r['policy'] for r in results] == ['FIFO', 'SIZE']
+    for result in results:
+        assert result['completed'] == 40
+        assert result['makespan'] >= max(e.duration for e in entries)
+        assert 0 < result['memory_utilization'] <= 1
+        assert 0 < result['cores_utilization'] <= 1
+        assert result['turnaround_p50'] <= result['turnaround_p90'] <= result['turnaround_p99']
+    assert simulate(entries, NODES, 'ZoeElasticScheduler', ['FIFO', 'SIZE']) == results
+
+
+def test_simple_scheduler():
+    """The simple scheduler supports only the FIFO policy."""
+    entries = synthetic_trace(10, 600, 600, seed=2)
+    results = simulate(entries, NODES, 'ZoeSimpleScheduler', ['FIFO', 'SIZE'])
+    assert len(results) == 1
+    assert results[0]['completed'] == 10
+    assert results[0]['wait_mean'] >= 0
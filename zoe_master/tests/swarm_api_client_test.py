@@ -0,0 +1,46 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_master/backends/swarm/api_client.py"""
+
+import argparse
+
+from zoe_lib import config
+from zoe_master.backends.swarm import api_client
+
+
+class _FakeDockerClient:
+    """Remembers if it was closed."""
+    def __init__(self, base_url, version, tls):
+        self.base_url = base_url
+        self.closed = False
+
+    def close(self):
+        """Close the connections."""
+        self.closed = True
+
+
+def test_reconnect_keeps_old_client_open(monkeypatch):
+    """Calls still running with the old Docker client can complete after a reconnection."""
+    monkeypatch.setattr(api_client.docker, 'DockerClient', _FakeDockerClient)
+    monkeypatch.setattr(api_client, '_manager_address', None)
+    config.load_configuration(argparse.Namespace(backend_swarm_url='http://swarm:2375'))
+
+    swarm = api_client.SwarmClient()
+    old_cli = swarm.cli
+    swarm.reconnect()
+    assert swarm.cli is not old_cli
+    assert swarm.cli.base_url == 'http://swarm:2375'
+    assert not old_cli.closed
@@ -0,0 +1,60 @@
+# Copyright (c) 2017, Daniele Venzano
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for zoe_master/backends/swarm/threads.py"""
+
+import argparse
+
+from zoe_lib import config
+from zoe_lib.state import MemoryStateManager, Service
+from zoe_master.backends.swarm import threads
+from zoe_master.preprocessing import _digest_application_description
+from zoe_master.simulator import synthetic_trace
+
+
+class _FakeSwarm:
+    """Answers inspect_container() with a running container that exposes one port."""
+    def inspect_container(self, docker_id):
+        """Return the summary of the container."""
+        return {'id': docker_id, 'state': Service.BACKEND_START_STATUS, 'ports': {'8888/tcp': ('10.0.0.1', 32000)}}
+
+
+def test_start_event_before_set_active(monkeypatch):
+    """Events received while spawn_service() is still running are applied once the backend ID is recorded."""
+    config.load_configuration(argparse.Namespace(deployment_name='test', proxy_path='127.0.0.1', workspace_base_path='/tmp',
+                                                 workspace_deployment_path='test', backend_threads=4, platform_state_max_age=10))
+    entry = synthetic_trace(1, 1, 1, seed=3)[0]
+    state = MemoryStateManager()
+    execution = state.execution_list(id=state.execution_new(entry.name, entry.user_id, entry.description), only_one=True)
+    _digest_application_description(state, execution)
+    service = execution.services[0]
+    state.port_new(service.id, '8888/tcp', {'port_number': 8888, 'protocol': 'tcp', 'url_template': None})
+
+    monkeypatch.setattr(threads.SwarmMonitor, 'start', lambda self: None)
+    monitor = threads.SwarmMonitor(state)
+    monitor.swarm = _FakeSwarm()
+
+    assert monitor._event_cb({'Action': 'create', 'Actor': {'ID': 'c1'}})
+    assert monitor._event_cb({'Action': 'start', 'Actor': {'ID': 'c1'}})
+    assert service.backend_status == Service.BACKEND_UNDEFINED_STATUS
+
+    service.set_active('c1', '10.1.0.2')
+    monitor.service_registered(service)
+    assert service.backend_status == Service.BACKEND_START_STATUS
+    assert [(port.external_ip, port.external_port) for port in service.ports] == [('10.0.0.1', 32000)]
+
+    monitor.service_registered(service)  # the events are applied only once
+    assert monitor._event_cb({'Action': 'die', 'Actor': {'ID': 'c1'}})
+    assert service.backend_status == Service.BACKEND_DIE_STATUS